@@ -0,0 +1,52 @@
+"""
+Benchmark: automatic assignment strategies, solution quality against runtime.
+
+Reports, per intake size, the wall time of each strategy, how many students
+it placed and its mean distance per placed student relative to the optimum.
+
+Run with: python -m benchmarks.bench_assignment_strategies
+"""
+import time
+
+import numpy as np
+
+from src.model.assign import STRATEGIES, assignment_cost, solve
+
+# (esn_count, erasmus_count); capacity is chosen so everybody fits
+SIZES = ((50, 100), (200, 500), (500, 1_500), (1_000, 3_000))
+QUESTION_COUNT = 20
+TOP_K = 10
+
+
+def _distances(esn_count: int, erasmus_count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    esn = rng.integers(0, 2, size=(esn_count, QUESTION_COUNT))
+    erasmus = rng.integers(0, 2, size=(erasmus_count, QUESTION_COUNT))
+    return (esn[:, None, :] != erasmus[None, :, :]).sum(axis=2).astype(float)
+
+
+def main() -> None:
+    print(f"{'ESN x Erasmus':>16}{'strategy':>10}{'seconds':>10}{'placed':>9}{'mean dist':>11}{'vs optimal':>12}")
+    for esn_count, erasmus_count in SIZES:
+        distances = _distances(esn_count, erasmus_count)
+        capacities = np.full(esn_count, -(-erasmus_count // esn_count), dtype=int)
+
+        results = {}
+        for strategy in STRATEGIES:
+            start = time.perf_counter()
+            pairs = solve(distances, capacities, strategy, top_k=TOP_K)
+            elapsed = time.perf_counter() - start
+            mean = assignment_cost(distances, pairs) / max(len(pairs), 1)
+            results[strategy] = (elapsed, len(pairs), mean)
+
+        optimal_mean = results["optimal"][2]
+        for strategy, (elapsed, placed, mean) in results.items():
+            ratio = mean / optimal_mean if optimal_mean else 1.0
+            print(
+                f"{f'{esn_count} x {erasmus_count}':>16}{strategy:>10}{elapsed:>10.3f}"
+                f"{placed:>9}{mean:>11.2f}{ratio:>11.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
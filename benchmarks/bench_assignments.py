@@ -0,0 +1,51 @@
+"""
+Benchmark: AssignmentState operation cost as the number of assignments grows.
+
+Run with: python -m benchmarks.bench_assignments
+"""
+import random
+import timeit
+
+from src.controller.assignments import AssignmentState
+
+SIZES = (100, 1_000, 5_000, 20_000)
+ESN_COUNT = 200
+REPEAT = 2_000
+
+
+def _filled_state(size: int) -> AssignmentState:
+    state = AssignmentState()
+    for erasmus_index in range(size):
+        state.add_assignment(esn_index=erasmus_index % ESN_COUNT, erasmus_index=erasmus_index)
+    return state
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'assignments':>12}{'is_assigned':>14}{'for_esn':>14}{'remove+add':>14}   (microseconds per call)")
+    for size in SIZES:
+        state = _filled_state(size)
+        probes = [rng.randrange(size) for _ in range(REPEAT)]
+
+        def is_assigned():
+            for idx in probes:
+                state.is_erasmus_assigned(idx)
+
+        def for_esn():
+            for idx in probes:
+                state.get_assignments_for_esn(idx % ESN_COUNT)
+
+        def remove_add():
+            for idx in probes:
+                state.remove_assignment(idx)
+                state.add_assignment(esn_index=idx % ESN_COUNT, erasmus_index=idx)
+
+        timings = [
+            min(timeit.repeat(func, number=1, repeat=3)) / REPEAT * 1e6
+            for func in (is_assigned, for_esn, remove_add)
+        ]
+        print(f"{size:>12}" + "".join(f"{t:>14.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: workbook size and write time of the full vs compact layout.
+
+Run with: python -m benchmarks.bench_export_layout [--esn 150] [--erasmus 400] [--top-k 25]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.model import match, rank
+from src.view import export_xlsx
+
+
+def _synthetic_tables(esn_count: int, erasmus_count: int, question_count: int, context_count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    questions = [f"A) Option {i}\nB) Other {i}" for i in range(question_count)]
+
+    def table(rows: int, prefix: str) -> pd.DataFrame:
+        data = {
+            "Timestamp": np.arange(rows),
+            "Name": [f"{prefix}{i}" for i in range(rows)],
+            "Surname": [f"Surname{i}" for i in range(rows)],
+            "Whatsapp contact": [f"+421 900 {i:06d}" for i in range(rows)],
+        }
+        for c in range(context_count):
+            data[f"Context field {c}"] = [f"Free text answer {c} of {prefix}{i}" for i in range(rows)]
+        answers = rng.choice(np.array(["A", "B", ""], dtype=object), size=(rows, question_count), p=[0.47, 0.47, 0.06])
+        for q, question in enumerate(questions):
+            data[question] = answers[:, q]
+        return pd.DataFrame(data)
+
+    def vectors(df: pd.DataFrame) -> np.ndarray:
+        values = df[questions].to_numpy()
+        return np.where(values == "A", 0.0, np.where(values == "B", 1.0, np.nan))
+
+    esn_df = table(esn_count, "Buddy")
+    erasmus_df = table(erasmus_count, "Student")
+    return esn_df, erasmus_df, questions, vectors(esn_df), vectors(erasmus_df)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--esn", type=int, default=150)
+    parser.add_argument("--erasmus", type=int, default=400)
+    parser.add_argument("--questions", type=int, default=16)
+    parser.add_argument("--context", type=int, default=12, help="Number of non-question Erasmus fields")
+    parser.add_argument("--top-k", type=int, default=25)
+    args = parser.parse_args()
+
+    esn_df, erasmus_df, questions, esn_vec, erasmus_vec = _synthetic_tables(
+        args.esn, args.erasmus, args.questions, args.context
+    )
+    distances = match.compute_distance_matrix(esn_vec, erasmus_vec)
+    rankings = rank.rank_candidates(distances, erasmus_df, args.top_k, "Timestamp")
+    stats = {"erasmus_after_filter": len(erasmus_df)}
+
+    print(f"{args.esn} ESN x {args.erasmus} Erasmus, top_k={args.top_k}, {args.context} context fields")
+    print(f"{'layout':<10}{'size (KB)':>12}{'write (s)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in ("full", "compact"):
+            config = {
+                "schema": {"question_columns": questions},
+                "matching": {"metric": "hamming", "top_k": args.top_k},
+                "output": {"out_dir": str(Path(tmp) / layout), "layout": layout},
+            }
+            start = time.perf_counter()
+            out_path = export_xlsx.export_results(
+                rankings, esn_df, erasmus_df, stats, config,
+                esn_vectors=esn_vec, erasmus_vectors=erasmus_vec
+            )
+            elapsed = time.perf_counter() - start
+            print(f"{layout:<10}{out_path.stat().st_size / 1024:>12.1f}{elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
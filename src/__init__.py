@@ -0,0 +1,3 @@
+"""ESN UNIZA Buddy Matching System."""
+
+__version__ = "1.0.0"
@@ -0,0 +1,212 @@
+"""
+On-disk bundles of pipeline artifacts.
+
+A bundle is a directory holding everything in PipelineArtifacts, so a run
+can be reopened later without running the pipeline again:
+
+    manifest.json          format version, code version, fingerprint, config,
+                           stats, question columns, output paths and metrics
+    esn_df.parquet         filtered ESN table
+    erasmus_df.parquet     filtered Erasmus table
+    <name>.npy             the compact core arrays (see artifact_views): answer
+                           codes, distance counts and the rankings as flat
+                           index / distance arrays with per-row offsets
+
+Loading reads the manifest and the two tables; the arrays are memory-mapped,
+so their contents are only read from disk when they are accessed, and the
+derived views (float vectors and distances, ranking objects) are built from
+them on access. Parquet needs `pyarrow`.
+"""
+import json
+import shutil
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src import __version__
+from src.controller.artifact_views import RankingTable
+from src.controller.instrumentation import StageMetrics
+from src.controller.pipeline import PipelineArtifacts
+from src.view.export_table import arrow_safe
+
+# Bumped whenever the layout changes; bundles of other versions are rejected
+BUNDLE_FORMAT_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+
+# Bundles the GUI keeps under bundles_root; older ones are deleted
+DEFAULT_KEEP_BUNDLES = 10
+
+_FRAMES = ("esn_df", "erasmus_df")
+_ARRAYS = ("esn_answers", "erasmus_answers", "distance_counts")
+_RANKINGS = ("ranking_table", "reverse_ranking_table")
+
+
+def bundles_root(config: Dict) -> Path:
+    """Directory holding the saved bundles of a configuration: `<out_dir>/artifacts`."""
+    return Path(config.get("output", {}).get("out_dir", "outputs")) / "artifacts"
+
+
+def default_bundle_dir(config: Dict, fingerprint: str) -> Path:
+    """Where a run's bundle is saved: `<out_dir>/artifacts/<fingerprint prefix>`."""
+    return bundles_root(config) / fingerprint[:16]
+
+
+def is_bundle(path: Path) -> bool:
+    """True when `path` is a saved bundle directory."""
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+
+def list_bundles(root: Path) -> List[Path]:
+    """Bundles directly under `root`, most recently saved first."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    bundles = [path for path in root.iterdir() if is_bundle(path)]
+    return sorted(bundles, key=lambda path: (path / MANIFEST_FILE).stat().st_mtime, reverse=True)
+
+
+def prune_bundles(root: Path, keep: int = DEFAULT_KEEP_BUNDLES) -> int:
+    """Delete all but the `keep` most recently saved bundles under `root`; returns how many were deleted."""
+    stale = list_bundles(root)[keep:]
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+    return len(stale)
+
+
+def _write_frame(df: pd.DataFrame, path: Path) -> None:
+    try:
+        df.to_parquet(path)
+    except (TypeError, ValueError):
+        # Mixed-type object columns (e.g. numbers and text) are stored as text
+        arrow_safe(df).to_parquet(path)
+
+
+def save_artifacts(artifacts: PipelineArtifacts, bundle_dir: Optional[Path] = None) -> Path:
+    """
+    Save artifacts as a bundle and record its path in `artifacts.bundle_path`.
+
+    The bundle is written to a temporary directory first and then moved into
+    place, so a crashed save never leaves a half-written bundle behind. An
+    existing bundle of the same run (same fingerprint and format version) is
+    kept as it is.
+
+    Args:
+        artifacts: Artifacts of a completed pipeline run
+        bundle_dir: Target directory; default_bundle_dir when None
+
+    Returns:
+        The bundle directory
+    """
+    bundle_dir = Path(bundle_dir or default_bundle_dir(artifacts.config, artifacts.fingerprint))
+    if is_bundle(bundle_dir):
+        existing = _read_manifest(bundle_dir)
+        if (existing.get("fingerprint"), existing.get("format_version")) == (
+            artifacts.fingerprint, BUNDLE_FORMAT_VERSION
+        ):
+            artifacts.bundle_path = bundle_dir
+            return bundle_dir
+
+    tmp_dir = bundle_dir.with_name(f".{bundle_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    try:
+        for name in _FRAMES:
+            _write_frame(getattr(artifacts, name), tmp_dir / f"{name}.parquet")
+
+        arrays = {name: np.asarray(getattr(artifacts, name)) for name in _ARRAYS}
+        for name in _RANKINGS:
+            table = getattr(artifacts, name)
+            for part in ("offsets", "index", "distance"):
+                arrays[f"{name}_{part}"] = np.asarray(getattr(table, part))
+        for name, array in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", array)
+
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "code_version": __version__,
+            "fingerprint": artifacts.fingerprint,
+            "config": artifacts.config,
+            "stats": artifacts.stats,
+            "question_columns": list(artifacts.question_columns),
+            "output_path": _path_str(artifacts.output_path),
+            "output_paths": {fmt: str(path) for fmt, path in artifacts.output_paths.items()},
+            "reused_output_path": _path_str(artifacts.reused_output_path),
+            "metrics": [asdict(record) for record in artifacts.metrics],
+            "arrays": {
+                name: {"shape": list(array.shape), "dtype": str(array.dtype)} for name, array in arrays.items()
+            },
+        }
+        with (tmp_dir / MANIFEST_FILE).open("w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2, default=str)
+
+        shutil.rmtree(bundle_dir, ignore_errors=True)
+        tmp_dir.rename(bundle_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    artifacts.bundle_path = bundle_dir
+    return bundle_dir
+
+
+def _path_str(path: Optional[Path]) -> Optional[str]:
+    return None if path is None else str(path)
+
+
+def _read_manifest(bundle_dir: Path) -> Dict:
+    with (Path(bundle_dir) / MANIFEST_FILE).open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def load_artifacts(bundle_dir: Path) -> PipelineArtifacts:
+    """
+    Reopen a saved bundle.
+
+    Arrays are memory-mapped read-only, so this only reads the manifest and
+    the two tables up front.
+
+    Raises:
+        FileNotFoundError: If `bundle_dir` is not a bundle
+        ValueError: If the bundle was written in another format version
+    """
+    bundle_dir = Path(bundle_dir)
+    if not is_bundle(bundle_dir):
+        raise FileNotFoundError(f"No artifacts bundle found at: {bundle_dir}")
+    manifest = _read_manifest(bundle_dir)
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported artifacts bundle format {manifest.get('format_version')!r} "
+            f"(expected {BUNDLE_FORMAT_VERSION}): {bundle_dir}"
+        )
+
+    def array(name: str) -> np.ndarray:
+        return np.load(bundle_dir / f"{name}.npy", mmap_mode="r")
+
+    def rankings(name: str, reverse: bool) -> RankingTable:
+        return RankingTable(
+            array(f"{name}_offsets"), array(f"{name}_index"), array(f"{name}_distance"), reverse
+        )
+
+    output_path = manifest.get("output_path")
+    reused_output_path = manifest.get("reused_output_path")
+    return PipelineArtifacts(
+        output_path=Path(output_path) if output_path else None,
+        stats=manifest["stats"],
+        esn_df=pd.read_parquet(bundle_dir / "esn_df.parquet"),
+        erasmus_df=pd.read_parquet(bundle_dir / "erasmus_df.parquet"),
+        esn_answers=array("esn_answers"),
+        erasmus_answers=array("erasmus_answers"),
+        question_columns=manifest["question_columns"],
+        distance_counts=array("distance_counts"),
+        ranking_table=rankings("ranking_table", reverse=False),
+        config=manifest["config"],
+        output_paths={fmt: Path(path) for fmt, path in manifest.get("output_paths", {}).items()},
+        fingerprint=manifest["fingerprint"],
+        reused_output_path=Path(reused_output_path) if reused_output_path else None,
+        reverse_ranking_table=rankings("reverse_ranking_table", reverse=True),
+        metrics=[StageMetrics(**record) for record in manifest.get("metrics", [])],
+        bundle_path=bundle_dir,
+    )
@@ -0,0 +1,185 @@
+"""
+Compact storage of pipeline results and the views derived from it.
+
+PipelineArtifacts keeps only compact core arrays: answers as int8 codes
+(0 = A, 1 = B, -1 = missing), Hamming distances in the smallest unsigned
+integer type that holds the question count, and rankings as flat index /
+distance arrays (RankingTable). Everything else (float vectors, the float
+distance matrix, comparison stats, display tables) is a view computed on
+first use and kept in a ViewCache, an LRU bounded by the bytes it holds, so a
+long-lived session only holds the views it is actually using.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.model.rank import ErasmusRanking, ESNRanking, RankedCandidate, RankedESN
+
+# Views kept per artifacts object
+DEFAULT_VIEW_CACHE_MB = 64
+
+MISSING_ANSWER = -1
+
+
+def encode_answers(vectors: np.ndarray) -> np.ndarray:
+    """int8 answer codes of 0/1/NaN answer vectors (NaN becomes MISSING_ANSWER)."""
+    vectors = np.asarray(vectors, dtype=float)
+    codes = np.full(vectors.shape, MISSING_ANSWER, dtype=np.int8)
+    valid = ~np.isnan(vectors)
+    codes[valid] = vectors[valid]
+    return codes
+
+
+def decode_answers(codes: np.ndarray) -> np.ndarray:
+    """0/1/NaN float answer vectors of int8 answer codes."""
+    vectors = np.asarray(codes, dtype=float)
+    vectors[np.asarray(codes) == MISSING_ANSWER] = np.nan
+    return vectors
+
+
+def compact_distances(distances: np.ndarray) -> np.ndarray:
+    """Hamming distances (whole numbers) in the smallest unsigned integer type holding them."""
+    distances = np.asarray(distances)
+    largest = int(distances.max()) if distances.size else 0
+    return distances.astype(np.min_scalar_type(largest))
+
+
+def nbytes(value: Any) -> int:
+    """Approximate memory held by an array, table, RankingTable or container of them."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, RankingTable):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ViewCache:
+    """LRU of derived views bounded by the bytes they hold."""
+
+    def __init__(self, max_bytes: int = DEFAULT_VIEW_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the view for `key`, computing it on a miss.
+
+        Views larger than the whole budget are returned without being kept.
+        Views are shared with later callers and must not be modified.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = nbytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            self._entries[key] = (value, size)
+            self._entries.move_to_end(key)
+            while self.total_bytes > self.max_bytes:
+                self._entries.popitem(last=False)
+        return value
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes held by the cached views."""
+        return sum(size for _value, size in self._entries.values())
+
+    def sizes(self) -> List[Tuple[Hashable, int]]:
+        """(key, bytes) of every cached view, least recently used first."""
+        with self._lock:
+            return [(key, size) for key, (_value, size) in self._entries.items()]
+
+    def clear(self) -> None:
+        """Drop every cached view."""
+        with self._lock:
+            self._entries.clear()
+
+
+class RankingTable(Sequence):
+    """
+    Read-only list of rankings stored as flat arrays.
+
+    Row `i` holds the candidates `index[offsets[i]:offsets[i + 1]]` with their
+    distances. Indexing builds the ESNRanking / ErasmusRanking objects of one
+    row on demand, so no per-candidate Python objects are kept.
+    """
+
+    def __init__(self, offsets: np.ndarray, index: np.ndarray, distance: np.ndarray, reverse: bool = False):
+        self.offsets = offsets
+        self.index = index
+        self.distance = distance
+        self.reverse = reverse
+
+    @classmethod
+    def from_rankings(cls, rankings: Iterable, reverse: bool = False) -> "RankingTable":
+        """Flatten ESNRanking (or, with `reverse`, ErasmusRanking) objects."""
+        rankings = list(rankings)
+        index_attr = "esn_index" if reverse else "erasmus_index"
+        offsets = np.zeros(len(rankings) + 1, dtype=np.int64)
+        np.cumsum([len(ranking.candidates) for ranking in rankings], out=offsets[1:])
+        candidates = [c for ranking in rankings for c in ranking.candidates]
+        return cls(
+            offsets,
+            np.array([getattr(c, index_attr) for c in candidates], dtype=np.int32),
+            np.array([c.distance for c in candidates], dtype=np.float32),
+            reverse,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.index.nbytes + self.distance.nbytes
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[pos] for pos in range(*idx.indices(len(self)))]
+        pos = range(len(self))[idx]
+        start, stop = int(self.offsets[pos]), int(self.offsets[pos + 1])
+        pairs = zip(self.index[start:stop].tolist(), self.distance[start:stop].tolist())
+        if self.reverse:
+            return ErasmusRanking(pos, [RankedESN(esn_index=i, distance=d) for i, d in pairs])
+        return ESNRanking(pos, [RankedCandidate(erasmus_index=i, distance=d) for i, d in pairs])
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+
+def comparison_counts_row(
+    esn_codes: np.ndarray,
+    erasmus_codes: np.ndarray,
+    distance_row: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    NaN-aware compared/same/different counts of one ESN member against every student.
+
+    Same rules as export_table.comparison_counts, on answer codes.
+    """
+    valid = (esn_codes != MISSING_ANSWER) & (erasmus_codes != MISSING_ANSWER)
+    compared = valid.sum(axis=1)
+    different = np.minimum(np.asarray(distance_row).astype(int), compared)
+    return {"compared": compared, "same": np.maximum(compared - different, 0), "different": different}
@@ -0,0 +1,159 @@
+"""
+Workload and quality analytics over the current assignments.
+
+Tracks per-ESN-member load, the histogram of assigned distances and, for
+every student still free, the best match among the ESN members who have
+capacity left. Everything is built once with vectorized aggregates
+(bincount over ESN indices and distance values, a column-wise minimum over
+the distance matrix) and then follows the AssignmentState event log
+incrementally: an assign or unassign only touches the students it lists,
+and the best remaining match is re-derived only for the students whose best
+ESN member just filled up.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.controller.assignments import AssignmentLog, AssignmentState
+
+
+class AssignmentAnalytics:
+    """Per-buddy load, distance histogram and unassigned students by best remaining match."""
+
+    def __init__(self, distances: np.ndarray, capacities: Optional[np.ndarray] = None):
+        self.distances = distances
+        esn_count, erasmus_count = distances.shape
+        self.capacities = None if capacities is None else np.asarray(capacities, dtype=int)
+        if self.capacities is not None and self.capacities.shape != (esn_count,):
+            raise ValueError(f"Expected {esn_count} capacities, got {self.capacities.shape[0]}")
+        # Distances are whole numbers (Hamming counts): one bin per value
+        self._bins = int(distances.max()) + 1 if distances.size else 0
+
+        self.load = np.zeros(esn_count, dtype=int)
+        self.histogram = np.zeros(self._bins, dtype=int)
+        self._esn_of = np.full(erasmus_count, -1, dtype=int)
+        self._best = np.full(erasmus_count, np.inf)
+        self._best_esn = np.full(erasmus_count, -1, dtype=int)
+        self._open = np.ones(esn_count, dtype=bool)
+
+        self._log: Optional[AssignmentLog] = None
+        self._seen_seq = 0
+        # Number of full rebuilds (first sync and state resets)
+        self.rebuilds = 0
+
+    def sync(self, state: AssignmentState) -> None:
+        """
+        Bring the aggregates up to date with `state`.
+
+        Only events since the last sync are applied; a different state
+        object (e.g. after a new run) rebuilds everything from scratch.
+        """
+        log = state.log
+        if log is not self._log or log.last_seq < self._seen_seq:
+            self._rebuild(state)
+            self._log = log
+            self._seen_seq = log.last_seq
+            return
+        if log.last_seq == self._seen_seq:
+            return
+
+        first_seq = log.events[0].seq
+        for event in log.events[self._seen_seq - first_seq + 1:]:
+            erasmus = np.array([a.erasmus_index for a in event.assignments], dtype=int)
+            esn = np.array([a.esn_index for a in event.assignments], dtype=int)
+            self._release(erasmus)
+            if event.action == "assign":
+                self._take(esn, erasmus)
+            self._update_open()
+        self._seen_seq = log.last_seq
+
+    def _rebuild(self, state: AssignmentState) -> None:
+        assignments = state.assignments
+        erasmus = np.array([a.erasmus_index for a in assignments], dtype=int)
+        esn = np.array([a.esn_index for a in assignments], dtype=int)
+
+        self._esn_of[:] = -1
+        self._esn_of[erasmus] = esn
+        self.load = np.bincount(esn, minlength=self.distances.shape[0])
+        self.histogram = np.bincount(
+            self.distances[esn, erasmus].astype(int), minlength=self._bins
+        )
+        self._open = self._open_mask()
+        self._best[:] = np.inf
+        self._best_esn[:] = -1
+        self._refresh_best(np.arange(self.distances.shape[1]))
+        self.rebuilds += 1
+
+    def _release(self, erasmus: np.ndarray) -> None:
+        esn = self._esn_of[erasmus]
+        held = esn >= 0
+        np.subtract.at(self.load, esn[held], 1)
+        np.subtract.at(self.histogram, self.distances[esn[held], erasmus[held]].astype(int), 1)
+        self._esn_of[erasmus] = -1
+
+    def _take(self, esn: np.ndarray, erasmus: np.ndarray) -> None:
+        np.add.at(self.load, esn, 1)
+        np.add.at(self.histogram, self.distances[esn, erasmus].astype(int), 1)
+        self._esn_of[erasmus] = esn
+
+    def _open_mask(self) -> np.ndarray:
+        if self.capacities is None:
+            return np.ones(self.distances.shape[0], dtype=bool)
+        return self.load < self.capacities
+
+    def _update_open(self) -> None:
+        open_now = self._open_mask()
+        closed = np.flatnonzero(self._open & ~open_now)
+        reopened = np.flatnonzero(~self._open & open_now)
+        self._open = open_now
+        if closed.size:
+            self._refresh_best(np.flatnonzero(np.isin(self._best_esn, closed)))
+        for esn_index in reopened:
+            row = self.distances[esn_index]
+            better = (row < self._best) | ((row == self._best) & (esn_index < self._best_esn))
+            self._best[better] = row[better]
+            self._best_esn[better] = esn_index
+
+    def _refresh_best(self, erasmus: np.ndarray) -> None:
+        """Recompute the best open ESN member for the given students."""
+        open_rows = np.flatnonzero(self._open)
+        if erasmus.size == 0:
+            return
+        if open_rows.size == 0:
+            self._best[erasmus] = np.inf
+            self._best_esn[erasmus] = -1
+            return
+        block = self.distances[np.ix_(open_rows, erasmus)]
+        position = block.argmin(axis=0)
+        self._best[erasmus] = block[position, np.arange(erasmus.size)]
+        self._best_esn[erasmus] = open_rows[position]
+
+    def unassigned_by_best_match(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Students not assigned yet, closest best remaining match first.
+
+        Returns:
+            (erasmus indices, best remaining distance, ESN index of that match);
+            students with no ESN member left come last with distance inf and
+            ESN index -1
+        """
+        free = np.flatnonzero(self._esn_of < 0)
+        order = free[np.argsort(self._best[free], kind="stable")]
+        return order, self._best[order], self._best_esn[order]
+
+    def summary(self) -> Dict[str, float]:
+        """Headline numbers for the current assignments."""
+        assigned = int(self.histogram.sum())
+        values = np.arange(self._bins)
+        summary = {
+            "assigned": assigned,
+            "unassigned": int(self.distances.shape[1] - assigned),
+            "mean_distance": float(values @ self.histogram / assigned) if assigned else float("nan"),
+            "max_distance": int(values[self.histogram > 0].max()) if assigned else 0,
+            "esn_without_buddy": int((self.load == 0).sum()),
+            "max_load": int(self.load.max()) if self.load.size else 0,
+        }
+        if self.capacities is not None:
+            summary["esn_at_capacity"] = int((self.load >= self.capacities).sum())
+            summary["esn_over_capacity"] = int((self.load > self.capacities).sum())
+        return summary
@@ -0,0 +1,296 @@
+"""
+Persistent storage for manual assignments.
+
+Assignments are written through to a SQLite database in WAL mode, one row per
+assignment, so they survive a browser refresh or a server restart. Next to
+the current assignments the database keeps the append-only event log. Rows
+are keyed by the run key (PipelineArtifacts.run_key): row indices only mean
+something for the exact filtered input data they were made against, while
+export and ranking settings can change without losing them.
+
+Several sessions (e.g. coordinators in separate browser tabs) can share one
+database. Every student row carries a version that each change bumps; a
+change only commits if the versions of the students it touches are still
+the ones the session last saw (compare-and-swap), so conflicting assigns
+fail fast. A per-run change counter, which doubles as the event sequence
+number, lets other sessions detect changes with a single read.
+"""
+import dataclasses
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.controller.assignments import (
+    Assignment,
+    AssignmentConflictError,
+    AssignmentEvent,
+    AssignmentState,
+)
+
+DEFAULT_DB_NAME = "assignments.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    run_key TEXT NOT NULL,
+    erasmus_index INTEGER NOT NULL,
+    esn_index INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    esn_name TEXT NOT NULL DEFAULT '',
+    esn_surname TEXT NOT NULL DEFAULT '',
+    erasmus_name TEXT NOT NULL DEFAULT '',
+    erasmus_surname TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (run_key, erasmus_index)
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_esn ON assignments (run_key, esn_index);
+CREATE TABLE IF NOT EXISTS assignment_events (
+    run_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL,
+    assignments TEXT NOT NULL,
+    PRIMARY KEY (run_key, seq)
+);
+CREATE TABLE IF NOT EXISTS assignment_versions (
+    run_key TEXT NOT NULL,
+    erasmus_index INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (run_key, erasmus_index)
+);
+CREATE TABLE IF NOT EXISTS assignment_counters (
+    run_key TEXT PRIMARY KEY,
+    counter INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "erasmus_index", "esn_index", "timestamp",
+    "esn_name", "esn_surname", "erasmus_name", "erasmus_surname",
+)
+
+
+class SQLiteAssignmentStore:
+    """
+    Write-through SQLite store for the assignments of one run.
+
+    Every change is one short transaction that checks the touched students'
+    versions, updates the assignment rows and appends its event. The
+    connection may be used from any thread (Streamlit reruns hop between
+    threads); access is serialized with a lock.
+    """
+
+    def __init__(self, path: Path, run_key: str):
+        self.path = Path(path)
+        self.run_key = run_key
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Last change counter and student versions this session has seen
+        self.last_seq = 0
+        self._versions: Dict[int, int] = {}
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None, timeout=10.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only syncs at checkpoints; a commit is still atomic
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO assignment_counters (run_key, counter) "
+            "SELECT ?, COALESCE(MAX(seq), 0) FROM assignment_events WHERE run_key = ?",
+            (self.run_key, self.run_key)
+        )
+
+    def load(self) -> Tuple[List[Assignment], List[AssignmentEvent]]:
+        """
+        Read the current assignments and the event log in one consistent snapshot.
+
+        Also resets what this session has seen to that snapshot.
+
+        Returns:
+            (assignments in the order they were made, events oldest first)
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM assignments WHERE run_key = ? ORDER BY rowid",
+                    (self.run_key,)
+                ).fetchall()
+                events = self._events_after(0)
+                self.last_seq = self._counter()
+                self._versions = dict(self._conn.execute(
+                    "SELECT erasmus_index, version FROM assignment_versions WHERE run_key = ?",
+                    (self.run_key,)
+                ).fetchall())
+            finally:
+                self._conn.execute("COMMIT")
+        return [Assignment(**dict(zip(_COLUMNS, row))) for row in rows], events
+
+    def _counter(self) -> int:
+        row = self._conn.execute(
+            "SELECT counter FROM assignment_counters WHERE run_key = ?", (self.run_key,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _events_after(self, seq: int) -> List[AssignmentEvent]:
+        rows = self._conn.execute(
+            "SELECT seq, action, note, timestamp, assignments FROM assignment_events "
+            "WHERE run_key = ? AND seq > ? ORDER BY seq",
+            (self.run_key, seq)
+        ).fetchall()
+        return [
+            AssignmentEvent(
+                seq=seq,
+                action=action,
+                assignments=tuple(Assignment(**item) for item in json.loads(payload)),
+                timestamp=timestamp,
+                note=note
+            )
+            for seq, action, note, timestamp, payload in rows
+        ]
+
+    def _seen(self, events: List[AssignmentEvent]) -> None:
+        for event in events:
+            for assignment in event.assignments:
+                self._versions[assignment.erasmus_index] = self._versions.get(assignment.erasmus_index, 0) + 1
+            self.last_seq = event.seq
+
+    def poll(self) -> List[AssignmentEvent]:
+        """
+        Events other sessions appended since this session last looked.
+
+        A single counter read when nothing changed.
+        """
+        with self._lock:
+            if self._counter() == self.last_seq:
+                return []
+            events = self._events_after(self.last_seq)
+            self._seen(events)
+        return events
+
+    def apply(self, event: AssignmentEvent) -> Tuple[List[AssignmentEvent], AssignmentEvent]:
+        """
+        Apply one event to the stored assignments and append it to the log.
+
+        Runs as a single write transaction. The event commits only if every
+        student it touches still has the version this session last saw.
+
+        Returns:
+            (events other sessions appended meanwhile, the stored event with
+            its final sequence number)
+
+        Raises:
+            AssignmentConflictError: If another session changed one of the
+                students first; nothing is written
+        """
+        indices = [assignment.erasmus_index for assignment in event.assignments]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = dict(self._conn.execute(
+                    "SELECT erasmus_index, version FROM assignment_versions "
+                    f"WHERE run_key = ? AND erasmus_index IN ({', '.join('?' * len(indices))})",
+                    (self.run_key, *indices)
+                ).fetchall()) if indices else {}
+                conflicts = [idx for idx in indices if stored.get(idx, 0) != self._versions.get(idx, 0)]
+                remote_events = self._events_after(self.last_seq)
+                if conflicts:
+                    self._conn.execute("ROLLBACK")
+                    self._seen(remote_events)
+                    raise AssignmentConflictError(
+                        f"Erasmus student (index {conflicts[0]}) was changed by another session",
+                        remote_events
+                    )
+
+                event = dataclasses.replace(event, seq=self._counter() + 1)
+                self._write(event)
+                self._conn.execute("COMMIT")
+            except AssignmentConflictError:
+                raise
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._seen(remote_events)
+            self._seen([event])
+        return remote_events, event
+
+    def _write(self, event: AssignmentEvent) -> None:
+        if event.action == "assign":
+            self._conn.executemany(
+                f"INSERT INTO assignments (run_key, {', '.join(_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(_COLUMNS))})",
+                [
+                    (self.run_key, *(getattr(assignment, column) for column in _COLUMNS))
+                    for assignment in event.assignments
+                ]
+            )
+        else:
+            self._conn.executemany(
+                "DELETE FROM assignments WHERE run_key = ? AND erasmus_index = ? AND esn_index = ?",
+                [
+                    (self.run_key, assignment.erasmus_index, assignment.esn_index)
+                    for assignment in event.assignments
+                ]
+            )
+        self._conn.executemany(
+            "INSERT INTO assignment_versions (run_key, erasmus_index, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (run_key, erasmus_index) DO UPDATE SET version = version + 1",
+            [(self.run_key, assignment.erasmus_index) for assignment in event.assignments]
+        )
+        payload = json.dumps([
+            {column: getattr(assignment, column) for column in _COLUMNS}
+            for assignment in event.assignments
+        ])
+        self._conn.execute(
+            "INSERT INTO assignment_events (run_key, seq, action, note, timestamp, assignments) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_key, event.seq, event.action, event.note, event.timestamp, payload)
+        )
+        self._conn.execute(
+            "UPDATE assignment_counters SET counter = ? WHERE run_key = ?", (event.seq, self.run_key)
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def default_db_path(config: Dict) -> Optional[Path]:
+    """
+    Database path from `output.assignment_db`, or None when persistence is off.
+
+    Defaults to `<out_dir>/assignments.db`.
+    """
+    output_cfg = config.get("output", {})
+    db_path = output_cfg.get("assignment_db", True)
+    if not db_path:
+        return None
+    if db_path is True:
+        return Path(output_cfg.get("out_dir", "outputs")) / DEFAULT_DB_NAME
+    return Path(db_path)
+
+
+def open_assignment_state(path: Path, run_key: str) -> AssignmentState:
+    """
+    Load the assignments stored for a run and keep persisting changes.
+
+    Args:
+        path: SQLite database file (created if missing)
+        run_key: Run key the assignments belong to (PipelineArtifacts.run_key)
+
+    Returns:
+        AssignmentState backed by the database
+    """
+    store = SQLiteAssignmentStore(path, run_key)
+    state = AssignmentState(_store=store)
+    # The assignments table is the materialized state; the log is kept for
+    # history and audit (undo / redo stacks start empty after a reload)
+    assignments, events = store.load()
+    for assignment in assignments:
+        state._index(assignment)
+    for event in events:
+        state.log.append(event)
+    return state
@@ -6,7 +6,16 @@ separate from the ranking algorithm.
 """
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Set
+from typing import TYPE_CHECKING, AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.model import assign, rank
+from src.model.rank import ESNRanking
+
+if TYPE_CHECKING:
+    from src.controller.assignment_store import SQLiteAssignmentStore
 
 
 @dataclass
@@ -23,10 +32,143 @@ class Assignment:
     erasmus_surname: str = ""
 
 
+class AssignmentConflictError(ValueError):
+    """
+    A change touched students that another session changed in the meantime.
+
+    `events` holds the other sessions' changes the store saw; they have
+    already been applied to the local state when this is raised.
+    """
+
+    def __init__(self, message: str, events: Optional[List["AssignmentEvent"]] = None):
+        super().__init__(message)
+        self.events = events or []
+
+
+# Inverse of each event action, used by undo
+_INVERSE_ACTION = {"assign": "unassign", "unassign": "assign", "clear": "assign"}
+
+# A snapshot of the full state is kept every this many events
+SNAPSHOT_INTERVAL = 100
+
+
+@dataclass(frozen=True)
+class AssignmentEvent:
+    """
+    One change to the assignments, as recorded in the event log.
+
+    "assign" adds the listed assignments, "unassign" removes them and "clear"
+    removes all assignments there were at the time (listing them, so it can
+    be undone).
+    """
+    seq: int
+    action: str  # "assign", "unassign" or "clear"
+    assignments: Tuple[Assignment, ...]
+    timestamp: str
+    note: str = ""  # "undo" / "redo" when the change came from undo or redo
+
+
+def _apply_event(by_erasmus: Dict[int, Assignment], event: AssignmentEvent) -> None:
+    if event.action == "assign":
+        for assignment in event.assignments:
+            by_erasmus[assignment.erasmus_index] = assignment
+    elif event.action in ("unassign", "clear"):
+        for assignment in event.assignments:
+            by_erasmus.pop(assignment.erasmus_index, None)
+    else:
+        raise ValueError(f"Unknown assignment event action: {event.action}")
+
+
+@dataclass
+class AssignmentLog:
+    """
+    Append-only log of assignment events with periodic snapshots.
+
+    The log mirrors the assignments it has seen and copies them every
+    SNAPSHOT_INTERVAL events, so replaying to any point only applies the
+    events after the closest earlier snapshot.
+    """
+    events: List[AssignmentEvent] = field(default_factory=list)
+    # seq -> assignments (by Erasmus index) right after that event
+    _snapshots: Dict[int, Dict[int, Assignment]] = field(default_factory=dict, repr=False)
+    _current: Dict[int, Assignment] = field(default_factory=dict, repr=False)
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest event (0 for an empty log)."""
+        return self.events[-1].seq if self.events else 0
+
+    def next_event(self, action: str, assignments: Tuple[Assignment, ...], note: str = "") -> AssignmentEvent:
+        """Build (but do not append) the event following the newest one."""
+        return AssignmentEvent(
+            seq=self.last_seq + 1,
+            action=action,
+            assignments=tuple(assignments),
+            timestamp=datetime.now().isoformat(),
+            note=note
+        )
+
+    def append(self, event: AssignmentEvent) -> None:
+        """Append an event, taking a snapshot when one is due."""
+        _apply_event(self._current, event)
+        self.events.append(event)
+        if event.seq % SNAPSHOT_INTERVAL == 0:
+            self._snapshots[event.seq] = dict(self._current)
+
+    def replay(self, upto_seq: Optional[int] = None) -> "AssignmentState":
+        """
+        Rebuild the assignments as they were right after event `upto_seq`.
+
+        Args:
+            upto_seq: Last event to apply (the newest when None)
+
+        Returns:
+            A new in-memory AssignmentState (without history)
+        """
+        upto_seq = self.last_seq if upto_seq is None else upto_seq
+        start = max((seq for seq in self._snapshots if seq <= upto_seq), default=0)
+        by_erasmus = dict(self._snapshots.get(start, {}))
+        # Events are numbered consecutively from the first one in the log
+        first_seq = self.events[0].seq if self.events else 1
+        for event in self.events[max(start - first_seq + 1, 0):]:
+            if event.seq > upto_seq:
+                break
+            _apply_event(by_erasmus, event)
+
+        state = AssignmentState()
+        for assignment in by_erasmus.values():
+            state._index(assignment)
+        return state
+
+
 @dataclass
 class AssignmentState:
-    """Manages the collection of all assignments in a session."""
-    assignments: List[Assignment] = field(default_factory=list)
+    """
+    Manages the collection of all assignments in a session.
+
+    Assignments are kept in hash indexes (by Erasmus and by ESN index), so
+    lookups, adds and removals take constant time however many exist.
+    Every change is recorded in an append-only AssignmentLog and can be
+    undone and redone. When a store is attached (see
+    src.controller.assignment_store), every change and its event are also
+    written through to it in one transaction; the store may be shared with
+    other sessions, see sync().
+    """
+    # erasmus_index -> Assignment, in the order assignments were made
+    _by_erasmus: Dict[int, Assignment] = field(default_factory=dict, repr=False)
+    # esn_index -> {erasmus_index -> Assignment}, in the order assignments were made
+    _by_esn: Dict[int, Dict[int, Assignment]] = field(default_factory=dict, repr=False)
+    # Optional persistent backend
+    _store: Optional["SQLiteAssignmentStore"] = field(default=None, repr=False, compare=False)
+    # History: the full event log plus the user's undo / redo stacks
+    log: AssignmentLog = field(default_factory=AssignmentLog, repr=False, compare=False)
+    _undo: List[AssignmentEvent] = field(default_factory=list, repr=False, compare=False)
+    _redo: List[AssignmentEvent] = field(default_factory=list, repr=False, compare=False)
+
+    @property
+    def assignments(self) -> List[Assignment]:
+        """All assignments in the order they were made (a new list on each access)."""
+        return list(self._by_erasmus.values())
 
     def add_assignment(
         self,
@@ -52,7 +194,8 @@ class AssignmentState:
             The created Assignment object
 
         Raises:
-            ValueError: If student is already assigned
+            ValueError: If student is already assigned (AssignmentConflictError
+                when another session assigned them first)
         """
         # Check if student is already assigned
         if self.is_erasmus_assigned(erasmus_index):
@@ -68,9 +211,135 @@ class AssignmentState:
             erasmus_surname=erasmus_surname
         )
 
-        self.assignments.append(assignment)
+        self._do("assign", (assignment,))
         return assignment
 
+    def add_many(
+        self,
+        esn_indices: Sequence[int],
+        erasmus_indices: Sequence[int],
+        esn_names: Optional[Sequence[str]] = None,
+        esn_surnames: Optional[Sequence[str]] = None,
+        erasmus_names: Optional[Sequence[str]] = None,
+        erasmus_surnames: Optional[Sequence[str]] = None,
+        skip_conflicts: bool = False
+    ) -> List[Assignment]:
+        """
+        Create many assignments as a single change (one event, one undo step).
+
+        Conflicts - students already assigned, or listed more than once - are
+        detected for the whole batch at once.
+
+        Args:
+            esn_indices: ESN member index per assignment
+            erasmus_indices: Erasmus student index per assignment
+            esn_names, esn_surnames, erasmus_names, erasmus_surnames:
+                Optional names, aligned with the indices
+            skip_conflicts: Drop conflicting pairs (keeping the first mention
+                of a student) instead of raising
+
+        Returns:
+            The created Assignment objects
+
+        Raises:
+            ValueError: If any pair conflicts and skip_conflicts is False
+        """
+        esn_array = np.asarray(esn_indices, dtype=int).ravel()
+        erasmus_array = np.asarray(erasmus_indices, dtype=int).ravel()
+        if esn_array.shape != erasmus_array.shape:
+            raise ValueError("esn_indices and erasmus_indices must have the same length")
+
+        taken = np.isin(erasmus_array, np.fromiter(self._by_erasmus, dtype=int, count=len(self._by_erasmus)))
+        first_mention = np.zeros(erasmus_array.size, dtype=bool)
+        first_mention[np.unique(erasmus_array, return_index=True)[1]] = True
+        ok = ~taken & first_mention
+        if not ok.all() and not skip_conflicts:
+            conflicts = sorted(set(erasmus_array[~ok].tolist()))
+            raise ValueError(f"Erasmus students already assigned or listed twice: {conflicts}")
+
+        def column(values: Optional[Sequence[str]]) -> List[str]:
+            if values is None:
+                return [""] * int(ok.sum())
+            return [value for value, keep in zip(values, ok) if keep]
+
+        timestamp = datetime.now().isoformat()
+        assignments = tuple(
+            Assignment(
+                esn_index=int(esn_index),
+                erasmus_index=int(erasmus_index),
+                timestamp=timestamp,
+                esn_name=esn_name,
+                esn_surname=esn_surname,
+                erasmus_name=erasmus_name,
+                erasmus_surname=erasmus_surname
+            )
+            for esn_index, erasmus_index, esn_name, esn_surname, erasmus_name, erasmus_surname in zip(
+                esn_array[ok], erasmus_array[ok],
+                column(esn_names), column(esn_surnames), column(erasmus_names), column(erasmus_surnames)
+            )
+        )
+        if assignments:
+            self._do("assign", assignments)
+        return list(assignments)
+
+    def _index(self, assignment: Assignment) -> None:
+        self._by_erasmus[assignment.erasmus_index] = assignment
+        self._by_esn.setdefault(assignment.esn_index, {})[assignment.erasmus_index] = assignment
+
+    def _unindex(self, erasmus_index: int) -> None:
+        assignment = self._by_erasmus.pop(erasmus_index)
+        esn_assignments = self._by_esn[assignment.esn_index]
+        del esn_assignments[erasmus_index]
+        if not esn_assignments:
+            del self._by_esn[assignment.esn_index]
+
+    def _apply(self, action: str, assignments: Tuple[Assignment, ...], note: str = "") -> AssignmentEvent:
+        """Apply one change to the store, the indexes and the log."""
+        event = self.log.next_event(action, assignments, note)
+        if self._store is not None:
+            try:
+                remote_events, event = self._store.apply(event)
+            except AssignmentConflictError as exc:
+                self._apply_events(exc.events)
+                raise
+            self._apply_events(remote_events)
+        self._apply_events([event])
+        return event
+
+    def _apply_events(self, events: List[AssignmentEvent]) -> None:
+        for event in events:
+            if event.action == "assign":
+                for assignment in event.assignments:
+                    if assignment.erasmus_index in self._by_erasmus:
+                        self._unindex(assignment.erasmus_index)
+                    self._index(assignment)
+            else:
+                for assignment in event.assignments:
+                    if assignment.erasmus_index in self._by_erasmus:
+                        self._unindex(assignment.erasmus_index)
+            self.log.append(event)
+
+    def sync(self) -> int:
+        """
+        Pick up changes other sessions made to the shared store.
+
+        Cheap when nothing changed (one counter read). Remote changes are
+        applied and logged but do not enter this session's undo stack.
+
+        Returns:
+            Number of remote events applied
+        """
+        if self._store is None:
+            return 0
+        events = self._store.poll()
+        self._apply_events(events)
+        return len(events)
+
+    def _do(self, action: str, assignments: Tuple[Assignment, ...]) -> None:
+        """Apply a user change, making it undoable."""
+        self._undo.append(self._apply(action, assignments))
+        self._redo.clear()
+
     def remove_assignment(self, erasmus_index: int) -> bool:
         """
         Remove an assignment by Erasmus student index.
@@ -81,31 +350,248 @@ class AssignmentState:
         Returns:
             True if assignment was removed, False if not found
         """
-        original_length = len(self.assignments)
-        self.assignments = [a for a in self.assignments if a.erasmus_index != erasmus_index]
-        return len(self.assignments) < original_length
+        assignment = self._by_erasmus.get(erasmus_index)
+        if assignment is None:
+            return False
+        self._do("unassign", (assignment,))
+        return True
 
     def is_erasmus_assigned(self, erasmus_index: int) -> bool:
         """Check if an Erasmus student is already assigned."""
-        return any(a.erasmus_index == erasmus_index for a in self.assignments)
+        return erasmus_index in self._by_erasmus
 
-    def get_assigned_erasmus_indices(self) -> Set[int]:
-        """Get set of all assigned Erasmus student indices."""
-        return {a.erasmus_index for a in self.assignments}
+    def get_assignment(self, erasmus_index: int) -> Optional[Assignment]:
+        """Get the assignment of an Erasmus student, if any."""
+        return self._by_erasmus.get(erasmus_index)
+
+    def get_assigned_erasmus_indices(self) -> AbstractSet[int]:
+        """Get all assigned Erasmus student indices (a live, read-only view)."""
+        return self._by_erasmus.keys()
 
     def get_assignments_for_esn(self, esn_index: int) -> List[Assignment]:
         """Get all assignments for a specific ESN member."""
-        return [a for a in self.assignments if a.esn_index == esn_index]
+        return list(self._by_esn.get(esn_index, {}).values())
 
     def get_assignment_count(self) -> int:
         """Get total number of assignments."""
-        return len(self.assignments)
+        return len(self._by_erasmus)
 
     def clear_all(self) -> None:
         """Clear all assignments."""
-        self.assignments.clear()
+        if self._by_erasmus:
+            self._do("clear", tuple(self._by_erasmus.values()))
+
+    def can_undo(self) -> bool:
+        """True if there is a change to undo."""
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        """True if there is an undone change to redo."""
+        return bool(self._redo)
+
+    def _check_unchanged(self, action: str, assignments: Tuple[Assignment, ...]) -> None:
+        """
+        Check that an undo / redo change still applies to the current assignments.
+
+        Changes synced from other sessions bring this session's versions up to
+        date, so the store's compare-and-swap cannot tell them apart from our
+        own: an unassign must find exactly the recorded assignments, an assign
+        must find the students free.
+
+        Raises:
+            AssignmentConflictError: If a student was changed since
+        """
+        for assignment in assignments:
+            current = self._by_erasmus.get(assignment.erasmus_index)
+            if current != (None if action == "assign" else assignment):
+                raise AssignmentConflictError(
+                    f"Erasmus student (index {assignment.erasmus_index}) was changed by another session"
+                )
+
+    def undo(self) -> bool:
+        """
+        Undo the most recent change (recorded in the log as its inverse).
+
+        Returns:
+            True if a change was undone, False if there was nothing to undo
+
+        Raises:
+            AssignmentConflictError: If another session changed the same students
+        """
+        if not self._undo:
+            return False
+        # A change another session overwrote can no longer be undone
+        event = self._undo.pop()
+        self._check_unchanged(_INVERSE_ACTION[event.action], event.assignments)
+        self._apply(_INVERSE_ACTION[event.action], event.assignments, note="undo")
+        self._redo.append(event)
+        return True
+
+    def redo(self) -> bool:
+        """
+        Redo the most recently undone change.
+
+        Returns:
+            True if a change was redone, False if there was nothing to redo
+
+        Raises:
+            AssignmentConflictError: If another session changed the same students
+        """
+        if not self._redo:
+            return False
+        event = self._redo.pop()  # dropped if it conflicts, as in undo()
+        self._check_unchanged(event.action, event.assignments)
+        self._apply(event.action, event.assignments, note="redo")
+        self._undo.append(event)
+        return True
+
+    def close(self) -> None:
+        """Release the attached store, if any (in-memory state is kept)."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
 
 
 def create_assignment_state() -> AssignmentState:
     """Factory function to create a new assignment state."""
     return AssignmentState()
+
+
+def _names(df: Optional[pd.DataFrame], indices: np.ndarray, column: str) -> Optional[List[str]]:
+    if df is None or column not in df.columns:
+        return None
+    return df[column].iloc[indices].fillna("").astype(str).tolist()
+
+
+def _add_pairs(
+    state: AssignmentState,
+    pairs: np.ndarray,
+    esn_df: Optional[pd.DataFrame],
+    erasmus_df: Optional[pd.DataFrame]
+) -> int:
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    added = state.add_many(
+        pairs[:, 0],
+        pairs[:, 1],
+        esn_names=_names(esn_df, pairs[:, 0], "Name"),
+        esn_surnames=_names(esn_df, pairs[:, 0], "Surname"),
+        erasmus_names=_names(erasmus_df, pairs[:, 1], "Name"),
+        erasmus_surnames=_names(erasmus_df, pairs[:, 1], "Surname")
+    )
+    return len(added)
+
+
+def accept_top_candidates(
+    state: AssignmentState,
+    rankings: List[ESNRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    identifier_column: Optional[str] = None,
+    skip_assigned_esn: bool = True
+) -> int:
+    """
+    Give every ESN member their best still-available ranked candidate at once.
+
+    When several ESN members want the same student, the closest one wins and
+    ties go to the ESN member who comes first by identifier; the others move
+    on to their next available candidate. All pairs are added as one change.
+
+    Args:
+        state: Assignment state to add to (in place)
+        rankings: Per-ESN-member rankings from the rank stage
+        esn_df: ESN dataframe
+        erasmus_df: Erasmus dataframe
+        identifier_column: Tie-breaking column (as in matching)
+        skip_assigned_esn: Leave out ESN members who already have a student
+
+    Returns:
+        Number of assignments added
+    """
+    width = max((len(r.candidates) for r in rankings), default=0)
+    candidates = np.full((len(esn_df), width), -1, dtype=int)
+    candidate_distances = np.full((len(esn_df), width), np.inf)
+    for ranking in rankings:
+        count = len(ranking.candidates)
+        candidates[ranking.esn_index, :count] = [c.erasmus_index for c in ranking.candidates]
+        candidate_distances[ranking.esn_index, :count] = [c.distance for c in ranking.candidates]
+
+    taken = np.zeros(len(erasmus_df), dtype=bool)
+    taken[list(state.get_assigned_erasmus_indices())] = True
+    eligible = np.ones(len(esn_df), dtype=bool)
+    if skip_assigned_esn:
+        eligible[[a.esn_index for a in state.assignments]] = False
+
+    esn_keys = rank.identifier_key(esn_df, identifier_column)
+    pairs = assign.best_available_pairs(candidates, candidate_distances, esn_keys, taken, eligible)
+    return _add_pairs(state, pairs, esn_df, erasmus_df)
+
+
+def state_from_pairs(
+    pairs: np.ndarray,
+    esn_df: Optional[pd.DataFrame] = None,
+    erasmus_df: Optional[pd.DataFrame] = None,
+    base: Optional[AssignmentState] = None
+) -> AssignmentState:
+    """
+    Build a new in-memory AssignmentState from (esn_index, erasmus_index) pairs.
+
+    Assignments in `base` are copied over first and kept as they are.
+    """
+    state = AssignmentState()
+    if base is not None and base.get_assignment_count():
+        state._apply("assign", tuple(base.assignments))
+    _add_pairs(state, pairs, esn_df, erasmus_df)
+    return state
+
+
+def assign_remaining(
+    state: AssignmentState,
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    esn_df: Optional[pd.DataFrame] = None,
+    erasmus_df: Optional[pd.DataFrame] = None,
+    strategy: str = "optimal",
+    top_k: Optional[int] = None
+) -> int:
+    """
+    Automatically assign the students still free in `state`, in place.
+
+    Existing assignments are kept and count towards capacities. "optimal"
+    minimizes the total distance; "greedy" and "stable" are faster
+    approximations for very large intakes (see src.model.assign).
+
+    Returns:
+        Number of assignments added
+    """
+    fixed_pairs = [(a.esn_index, a.erasmus_index) for a in state.assignments]
+    pairs = assign.solve(distances, capacities, strategy, fixed_pairs, top_k)
+    return _add_pairs(state, pairs, esn_df, erasmus_df)
+
+
+def solve_assignments(
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    fixed: Optional[AssignmentState] = None,
+    esn_df: Optional[pd.DataFrame] = None,
+    erasmus_df: Optional[pd.DataFrame] = None,
+    strategy: str = "optimal",
+    top_k: Optional[int] = None
+) -> AssignmentState:
+    """
+    Automatically assign the remaining students into a new AssignmentState.
+
+    Args:
+        distances: (esn_count, erasmus_count) distance matrix
+        capacities: Maximum number of students per ESN member
+        fixed: Existing (manual) assignments, kept unchanged
+        esn_df: ESN dataframe (optional, for names)
+        erasmus_df: Erasmus dataframe (optional, for names)
+        strategy: "optimal", "greedy" or "stable"
+        top_k: Preference list length for the "stable" strategy
+
+    Returns:
+        A new AssignmentState with the fixed plus the solved assignments
+    """
+    state = state_from_pairs(np.empty((0, 2), dtype=int), base=fixed)
+    assign_remaining(state, distances, capacities, esn_df, erasmus_df, strategy, top_k)
+    return state
@@ -0,0 +1,278 @@
+"""
+Batch runner for parameter sweeps.
+
+Runs one base configuration with a list of overlays (e.g. different top_k
+values, question subsets or timestamp cutoffs) in one process. All runs share
+one StageCache, so the input files are read once and every stage whose
+inputs and configuration are the same as in an earlier overlay (ingest,
+vectorization, distances, ...) is reused instead of recomputed.
+
+Each overlay writes its results into its own output directory, and a
+comparison summary of all overlays is written next to them.
+
+A set of independent configurations (e.g. one per faculty section or
+semester), given as a directory or a manifest, runs concurrently on a
+bounded thread pool instead. The runs share one StageCache as well, so
+configurations reading the same input files read them once; a failing
+configuration is reported and does not stop the others.
+"""
+import argparse
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.controller.cli import _load_config
+from src.controller.pipeline import PipelineArtifacts, export_artifacts, run_pipeline_from_config
+from src.controller.stage_cache import DEFAULT_ENTRIES_PER_STAGE, StageCache
+
+SUMMARY_COLUMNS = [
+    "name", "status", "top_k", "questions", "esn_count", "erasmus_count",
+    "mean_top1_distance", "mean_topk_distance", "wall_seconds", "reused_stages",
+    "output_path", "error",
+]
+
+# Configurations run at the same time by run_configs
+DEFAULT_BATCH_WORKERS = 4
+
+
+def deep_merge(base: Dict, overlay: Dict) -> Dict:
+    """Copy of `base` with `overlay` applied; nested dicts are merged, other values replaced."""
+    merged = copy.deepcopy(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_overlays(path: Path) -> List[Dict]:
+    """
+    Read overlays from YAML: a list of overlays, or a mapping with an `overlays` list.
+
+    Each overlay is a partial configuration, optionally with a `name`.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the file does not contain a list of mappings
+    """
+    data = _load_config(path)
+    overlays = data.get("overlays") if isinstance(data, dict) else data
+    if not isinstance(overlays, list) or not all(isinstance(item, dict) for item in overlays):
+        raise ValueError(f"Overlay file must contain a list of config overlays: {path}")
+    return overlays
+
+
+def load_config_set(path: Path) -> List[Path]:
+    """
+    Configuration files of a directory (every *.yml / *.yaml, by name) or a manifest.
+
+    A manifest is a YAML list of config paths, or a mapping with a `configs`
+    list; relative paths are relative to the manifest.
+
+    Raises:
+        FileNotFoundError: If the directory, manifest or a listed config does not exist
+        ValueError: If the manifest does not contain a list of paths, or there are no configs
+    """
+    path = Path(path)
+    if path.is_dir():
+        paths = sorted(item for item in path.iterdir() if item.suffix in (".yml", ".yaml"))
+    else:
+        data = _load_config(path)
+        entries = data.get("configs") if isinstance(data, dict) else data
+        if not isinstance(entries, list) or not all(isinstance(item, str) for item in entries):
+            raise ValueError(f"Manifest must contain a list of config paths: {path}")
+        paths = [path.parent / entry for entry in entries]
+        for config_path in paths:
+            if not config_path.exists():
+                raise FileNotFoundError(f"Config file not found: {config_path}")
+    if not paths:
+        raise ValueError(f"No config files found in: {path}")
+    return paths
+
+
+def _overlay_name(overlay: Dict, idx: int) -> str:
+    return str(overlay.get("name") or f"overlay_{idx + 1}")
+
+
+def _summary_row(name: str, artifacts: PipelineArtifacts, wall_seconds: float) -> Dict[str, Any]:
+    top1 = [ranking.candidates[0].distance for ranking in artifacts.rankings if ranking.candidates]
+    topk = [candidate.distance for ranking in artifacts.rankings for candidate in ranking.candidates]
+    return {
+        "name": name,
+        "status": "ok",
+        "top_k": artifacts.config.get("matching", {}).get("top_k"),
+        "questions": len(artifacts.question_columns),
+        "esn_count": len(artifacts.esn_df),
+        "erasmus_count": len(artifacts.erasmus_df),
+        "mean_top1_distance": float(np.mean(top1)) if top1 else np.nan,
+        "mean_topk_distance": float(np.mean(topk)) if topk else np.nan,
+        "wall_seconds": round(wall_seconds, 3),
+        "reused_stages": sum(record.cached for record in artifacts.metrics),
+        "output_path": str(artifacts.output_path),
+        "error": "",
+    }
+
+
+def run_batch(
+    base_config: Dict,
+    overlays: List[Dict],
+    debug: bool = False,
+    cache: Optional[StageCache] = None
+) -> pd.DataFrame:
+    """
+    Run the pipeline once per overlay and export each result.
+
+    Overlays without their own `output.out_dir` write into
+    `<base out_dir>/<overlay name>`. A failing overlay is recorded in the
+    summary and does not stop the others.
+
+    Args:
+        base_config: Configuration shared by all runs
+        overlays: Partial configurations applied on top of base_config
+        debug: Enable debug mode
+        cache: Stage cache shared by the runs; a new one sized to keep
+            every overlay's stage outputs when None
+
+    Returns:
+        Comparison summary with one row per overlay (see SUMMARY_COLUMNS)
+    """
+    if cache is None:
+        cache = StageCache(entries_per_stage=max(DEFAULT_ENTRIES_PER_STAGE, len(overlays)))
+    base_out_dir = Path(base_config.get("output", {}).get("out_dir", "outputs"))
+
+    rows = []
+    for idx, overlay in enumerate(overlays):
+        name = _overlay_name(overlay, idx)
+        overlay = {key: value for key, value in overlay.items() if key != "name"}
+        config = deep_merge(base_config, overlay)
+        if "out_dir" not in overlay.get("output", {}):
+            config.setdefault("output", {})["out_dir"] = str(base_out_dir / name)
+        started = time.perf_counter()
+        try:
+            artifacts = run_pipeline_from_config(config, debug=debug, cache=cache)
+            if artifacts.output_path is None:
+                export_artifacts(artifacts)
+        except Exception as exc:  # noqa: BLE001
+            rows.append({"name": name, "status": "failed", "error": str(exc)})
+            continue
+        rows.append(_summary_row(name, artifacts, time.perf_counter() - started))
+
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+def run_configs(
+    config_paths: List[Path],
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    debug: bool = False,
+    cache: Optional[StageCache] = None
+) -> pd.DataFrame:
+    """
+    Run and export independent configurations concurrently.
+
+    Every configuration writes into its own `output.out_dir`; exports into
+    the same directory are written one at a time.
+
+    Args:
+        config_paths: Configuration files to run
+        max_workers: Configurations running at the same time
+        debug: Enable debug mode
+        cache: Stage cache shared by the runs; a new one sized to keep
+            every configuration's stage outputs when None
+
+    Returns:
+        Run report with one row per configuration, in the given order
+        (see SUMMARY_COLUMNS; `name` is the config path)
+    """
+    if cache is None:
+        cache = StageCache(entries_per_stage=max(DEFAULT_ENTRIES_PER_STAGE, len(config_paths)))
+    # Exports sharing an output directory also share its export cache index
+    export_locks: Dict[Path, threading.Lock] = {}
+    locks_guard = threading.Lock()
+
+    def run_one(config_path: Path) -> Dict[str, Any]:
+        name = str(config_path)
+        started = time.perf_counter()
+        try:
+            config = _load_config(Path(config_path))
+            # Export below, under the lock of the output directory
+            config.setdefault("output", {})["export_mode"] = "lazy"
+            artifacts = run_pipeline_from_config(config, debug=debug, cache=cache)
+            out_dir = Path(config["output"].get("out_dir", "outputs")).resolve()
+            with locks_guard:
+                export_lock = export_locks.setdefault(out_dir, threading.Lock())
+            with export_lock:
+                export_artifacts(artifacts)
+        except Exception as exc:  # noqa: BLE001
+            return {
+                "name": name, "status": "failed", "error": str(exc),
+                "wall_seconds": round(time.perf_counter() - started, 3),
+            }
+        return _summary_row(name, artifacts, time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="batch") as pool:
+        rows = list(pool.map(run_one, config_paths))
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+def write_summary(summary: pd.DataFrame, out_dir: Path) -> Path:
+    """Write the comparison summary as a timestamped CSV in `out_dir`."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = out_dir / f"batch_summary_{timestamp}.csv"
+    summary.to_csv(path, index=False)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ESN Buddy Matching batch runner")
+    parser.add_argument("--config", help="Path to the base config.yml (with --overlays)")
+    parser.add_argument("--overlays", help="YAML file with a list of config overlays")
+    parser.add_argument(
+        "--configs",
+        help="Directory of config files, or a manifest listing them, to run concurrently",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=f"Configs run at the same time with --configs (default: {DEFAULT_BATCH_WORKERS})",
+    )
+    parser.add_argument(
+        "--debug-csv",
+        action="store_true",
+        help="Print CSV columns and attempted separators during load",
+    )
+    args = parser.parse_args()
+    if bool(args.configs) == bool(args.config and args.overlays):
+        parser.error("use either --config with --overlays, or --configs")
+    try:
+        if args.configs:
+            configs = Path(args.configs)
+            summary = run_configs(load_config_set(configs), max_workers=args.jobs, debug=args.debug_csv)
+            report_dir = configs if configs.is_dir() else configs.parent
+        else:
+            base_config = _load_config(Path(args.config))
+            overlays = load_overlays(Path(args.overlays))
+            summary = run_batch(base_config, overlays, debug=args.debug_csv)
+            report_dir = Path(base_config.get("output", {}).get("out_dir", "outputs"))
+        summary_path = write_summary(summary, report_dir)
+    except Exception as exc:  # noqa: BLE001
+        print(f"Error: {exc}")
+        raise SystemExit(1)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(summary.drop(columns=["output_path"]).to_string(index=False))
+    print(f"Summary written to: {summary_path}")
+    if (summary["status"] != "ok").any():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import argparse
+import sys
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, TextIO
 
 import yaml
 
-from src.controller.pipeline import run_pipeline_from_config
+from src.controller import artifact_bundle
+from src.controller.instrumentation import format_metrics
+from src.controller.pipeline import export_artifacts, run_pipeline_from_config
+from src.controller.progress import PipelineProgressCallback, ProgressTracker, progress_line, stage_progress
 
 
 def _load_config(path: Path) -> Dict:
@@ -14,24 +18,106 @@ def _load_config(path: Path) -> Dict:
         return yaml.safe_load(handle) or {}
 
 
-def run_pipeline(config_path: Path, debug_csv: bool = False) -> Path:
-    """CLI wrapper for the pipeline."""
+def _terminal_progress(stream: TextIO) -> PipelineProgressCallback:
+    """Progress callback that keeps rewriting one status line on `stream`."""
+    tracker = ProgressTracker()
+    width = 0
+
+    def report(stage: str, done: int, total: int) -> None:
+        nonlocal width
+        update = tracker.update(stage, done, total)
+        if update is None:
+            return
+        line = progress_line(stage, done, total, *update)
+        stream.write("\r" + line.ljust(width))
+        stream.flush()
+        width = len(line)
+
+    return report
+
+
+def run_pipeline(
+    config_path: Path,
+    debug_csv: bool = False,
+    profile: bool = False,
+    progress_stream: Optional[TextIO] = None,
+    save_artifacts: bool = False
+) -> Path:
+    """
+    CLI wrapper for the pipeline.
+
+    With `profile`, prints per-stage timings and memory; with a
+    `progress_stream`, keeps a progress line with ETA on it while running;
+    with `save_artifacts` (or `output.save_artifacts` in the config), saves
+    the run as a bundle (see artifact_bundle) that --load-artifacts can reopen.
+    """
     config = _load_config(config_path)
-    artifacts = run_pipeline_from_config(config, debug=debug_csv)
+    progress = _terminal_progress(progress_stream) if progress_stream is not None else None
+    try:
+        artifacts = run_pipeline_from_config(config, debug=debug_csv, trace_memory=profile, progress=progress)
+        if artifacts.output_path is None:
+            # The CLI always produces a file, even for export_mode: lazy
+            export_artifacts(artifacts, progress=stage_progress(progress, "export"), trace_memory=profile)
+    finally:
+        if progress_stream is not None:
+            progress_stream.write("\n")
+    if profile:
+        print(format_metrics(artifacts.metrics))
+        print(artifacts.memory_report().to_string(index=False, float_format=lambda mb: f"{mb:.3f}"))
+    if save_artifacts or config.get("output", {}).get("save_artifacts", False):
+        print(f"Artifacts saved to: {artifact_bundle.save_artifacts(artifacts)}")
     return artifacts.output_path
 
 
+def export_saved_artifacts(bundle_dir: Path) -> Path:
+    """Reopen a saved bundle and write its outputs (reusing an identical earlier export)."""
+    artifacts = artifact_bundle.load_artifacts(bundle_dir)
+    return export_artifacts(artifacts)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="ESN Buddy Matching CLI")
-    parser.add_argument("--config", required=True, help="Path to config.yml")
+    parser.add_argument("--config", help="Path to config.yml")
     parser.add_argument(
         "--debug-csv",
         action="store_true",
         help="Print CSV columns and attempted separators during load",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time, CPU time, memory and row counts per pipeline stage",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Do not show the progress line (it is only shown on a terminal)",
+    )
+    parser.add_argument(
+        "--save-artifacts",
+        action="store_true",
+        help="Also save the run's artifacts under out_dir/artifacts for reopening without re-running",
+    )
+    parser.add_argument(
+        "--load-artifacts",
+        metavar="BUNDLE_DIR",
+        help="Write the outputs of a saved run instead of running the pipeline",
+    )
     args = parser.parse_args()
+    if bool(args.config) == bool(args.load_artifacts):
+        parser.error("use either --config or --load-artifacts")
+    show_progress = not args.no_progress and sys.stderr.isatty()
     try:
-        out_path = run_pipeline(Path(args.config), debug_csv=args.debug_csv)
+        if args.load_artifacts:
+            out_path = export_saved_artifacts(Path(args.load_artifacts))
+        else:
+            out_path = run_pipeline(
+                Path(args.config),
+                debug_csv=args.debug_csv,
+                profile=args.profile,
+                progress_stream=sys.stderr if show_progress else None,
+                save_artifacts=args.save_artifacts
+            )
     except Exception as exc:  # noqa: BLE001
         print(f"Error: {exc}")
         raise SystemExit(1)
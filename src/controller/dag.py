@@ -0,0 +1,190 @@
+"""
+Small DAG executor for pipeline stages.
+
+A stage is a Node with declared input and output names. The executor starts
+every node as soon as all of its inputs exist, so independent nodes (e.g.
+loading or vectorizing the ESN and the Erasmus table) overlap on a thread
+pool. Each node is memoized in a StageCache under a key chained from the
+keys of its inputs and its own parameters, and measured with
+instrumentation.measure_stage.
+
+Progress reports of all nodes are forwarded to the caller's callback on the
+thread that called run(), never from a worker thread, so GUI callbacks can
+update widgets directly.
+"""
+import queue
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.controller.instrumentation import StageMetrics, measure_stage
+from src.controller.progress import PipelineProgressCallback
+from src.controller.stage_cache import StageCache, stage_key
+
+DEFAULT_MAX_WORKERS = 4
+
+# Seconds between progress forwarding while nodes are running
+_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class Node:
+    """One stage: `func(*inputs)` returns its outputs (a tuple when there are several)."""
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    # Configuration values the node reads; part of its cache key
+    params: Any = None
+    cacheable: bool = True
+    # Pass a progress(done, total) callback to func as `progress=`
+    reports_progress: bool = False
+    # Rows handled, from the outputs (for the node's metrics)
+    rows: Optional[Callable[..., int]] = None
+
+
+def topological_order(nodes: Sequence[Node], available: Sequence[str] = ()) -> List[Node]:
+    """
+    Order nodes so that every node comes after the producers of its inputs.
+
+    Raises:
+        ValueError: On duplicate outputs, inputs nobody produces, or cycles
+    """
+    producers: Dict[str, Node] = {name: None for name in available}
+    for node in nodes:
+        for output in node.outputs:
+            if output in producers:
+                raise ValueError(f"Value {output!r} is produced more than once")
+            producers[output] = node
+    for node in nodes:
+        missing = [name for name in node.inputs if name not in producers]
+        if missing:
+            raise ValueError(f"Node {node.name!r} needs values nobody produces: {missing}")
+
+    ordered: List[Node] = []
+    ready = set(available)
+    remaining = list(nodes)
+    while remaining:
+        runnable = [node for node in remaining if all(name in ready for name in node.inputs)]
+        if not runnable:
+            raise ValueError(f"Cycle between nodes: {[node.name for node in remaining]}")
+        for node in runnable:
+            ordered.append(node)
+            ready.update(node.outputs)
+            remaining.remove(node)
+    return ordered
+
+
+class DagExecutor:
+    """Runs a set of nodes, overlapping independent ones on a thread pool."""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache: Optional[StageCache] = None,
+        trace_memory: bool = False
+    ):
+        # tracemalloc is process-wide: traced peaks are only per-node when nodes run one at a time
+        self.max_workers = 1 if trace_memory else max(1, max_workers)
+        self.cache = cache
+        self.trace_memory = trace_memory
+
+    def run(
+        self,
+        nodes: Sequence[Node],
+        values: Optional[Dict[str, Any]] = None,
+        progress: Optional[PipelineProgressCallback] = None
+    ) -> Tuple[Dict[str, Any], List[StageMetrics]]:
+        """
+        Run all nodes and return (every value by name, metrics in node order).
+
+        `values` holds inputs that no node produces; they are not part of any
+        cache key, so nodes depending on them are not cached. The first node
+        failure cancels the nodes not started yet and is re-raised once the
+        running ones have finished.
+        """
+        values = dict(values or {})
+        order = topological_order(nodes, available=list(values))
+        position = {node.name: idx for idx, node in enumerate(order)}
+        # Cache key of every value (None: not cacheable)
+        keys: Dict[str, Optional[str]] = {name: None for name in values}
+        reports: "queue.Queue[Tuple[str, int, int]]" = queue.Queue()
+        metrics: List[StageMetrics] = []
+
+        def forward() -> None:
+            while True:
+                try:
+                    report = reports.get_nowait()
+                except queue.Empty:
+                    return
+                if progress is not None:
+                    progress(*report)
+
+        pending = list(order)
+        running: Dict[Future, Node] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as pool:
+            try:
+                while pending or running:
+                    for node in [node for node in pending if all(name in values for name in node.inputs)]:
+                        pending.remove(node)
+                        key = self._node_key(node, keys)
+                        args = [values[name] for name in node.inputs]
+                        future = pool.submit(self._run_node, node, key, args, reports, metrics)
+                        running[future] = node
+                        for output in node.outputs:
+                            keys[output] = None if key is None else f"{key}:{output}"
+
+                    done, _ = wait(list(running), timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    forward()
+                    for future in done:
+                        node = running.pop(future)
+                        result = future.result()
+                        outputs = (result,) if len(node.outputs) == 1 else tuple(result)
+                        values.update(zip(node.outputs, outputs))
+            except BaseException:
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+            finally:
+                forward()
+
+        metrics.sort(key=lambda record: position[record.stage])
+        return values, metrics
+
+    def _node_key(self, node: Node, keys: Dict[str, Optional[str]]) -> Optional[str]:
+        if not node.cacheable or self.cache is None:
+            return None
+        input_keys = [keys[name] for name in node.inputs]
+        if any(key is None for key in input_keys):
+            return None
+        return stage_key(node.name, input_keys, node.params)
+
+    def _run_node(
+        self,
+        node: Node,
+        key: Optional[str],
+        args: List[Any],
+        reports: "queue.Queue[Tuple[str, int, int]]",
+        metrics: List[StageMetrics]
+    ) -> Any:
+        reports.put((node.name, 0, 1))
+        with measure_stage(metrics, node.name, self.trace_memory) as record:
+            kwargs = {}
+            if node.reports_progress:
+                kwargs["progress"] = lambda done, total: reports.put((node.name, done, total))
+
+            computed = []
+
+            def compute():
+                computed.append(True)
+                return node.func(*args, **kwargs)
+
+            if key is None:
+                result = compute()
+            else:
+                result = self.cache.get_or_compute(node.name, key, compute)
+            record.cached = not computed
+            if node.rows is not None:
+                outputs = (result,) if len(node.outputs) == 1 else tuple(result)
+                record.rows = node.rows(*outputs)
+        reports.put((node.name, 1, 1))
+        return result
@@ -0,0 +1,197 @@
+"""
+Content-addressed cache for exported result files.
+
+A run is identified by a fingerprint of its input data, its configuration and
+the code that produces the results (see code_version). When a previous export with the same fingerprint still
+exists in the output directory it is reused instead of being written again.
+Cached outputs are tracked in an index file and pruned least-recently-used
+first once they exceed a size budget.
+"""
+import functools
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src import __version__
+
+CACHE_INDEX_NAME = ".export_cache.json"
+DEFAULT_CACHE_MAX_MB = 500
+
+# Output settings that do not influence the exported content
+_NON_CONTENT_OUTPUT_KEYS = {
+    "export_cache", "export_cache_max_mb", "export_mode", "assignment_db", "save_artifacts",
+}
+
+# Sources whose changes can change the exported results, relative to src/
+_RESULT_SOURCES = ("model/*.py", "view/export_*.py", "controller/pipeline.py")
+
+# Config sections deciding which input rows a run holds (see compute_run_key)
+_ROW_CONFIG_SECTIONS = ("input", "schema")
+
+
+def hash_dataframe(digest, df: pd.DataFrame) -> None:
+    """Feed the columns and row contents of `df` into a hashlib digest."""
+    digest.update(json.dumps([str(col) for col in df.columns]).encode("utf-8"))
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Unhashable / mixed cell values: fall back to their string form
+        row_hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+    digest.update(row_hashes.to_numpy().tobytes())
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Hash of the package version and the sources that produce the results.
+
+    Part of every fingerprint, so a code change that can alter the exported
+    files invalidates earlier exports without bumping `__version__`.
+    """
+    src_dir = Path(__file__).resolve().parent.parent
+    digest = hashlib.sha256(f"version={__version__}".encode("utf-8"))
+    for pattern in _RESULT_SOURCES:
+        for path in sorted(src_dir.glob(pattern)):
+            digest.update(path.relative_to(src_dir).as_posix().encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def compute_fingerprint(esn_df: pd.DataFrame, erasmus_df: pd.DataFrame, config: Dict) -> str:
+    """
+    Compute the fingerprint of a run from (input data, config, code_version()).
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    content_config = dict(config)
+    output_cfg = content_config.get("output")
+    if isinstance(output_cfg, dict):
+        content_config["output"] = {
+            key: value for key, value in output_cfg.items() if key not in _NON_CONTENT_OUTPUT_KEYS
+        }
+
+    digest = hashlib.sha256()
+    digest.update(f"code={code_version()}".encode("utf-8"))
+    digest.update(json.dumps(content_config, sort_keys=True, default=str).encode("utf-8"))
+    hash_dataframe(digest, esn_df)
+    hash_dataframe(digest, erasmus_df)
+    return digest.hexdigest()
+
+
+def compute_run_key(esn_df: pd.DataFrame, erasmus_df: pd.DataFrame, config: Dict) -> str:
+    """
+    Compute the key of the rows a run's results refer to.
+
+    Only the filtered input data and the settings that decide which rows it
+    holds (ingest, filtering and question columns) are included, so changing
+    the export or ranking settings keeps the key, and with it the row
+    indices that manual assignments refer to.
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    row_config = {section: config.get(section, {}) for section in _ROW_CONFIG_SECTIONS}
+    digest = hashlib.sha256()
+    digest.update(json.dumps(row_config, sort_keys=True, default=str).encode("utf-8"))
+    hash_dataframe(digest, esn_df)
+    hash_dataframe(digest, erasmus_df)
+    return digest.hexdigest()
+
+
+def subset_fingerprint(fingerprint: str, esn_indices: List[int]) -> str:
+    """Derive the fingerprint of an export restricted to some ESN members."""
+    digest = hashlib.sha256(fingerprint.encode("utf-8"))
+    digest.update(json.dumps(sorted(int(idx) for idx in esn_indices)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_index(out_dir: Path) -> Dict:
+    index_path = out_dir / CACHE_INDEX_NAME
+    if not index_path.exists():
+        return {}
+    try:
+        with index_path.open("r", encoding="utf-8") as handle:
+            index = json.load(handle)
+    except (OSError, ValueError):
+        # A corrupt index only costs a re-export
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def _save_index(out_dir: Path, index: Dict) -> None:
+    index_path = out_dir / CACHE_INDEX_NAME
+    tmp_path = index_path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(index, handle, indent=2, sort_keys=True)
+    tmp_path.replace(index_path)
+
+
+def lookup(out_dir: Path, fingerprint: str) -> Optional[Dict[str, Path]]:
+    """
+    Return the cached output paths for a fingerprint, or None on a miss.
+
+    A hit refreshes the entry's last-used time.
+    """
+    index = _load_index(out_dir)
+    entry = index.get(fingerprint)
+    if not entry:
+        return None
+    paths = {fmt: out_dir / name for fmt, name in entry.get("paths", {}).items()}
+    if not paths or not all(path.exists() for path in paths.values()):
+        return None
+    entry["last_used"] = time.time()
+    _save_index(out_dir, index)
+    return paths
+
+
+def record(out_dir: Path, fingerprint: str, paths: Dict[str, Path]) -> None:
+    """Register freshly written output paths under a fingerprint."""
+    index = _load_index(out_dir)
+    index[fingerprint] = {
+        "paths": {fmt: Path(path).name for fmt, path in paths.items()},
+        "last_used": time.time(),
+    }
+    _save_index(out_dir, index)
+
+
+def prune(out_dir: Path, max_bytes: int, keep: Optional[str] = None) -> int:
+    """
+    Delete least-recently-used cached outputs until they fit in max_bytes.
+
+    Only files tracked by the cache index are ever removed; the entry for
+    `keep` (usually the current run) is never evicted.
+
+    Returns:
+        Number of evicted entries
+    """
+    index = _load_index(out_dir)
+
+    def entry_size(entry: Dict) -> int:
+        return sum(
+            (out_dir / name).stat().st_size
+            for name in entry.get("paths", {}).values()
+            if (out_dir / name).exists()
+        )
+
+    sizes = {fingerprint: entry_size(entry) for fingerprint, entry in index.items()}
+    total = sum(sizes.values())
+    evicted = 0
+    for fingerprint, entry in sorted(index.items(), key=lambda item: item[1].get("last_used", 0)):
+        if total <= max_bytes:
+            break
+        if fingerprint == keep:
+            continue
+        for name in entry.get("paths", {}).values():
+            (out_dir / name).unlink(missing_ok=True)
+        total -= sizes[fingerprint]
+        del index[fingerprint]
+        evicted += 1
+
+    if evicted:
+        _save_index(out_dir, index)
+    return evicted
@@ -0,0 +1,99 @@
+"""
+Background export jobs.
+
+Runs write_export on a worker thread so the GUI stays responsive while the
+workbook is written. The job object only holds plain progress fields and
+the outcome; the worker never touches the artifacts the GUI is rendering,
+and the GUI records a finished full export on them from its own thread
+(record_on), never calling Streamlit from the worker thread.
+"""
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from src.controller.pipeline import ExportOutcome, PipelineArtifacts, write_export
+
+
+class ExportCancelled(Exception):
+    """Raised inside the worker when the job has been cancelled."""
+
+
+@dataclass
+class ExportJob:
+    """Progress and outcome of one background export."""
+    esn_indices: Optional[List[int]] = None
+    steps_done: int = 0
+    steps_total: int = 0
+    status: str = "running"  # "running", "done", "failed" or "cancelled"
+    output_path: Optional[Path] = None
+    outcome: Optional[ExportOutcome] = None
+    error: str = ""
+
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, repr=False)
+
+    @property
+    def is_running(self) -> bool:
+        """True while the worker is still writing."""
+        return self.status == "running"
+
+    @property
+    def fraction(self) -> float:
+        """Completed share of the export in [0, 1]."""
+        if self.status == "done":
+            return 1.0
+        if not self.steps_total:
+            return 0.0
+        return min(self.steps_done / self.steps_total, 1.0)
+
+    def cancel(self) -> None:
+        """Ask the worker to stop after the sheet it is currently writing."""
+        self._cancel_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until the worker finishes (mainly for tests and the CLI)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def record_on(self, artifacts: PipelineArtifacts) -> None:
+        """Record a finished full export on the artifacts it was started for (call from their thread)."""
+        if self.status == "done" and self.esn_indices is None and self.outcome is not None:
+            self.outcome.record_on(artifacts)
+
+    def _on_progress(self, steps_done: int, steps_total: int) -> None:
+        if self._cancel_event.is_set():
+            raise ExportCancelled()
+        self.steps_done = steps_done
+        self.steps_total = steps_total
+
+    def _run(self, artifacts: PipelineArtifacts) -> None:
+        try:
+            self.outcome = write_export(artifacts, esn_indices=self.esn_indices, progress=self._on_progress)
+            self.output_path = self.outcome.output_path
+            self.status = "done"
+        except ExportCancelled:
+            self.status = "cancelled"
+        except Exception as exc:  # noqa: BLE001
+            self.error = str(exc)
+            self.status = "failed"
+
+
+def start_export_job(
+    artifacts: PipelineArtifacts,
+    esn_indices: Optional[List[int]] = None
+) -> ExportJob:
+    """
+    Start exporting artifacts on a daemon thread.
+
+    Args:
+        artifacts: Artifacts of a completed pipeline run
+        esn_indices: Optional subset of ESN members; all when None
+
+    Returns:
+        The running ExportJob
+    """
+    job = ExportJob(esn_indices=list(esn_indices) if esn_indices is not None else None)
+    job._thread = threading.Thread(target=job._run, args=(artifacts,), name="export-job", daemon=True)
+    job._thread.start()
+    return job
@@ -0,0 +1,101 @@
+"""
+Per-stage timing and memory measurements for pipeline runs.
+
+Every stage runs inside `measure_stage`, which records wall time, CPU time
+of the thread running it (stages may overlap), the process's peak resident
+memory and the number of rows the stage handled. Python allocation peaks
+are traced with tracemalloc only on request (it slows allocation-heavy code
+down noticeably), e.g. by the CLI's `--profile` flag.
+"""
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class StageMetrics:
+    """Measurements of one pipeline stage."""
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    # Peak resident memory of the whole process at the end of the stage
+    peak_rss_mb: Optional[float] = None
+    # Peak of Python allocations made during the stage (only when traced)
+    traced_peak_mb: Optional[float] = None
+    rows: int = 0
+    # Output reused from the stage cache instead of being computed
+    cached: bool = False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def measure_stage(metrics: List[StageMetrics], stage: str, trace_memory: bool = False) -> Iterator[StageMetrics]:
+    """
+    Measure the enclosed block and append its StageMetrics to `metrics`.
+
+    The yielded record can be filled in by the stage (rows, cached). The
+    record is appended even when the block raises.
+    """
+    record = StageMetrics(stage=stage)
+    started_tracing = False
+    if trace_memory:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            started_tracing = True
+        traced_start = tracemalloc.get_traced_memory()[0]
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield record
+    finally:
+        record.wall_seconds = time.perf_counter() - wall_start
+        record.cpu_seconds = time.thread_time() - cpu_start
+        record.peak_rss_mb = peak_rss_mb()
+        if trace_memory:
+            record.traced_peak_mb = max(tracemalloc.get_traced_memory()[1] - traced_start, 0) / (1024 * 1024)
+            if started_tracing:
+                tracemalloc.stop()
+        metrics.append(record)
+
+
+def metrics_frame(metrics: List[StageMetrics]) -> pd.DataFrame:
+    """Tabular view of stage metrics, one row per stage."""
+    columns = [field for field in StageMetrics.__dataclass_fields__]
+    return pd.DataFrame([asdict(record) for record in metrics], columns=columns)
+
+
+def format_metrics(metrics: List[StageMetrics]) -> str:
+    """Plain-text table of stage metrics for terminal output."""
+    lines = [f"{'Stage':<22}{'Wall s':>9}{'CPU s':>9}{'Peak RSS MB':>13}{'Py peak MB':>12}{'Rows':>12}"]
+    for record in metrics:
+        rss = "-" if record.peak_rss_mb is None else f"{record.peak_rss_mb:.1f}"
+        traced = "-" if record.traced_peak_mb is None else f"{record.traced_peak_mb:.1f}"
+        stage = f"{record.stage} (cached)" if record.cached else record.stage
+        lines.append(
+            f"{stage:<22}{record.wall_seconds:>9.3f}{record.cpu_seconds:>9.3f}{rss:>13}{traced:>12}{record.rows:>12}"
+        )
+    total_wall = sum(record.wall_seconds for record in metrics)
+    total_cpu = sum(record.cpu_seconds for record in metrics)
+    lines.append(f"{'total':<22}{total_wall:>9.3f}{total_cpu:>9.3f}")
+    return "\n".join(lines)
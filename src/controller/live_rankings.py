@@ -0,0 +1,96 @@
+"""
+Assignment-aware candidate rankings.
+
+Shows each ESN member their best candidates among the students who are
+still free, without re-running the pipeline. Every ESN member gets a buffer
+of the best `buffer_factor * top_k` students (assigned or not), computed on
+first use from the stored distance matrix. Assigned students are hidden
+through a shared mask that follows the AssignmentState event log
+incrementally; a buffer is only recomputed, with a partial sort of that one
+row, when too few of its students are still free.
+"""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.controller.assignments import AssignmentLog, AssignmentState
+from src.model import rank
+from src.model.rank import RankedCandidate
+
+DEFAULT_BUFFER_FACTOR = 3
+
+
+class LiveRankings:
+    """Per-ESN-member top-K over the students not assigned yet."""
+
+    def __init__(
+        self,
+        distances: np.ndarray,
+        erasmus_df: pd.DataFrame,
+        top_k: int,
+        identifier_column: Optional[str] = None,
+        buffer_factor: int = DEFAULT_BUFFER_FACTOR
+    ):
+        self.distances = distances
+        self.top_k = top_k
+        self.buffer_size = max(top_k * buffer_factor, top_k)
+        self._tie_ranks = rank.tie_break_ranks(erasmus_df, identifier_column)
+        self._buffers: List[Optional[np.ndarray]] = [None] * distances.shape[0]
+        self._taken = np.zeros(distances.shape[1], dtype=bool)
+        # Position in the assignment log the mask reflects
+        self._log: Optional[AssignmentLog] = None
+        self._seen_seq = 0
+        # Number of per-row partial sorts (initial fills plus refills)
+        self.row_sorts = 0
+
+    def sync(self, state: AssignmentState) -> None:
+        """
+        Bring the assigned-student mask up to date with `state`.
+
+        Only events since the last sync are applied; a different state
+        object (e.g. after a new run) resets the mask from scratch.
+        """
+        log = state.log
+        if log is not self._log or log.last_seq < self._seen_seq:
+            self._taken[:] = False
+            self._taken[list(state.get_assigned_erasmus_indices())] = True
+            self._log = log
+            self._seen_seq = log.last_seq
+            return
+        if log.last_seq == self._seen_seq:
+            return
+
+        first_seq = log.events[0].seq
+        for event in log.events[self._seen_seq - first_seq + 1:]:
+            indices = [assignment.erasmus_index for assignment in event.assignments]
+            self._taken[indices] = event.action == "assign"
+        self._seen_seq = log.last_seq
+
+    def _fill(self, esn_index: int, size: int) -> np.ndarray:
+        buffer = rank.partial_rank_row(self.distances[esn_index], self._tie_ranks, size)
+        self._buffers[esn_index] = buffer
+        self.row_sorts += 1
+        return buffer
+
+    def top(self, esn_index: int, k: Optional[int] = None) -> List[RankedCandidate]:
+        """
+        Best `k` (default top_k) free candidates of one ESN member, best first.
+
+        Call sync() first so the mask reflects the current assignments.
+        """
+        k = self.top_k if k is None else k
+        buffer = self._buffers[esn_index]
+        if buffer is None:
+            buffer = self._fill(esn_index, max(self.buffer_size, k))
+
+        free = buffer[~self._taken[buffer]]
+        n = self.distances.shape[1]
+        if free.size < k and buffer.size < n:
+            # Buffer exhausted: re-select this row so that, after skipping the
+            # students taken so far, a full buffer of free ones remains
+            buffer = self._fill(esn_index, int(self._taken.sum()) + max(self.buffer_size, k))
+            free = buffer[~self._taken[buffer]]
+
+        row = self.distances[esn_index]
+        return [RankedCandidate(erasmus_index=int(idx), distance=float(row[idx])) for idx in free[:k]]
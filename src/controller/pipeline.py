@@ -2,23 +2,37 @@
 Reusable pipeline for ESN Buddy Matching System.
 Can be called from both CLI and GUI.
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from src.controller import artifact_views, export_cache, stage_cache
+from src.controller.artifact_views import (
+    RankingTable, ViewCache, comparison_counts_row, compact_distances, decode_answers, encode_answers
+)
+from src.controller.dag import DEFAULT_MAX_WORKERS, DagExecutor, Node
+from src.controller.instrumentation import StageMetrics, measure_stage
+from src.controller.progress import PIPELINE_STAGES, PipelineProgressCallback, stage_progress
 from src.model import ingest, match, rank, validate, vectorize
 from src.view import export_xlsx
 
 
-@dataclass
+@dataclass(eq=False)
 class PipelineArtifacts:
-    """Container for all pipeline outputs and intermediate data."""
+    """
+    Container for all pipeline outputs and intermediate data.
 
-    # Final output
-    output_path: Path
+    Only compact core arrays are stored (see artifact_views); the float
+    vectors, the float distance matrix, the ranking objects and other derived
+    views are computed on access and kept in the bounded `views` cache.
+    Build from full pipeline results with `from_results`.
+    """
+
+    # Final output (None until exported when output.export_mode is "lazy")
+    output_path: Optional[Path]
 
     # Statistics
     stats: Dict[str, int]
@@ -27,18 +41,151 @@ class PipelineArtifacts:
     esn_df: pd.DataFrame
     erasmus_df: pd.DataFrame
 
-    # Vectorization outputs
-    esn_vectors: np.ndarray
-    erasmus_vectors: np.ndarray
+    # Answer codes per member / student (int8: 0 = A, 1 = B, -1 = missing)
+    esn_answers: np.ndarray
+    erasmus_answers: np.ndarray
     question_columns: List[str]
 
-    # Matching outputs
-    distances: np.ndarray
-    rankings: List[rank.ESNRanking]
+    # Hamming distances, in the smallest unsigned integer type holding them
+    distance_counts: np.ndarray
+    ranking_table: RankingTable
 
     # Config used
     config: Dict
 
+    # Every written output file, keyed by format ("xlsx", "parquet", ...)
+    output_paths: Dict[str, Path] = field(default_factory=dict)
+
+    # Export cache: run fingerprint and the previous export reused for it (if any)
+    fingerprint: str = ""
+    reused_output_path: Optional[Path] = None
+
+    # Top ESN members per Erasmus student (empty unless matching.reverse_top_k is set)
+    reverse_ranking_table: RankingTable = field(
+        default_factory=lambda: RankingTable.from_rankings([], reverse=True)
+    )
+
+    # Timing and memory per pipeline stage, in the order the stages ran
+    metrics: List[StageMetrics] = field(default_factory=list)
+
+    # Directory the artifacts were saved to or reopened from (see artifact_bundle)
+    bundle_path: Optional[Path] = None
+
+    # Derived views, bounded by size
+    views: ViewCache = field(default_factory=ViewCache, repr=False)
+
+    @classmethod
+    def from_results(
+        cls,
+        esn_vectors: np.ndarray,
+        erasmus_vectors: np.ndarray,
+        distances: np.ndarray,
+        rankings: List[rank.ESNRanking],
+        reverse_rankings: Optional[List[rank.ErasmusRanking]] = None,
+        **fields
+    ) -> "PipelineArtifacts":
+        """Artifacts from full answer vectors, distance matrix and ranking objects."""
+        return cls(
+            esn_answers=encode_answers(esn_vectors),
+            erasmus_answers=encode_answers(erasmus_vectors),
+            distance_counts=compact_distances(distances),
+            ranking_table=RankingTable.from_rankings(rankings),
+            reverse_ranking_table=RankingTable.from_rankings(reverse_rankings or [], reverse=True),
+            **fields
+        )
+
+    @property
+    def esn_vectors(self) -> np.ndarray:
+        """ESN answers as 0/1/NaN floats (a cached view; do not modify)."""
+        return self.views.get_or_compute("esn_vectors", lambda: decode_answers(self.esn_answers))
+
+    @property
+    def erasmus_vectors(self) -> np.ndarray:
+        """Erasmus answers as 0/1/NaN floats (a cached view; do not modify)."""
+        return self.views.get_or_compute("erasmus_vectors", lambda: decode_answers(self.erasmus_answers))
+
+    @property
+    def distances(self) -> np.ndarray:
+        """Float distance matrix (a cached view; do not modify). Prefer distance_counts where integers do."""
+        return self.views.get_or_compute("distances", lambda: self.distance_counts.astype(float))
+
+    @property
+    def rankings(self) -> RankingTable:
+        """Top Erasmus candidates per ESN member, built per row on access."""
+        return self.ranking_table
+
+    @property
+    def reverse_rankings(self) -> RankingTable:
+        """Top ESN members per Erasmus student, built per row on access."""
+        return self.reverse_ranking_table
+
+    @property
+    def run_key(self) -> str:
+        """
+        Key of the rows the results refer to (see export_cache.compute_run_key).
+
+        Unlike the fingerprint it stays the same when only export or ranking
+        settings change; manual assignments are stored under it.
+        """
+        return self.views.get_or_compute(
+            "run_key", lambda: export_cache.compute_run_key(self.esn_df, self.erasmus_df, self.config)
+        )
+
+    def cached_view(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """A derived view (e.g. a display table) computed once and kept while the cache has room."""
+        return self.views.get_or_compute(key, compute)
+
+    def comparison_stats(self, esn_index: int) -> Dict[str, np.ndarray]:
+        """Compared/same/different answer counts of one ESN member against every student."""
+        return self.views.get_or_compute(
+            ("comparison_stats", esn_index),
+            lambda: comparison_counts_row(
+                self.esn_answers[esn_index], self.erasmus_answers, self.distance_counts[esn_index]
+            )
+        )
+
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Memory held by the artifacts: one row per core array / table and per cached view.
+
+        Columns: component, kind ("core", "mapped" for arrays read from a
+        saved bundle on access, or "view"), shape, dtype and mb.
+        """
+        rows = []
+        core = {
+            "esn_df": self.esn_df,
+            "erasmus_df": self.erasmus_df,
+            "esn_answers": self.esn_answers,
+            "erasmus_answers": self.erasmus_answers,
+            "distance_counts": self.distance_counts,
+            "rankings": self.ranking_table,
+            "reverse_rankings": self.reverse_ranking_table,
+        }
+        for name, value in core.items():
+            if isinstance(value, RankingTable):
+                shape, dtype = (len(value.index),), "ranking table"
+                mapped = isinstance(value.index, np.memmap)
+            else:
+                shape, dtype = value.shape, str(getattr(value, "dtype", "table"))
+                mapped = isinstance(value, np.memmap)
+            rows.append({
+                "component": name,
+                "kind": "mapped" if mapped else "core",
+                "shape": str(tuple(shape)),
+                "dtype": dtype,
+                "mb": artifact_views.nbytes(value) / (1024 * 1024),
+            })
+        for key, size in self.views.sizes():
+            rows.append({
+                # Tuple keys are (view name, row, ...): name and row identify the view
+                "component": key if isinstance(key, str) else " ".join(str(part) for part in key[:2]),
+                "kind": "view",
+                "shape": "",
+                "dtype": "",
+                "mb": size / (1024 * 1024),
+            })
+        return pd.DataFrame(rows, columns=["component", "kind", "shape", "dtype", "mb"])
+
 
 def compute_comparison_stats(
     esn_vector: np.ndarray,
@@ -70,18 +217,164 @@ def compute_comparison_stats(
     return compared_questions_count, same_answers_count, different_answers_count
 
 
-def run_pipeline_from_config(
+# Input settings that decide what is read from disk (the rest are filters)
+_READ_KEYS = ("format", "file_path", "esn_csv", "erasmus_csv", "esn_sheet", "erasmus_sheet", "csv_separator")
+
+
+def pipeline_nodes(
     config: Dict,
     debug: bool = False,
     input_override: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+) -> List[Node]:
+    """
+    The matching pipeline up to (not including) export, as DAG nodes.
+
+    The ESN and Erasmus sides are loaded and vectorized by separate nodes so
+    they can overlap; fingerprinting runs alongside vectorizing and matching.
+    """
+    matching_cfg = config.get("matching", {})
+    input_cfg = config.get("input", {})
+    schema_cfg = config.get("schema", {})
+    identifier_column = schema_cfg.get("identifier_column")
+    question_columns = schema_cfg.get("question_columns", [])
+
+    # Step 1: Ingest (or take the given tables)
+    if input_override:
+        erasmus_df, esn_df = input_override
+        ingest_nodes = [
+            Node(
+                "ingest_esn", lambda: (esn_df, {"esn_loaded": len(esn_df), "esn_after_filter": len(esn_df)}),
+                outputs=("esn_raw", "esn_stats"), params=stage_cache.frames_key([esn_df]),
+                rows=lambda df, _stats: len(df)
+            ),
+            Node(
+                "ingest_erasmus",
+                lambda: (erasmus_df, {"erasmus_loaded": len(erasmus_df), "erasmus_after_filter": len(erasmus_df)}),
+                outputs=("erasmus_raw", "erasmus_stats"), params=stage_cache.frames_key([erasmus_df]),
+                rows=lambda df, _stats: len(df)
+            ),
+        ]
+    else:
+        def read_params(side: str):
+            # Keyed by the side's own file alone, so changing a filter (or the
+            # other side's file) does not re-read it
+            other = "erasmus" if side == "esn" else "esn"
+            settings = {key: input_cfg.get(key) for key in _READ_KEYS if not key.startswith(other)}
+            return settings, stage_cache.input_files(config, side)
+
+        ingest_nodes = [
+            Node(
+                "read_esn", lambda: ingest.read_table(config, "esn", debug=debug),
+                outputs=("esn_file",), params=read_params("esn"), rows=len
+            ),
+            Node(
+                "read_erasmus", lambda: ingest.read_table(config, "erasmus", debug=debug),
+                outputs=("erasmus_file",), params=read_params("erasmus"), rows=len
+            ),
+            Node(
+                "ingest_esn", ingest.filter_esn_table,
+                inputs=("esn_file",), outputs=("esn_raw", "esn_stats"),
+                rows=lambda df, _stats: len(df)
+            ),
+            Node(
+                "ingest_erasmus", lambda df: ingest.filter_erasmus_table(df, config),
+                inputs=("erasmus_file",), outputs=("erasmus_raw", "erasmus_stats"),
+                params=(
+                    {key: value for key, value in input_cfg.items() if key not in _READ_KEYS},
+                    identifier_column,
+                ),
+                rows=lambda df, _stats: len(df)
+            ),
+        ]
+
+    nodes = ingest_nodes + [
+        # Step 2: Validate
+        Node(
+            "validate", lambda erasmus, esn: validate.validate_tables(erasmus, esn, config),
+            inputs=("erasmus_raw", "esn_raw"), outputs=("erasmus_df", "esn_df"),
+            params=(schema_cfg, input_cfg.get("buddy_interest_column")),
+            rows=lambda erasmus, esn: len(erasmus) + len(esn)
+        ),
+        # Step 3: Vectorize
+        Node(
+            "vectorize_esn", lambda df: vectorize.vectorize_table(df, config),
+            inputs=("esn_df",), outputs=("esn_vec",), params=question_columns,
+            rows=lambda table: len(table.vectors)
+        ),
+        Node(
+            "vectorize_erasmus", lambda df: vectorize.vectorize_table(df, config),
+            inputs=("erasmus_df",), outputs=("erasmus_vec",), params=question_columns,
+            rows=lambda table: len(table.vectors)
+        ),
+        # Step 4: Match
+        Node(
+            "match",
+            lambda esn, erasmus, progress: match.compute_distance_matrix(esn.vectors, erasmus.vectors, progress),
+            inputs=("esn_vec", "erasmus_vec"), outputs=("distances",),
+            params=matching_cfg.get("metric", "hamming"), reports_progress=True,
+            rows=lambda distances: distances.size
+        ),
+    ]
+
+    # Step 5: Rank
+    top_k = matching_cfg.get("top_k")
+    nodes.append(Node(
+        "rank",
+        lambda distances, erasmus, progress: rank.rank_candidates(
+            distances, erasmus, len(erasmus) if top_k is None else top_k, identifier_column, progress
+        ),
+        inputs=("distances", "erasmus_df"), outputs=("rankings",),
+        params=(top_k, identifier_column), reports_progress=True,
+        rows=len
+    ))
+    reverse_top_k = matching_cfg.get("reverse_top_k") or 0
+    if reverse_top_k:
+        nodes.append(Node(
+            "reverse_rank",
+            lambda distances, esn, progress: rank.rank_esn_for_erasmus(
+                distances, esn, reverse_top_k, identifier_column, progress
+            ),
+            inputs=("distances", "esn_df"), outputs=("reverse_rankings",),
+            params=(reverse_top_k, identifier_column), reports_progress=True,
+            rows=len
+        ))
+
+    # Step 6: Fingerprint the run for export caching
+    nodes.append(Node(
+        "fingerprint", lambda esn, erasmus: export_cache.compute_fingerprint(esn, erasmus, config),
+        inputs=("esn_df", "erasmus_df"), outputs=("fingerprint",), params=config
+    ))
+    return nodes
+
+
+def run_pipeline_from_config(
+    config: Dict,
+    debug: bool = False,
+    input_override: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None,
+    cache: Optional[stage_cache.StageCache] = None,
+    trace_memory: bool = False,
+    progress: Optional[PipelineProgressCallback] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS
 ) -> PipelineArtifacts:
     """
     Run the complete matching pipeline.
 
+    The stages run as a DAG (see pipeline_nodes and dag): independent stages
+    overlap on a thread pool, every stage output is memoized (see
+    stage_cache), so re-running with a partly changed configuration only
+    re-runs the affected stages, and each stage is measured (see
+    instrumentation) into `PipelineArtifacts.metrics`.
+
     Args:
         config: Configuration dictionary (same structure as config.yml)
         debug: Enable debug mode
         input_override: Optional (erasmus_df, esn_df) tuple to bypass file loading
+        cache: Stage cache to use; the process-wide cache when None
+        trace_memory: Also trace Python allocation peaks per stage (slower;
+            stages then run one at a time)
+        progress: Optional callback receiving (stage, done, total) as the
+            stages advance (see progress); always called on this thread
+        max_workers: Threads for running independent stages concurrently
 
     Returns:
         PipelineArtifacts containing all outputs and intermediate data
@@ -95,53 +388,157 @@ def run_pipeline_from_config(
     if matching_cfg.get("metric", "hamming") != "hamming":
         raise ValueError(f"Unsupported matching metric: {matching_cfg.get('metric')}")
 
-    # Step 1: Ingest
-    if input_override:
-        erasmus_df, esn_df = input_override
-        stats = {
-            "esn_loaded": len(esn_df),
-            "erasmus_loaded": len(erasmus_df),
-            "esn_after_filter": len(esn_df),
-            "erasmus_after_filter": len(erasmus_df),
-        }
-    else:
-        erasmus_df, esn_df, stats = ingest.load_tables(config, debug=debug)
-
-    # Step 2: Validate
-    erasmus_df, esn_df = validate.validate_tables(erasmus_df, esn_df, config)
-
-    # Step 3: Vectorize
-    esn_vec, erasmus_vec = vectorize.vectorize_tables(esn_df, erasmus_df, config)
-
-    # Step 4: Match
-    distances = match.compute_distance_matrix(esn_vec.vectors, erasmus_vec.vectors)
-
-    # Step 5: Rank
-    top_k = matching_cfg.get("top_k")
-    if top_k is None:
-        top_k = len(erasmus_df)
-    identifier_column = config.get("schema", {}).get("identifier_column")
-    rankings = rank.rank_candidates(distances, erasmus_df, top_k, identifier_column)
-
-    # Step 6: Export
-    out_path = export_xlsx.export_results(
-        rankings, esn_df, erasmus_df, stats, config,
-        esn_vectors=esn_vec.vectors,
-        erasmus_vectors=erasmus_vec.vectors
-    )
+    cache = cache if cache is not None else stage_cache.shared_cache()
+    executor = DagExecutor(max_workers=max_workers, cache=cache, trace_memory=trace_memory)
+    nodes = pipeline_nodes(config, debug, input_override)
+    if progress is not None:
+        # Known stages that will not run, so overall progress can still reach 100%
+        names = {node.name for node in nodes}
+        for stage in PIPELINE_STAGES:
+            if stage not in names:
+                progress(stage, 0, 0)
+    values, metrics = executor.run(nodes, progress=progress)
 
+    esn_vec = values["esn_vec"]
     # Package all artifacts
-    artifacts = PipelineArtifacts(
-        output_path=out_path,
-        stats=stats,
-        esn_df=esn_df,
-        erasmus_df=erasmus_df,
+    artifacts = PipelineArtifacts.from_results(
+        output_path=None,
+        stats={**values["esn_stats"], **values["erasmus_stats"]},
+        esn_df=values["esn_df"],
+        erasmus_df=values["erasmus_df"],
         esn_vectors=esn_vec.vectors,
-        erasmus_vectors=erasmus_vec.vectors,
+        erasmus_vectors=values["erasmus_vec"].vectors,
         question_columns=esn_vec.question_columns,
-        distances=distances,
-        rankings=rankings,
+        distances=values["distances"],
+        rankings=values["rankings"],
         config=config,
+        fingerprint=values["fingerprint"],
+        reverse_rankings=values.get("reverse_rankings", []),
+        metrics=metrics,
     )
 
+    # Step 7: Export, unless deferred until the results are requested
+    if config.get("output", {}).get("export_mode", "eager") != "lazy":
+        if progress is not None:
+            progress("export", 0, 1)
+        export_artifacts(artifacts, progress=stage_progress(progress, "export"), trace_memory=trace_memory)
+        if progress is not None:
+            progress("export", 1, 1)
+    elif progress is not None:
+        progress("export", 0, 0)
+
     return artifacts
+
+
+@dataclass
+class ExportOutcome:
+    """Files written (or reused) by one export; see write_export."""
+    output_path: Path
+    output_paths: Dict[str, Path]
+    reused_output_path: Optional[Path] = None
+    # The "export" stage record of a full export; empty for subset exports
+    metrics: List[StageMetrics] = field(default_factory=list)
+
+    def record_on(self, artifacts: PipelineArtifacts) -> None:
+        """Record a full export on the artifacts it was written from."""
+        artifacts.output_path = self.output_path
+        artifacts.output_paths = self.output_paths
+        artifacts.reused_output_path = self.reused_output_path
+        artifacts.metrics.extend(self.metrics)
+
+
+def write_export(
+    artifacts: PipelineArtifacts,
+    esn_indices: Optional[List[int]] = None,
+    progress: Optional[export_xlsx.ProgressCallback] = None,
+    trace_memory: bool = False
+) -> ExportOutcome:
+    """
+    Export ranking results without changing `artifacts`, reusing an identical previous export when possible.
+
+    Safe to call off the thread that owns the artifacts (see export_jobs);
+    export_artifacts also records the outcome on them.
+
+    Args:
+        artifacts: Artifacts of a completed pipeline run
+        esn_indices: Optional subset of ESN members to export; all when None
+        progress: Optional callback receiving (steps_done, steps_total)
+            while files are written
+        trace_memory: Also trace Python allocation peaks (full exports only)
+
+    Returns:
+        The written (or reused) files
+    """
+    config = artifacts.config
+    output_cfg = config.get("output", {})
+    out_dir = Path(output_cfg.get("out_dir", "outputs"))
+    use_cache = output_cfg.get("export_cache", True)
+
+    if esn_indices is None:
+        rankings = artifacts.rankings
+        reverse_rankings = artifacts.reverse_rankings
+        fingerprint = artifacts.fingerprint
+    else:
+        # Subset exports are per ESN member and leave out the per-student view
+        selected = sorted(set(esn_indices))
+        rankings = [artifacts.rankings[idx] for idx in selected]
+        reverse_rankings = []
+        fingerprint = export_cache.subset_fingerprint(artifacts.fingerprint, selected)
+
+    metrics: List[StageMetrics] = []
+    with measure_stage(metrics, "export", trace_memory) as record:
+        out_paths = export_cache.lookup(out_dir, fingerprint) if use_cache else None
+        reused_output_path = None
+        if out_paths:
+            reused_output_path = export_xlsx.primary_output_path(out_paths, output_cfg)
+        else:
+            out_paths = export_xlsx.export_result_files(
+                rankings, artifacts.esn_df, artifacts.erasmus_df, artifacts.stats, config,
+                esn_vectors=artifacts.esn_vectors,
+                erasmus_vectors=artifacts.erasmus_vectors,
+                file_suffix=f"_{fingerprint[:8]}" if use_cache else "",
+                progress=progress,
+                reverse_rankings=reverse_rankings
+            )
+            if use_cache:
+                export_cache.record(out_dir, fingerprint, out_paths)
+                max_mb = output_cfg.get("export_cache_max_mb", export_cache.DEFAULT_CACHE_MAX_MB)
+                export_cache.prune(out_dir, int(max_mb * 1024 * 1024), keep=fingerprint)
+        record.rows = len(rankings)
+        record.cached = reused_output_path is not None
+
+    return ExportOutcome(
+        output_path=export_xlsx.primary_output_path(out_paths, output_cfg),
+        output_paths=out_paths,
+        reused_output_path=reused_output_path,
+        # Subset exports are not part of the run's metrics
+        metrics=metrics if esn_indices is None else [],
+    )
+
+
+def export_artifacts(
+    artifacts: PipelineArtifacts,
+    esn_indices: Optional[List[int]] = None,
+    progress: Optional[export_xlsx.ProgressCallback] = None,
+    trace_memory: bool = False
+) -> Path:
+    """
+    Export ranking results, reusing an identical previous export when possible.
+
+    Args:
+        artifacts: Artifacts of a completed pipeline run
+        esn_indices: Optional subset of ESN members to export; all when None.
+            A full export is recorded on the artifacts (output_path,
+            output_paths, reused_output_path); subset exports are not.
+        progress: Optional callback receiving (steps_done, steps_total)
+            while files are written
+        trace_memory: Also trace Python allocation peaks (full exports
+            append an "export" entry to artifacts.metrics)
+
+    Returns:
+        Path to the exported workbook (or first table when XLSX is not selected)
+    """
+    outcome = write_export(artifacts, esn_indices, progress, trace_memory)
+    if esn_indices is None:
+        outcome.record_on(artifacts)
+    return outcome.output_path
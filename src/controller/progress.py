@@ -0,0 +1,134 @@
+"""
+Progress reporting for pipeline runs.
+
+The pipeline reports progress as `progress(stage, done, total)`: every stage
+reports (stage, 0, 1) when it starts and (stage, 1, 1) when it ends (a stage
+that does not run reports (stage, 0, 0)), and the long stages report their
+real units in between (ESN rows matched, rankings built, sheets and files
+written). ProgressTracker turns these into an
+overall fraction and an ETA, weighting the stages by their typical share of
+a run's time; the GUI and the CLI only render what it returns.
+"""
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# Called as progress(stage, done, total)
+PipelineProgressCallback = Callable[[str, int, int], None]
+
+# Typical share of a run's time per stage (normalized by their sum)
+STAGE_WEIGHTS: Dict[str, float] = {
+    "read_esn": 0.02,
+    "read_erasmus": 0.03,
+    "ingest_esn": 0.005,
+    "ingest_erasmus": 0.01,
+    "validate": 0.01,
+    "vectorize_esn": 0.03,
+    "vectorize_erasmus": 0.06,
+    "match": 0.40,
+    "rank": 0.10,
+    "reverse_rank": 0.05,
+    "fingerprint": 0.02,
+    "export": 0.28,
+}
+
+# Stages run_pipeline_from_config may run before export
+PIPELINE_STAGES = tuple(stage for stage in STAGE_WEIGHTS if stage != "export")
+
+STAGE_LABELS: Dict[str, str] = {
+    "read_esn": "Reading ESN table",
+    "read_erasmus": "Reading Erasmus table",
+    "ingest_esn": "Preparing ESN table",
+    "ingest_erasmus": "Filtering Erasmus table",
+    "validate": "Validating",
+    "vectorize_esn": "Vectorizing ESN answers",
+    "vectorize_erasmus": "Vectorizing Erasmus answers",
+    "match": "Computing distances",
+    "rank": "Ranking candidates",
+    "reverse_rank": "Ranking buddies per student",
+    "fingerprint": "Fingerprinting run",
+    "export": "Writing results",
+}
+
+# Minimum time between two reported updates of the same stage
+DEFAULT_MIN_INTERVAL = 0.1
+
+
+def stage_progress(
+    progress: Optional[PipelineProgressCallback],
+    stage: str
+) -> Optional[Callable[[int, int], None]]:
+    """Adapt a pipeline callback to the (done, total) callbacks of one stage."""
+    if progress is None:
+        return None
+    return lambda done, total: progress(stage, done, total)
+
+
+class ProgressTracker:
+    """Overall fraction and ETA of a run from per-stage progress reports."""
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        min_interval: float = DEFAULT_MIN_INTERVAL
+    ):
+        self.weights = dict(STAGE_WEIGHTS if weights is None else weights)
+        self._total_weight = sum(self.weights.values())
+        self._clock = clock
+        self._started = clock()
+        self._last_report = None
+        self._last_stage = None
+        self._stage_fraction: Dict[str, float] = {}
+        self.min_interval = min_interval
+
+    def update(self, stage: str, done: int, total: int) -> Optional[Tuple[float, Optional[float]]]:
+        """
+        Record a report and return (overall fraction, ETA in seconds or None).
+
+        Returns None when the report is too soon after the previous one to be
+        worth rendering, and for stages that do not run; stage starts and
+        ends are always returned.
+        """
+        self._stage_fraction[stage] = min(done / total, 1.0) if total else 1.0
+        if not total:
+            return None
+        now = self._clock()
+        boundary = stage != self._last_stage or done in (0, total)
+        if not boundary and self._last_report is not None and now - self._last_report < self.min_interval:
+            return None
+        self._last_report = now
+        self._last_stage = stage
+        return self.fraction, self.eta(now)
+
+    @property
+    def fraction(self) -> float:
+        """Weighted share of the run completed so far, in [0, 1]."""
+        if not self._total_weight:
+            return 0.0
+        done = sum(self.weights.get(stage, 0.0) * share for stage, share in self._stage_fraction.items())
+        return min(done / self._total_weight, 1.0)
+
+    def eta(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds left, extrapolated from the elapsed time; None until there is enough progress."""
+        fraction = self.fraction
+        if fraction < 0.02:
+            return None
+        elapsed = (self._clock() if now is None else now) - self._started
+        return elapsed * (1.0 - fraction) / fraction
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """Short human-readable ETA, e.g. "ETA 1m 05s"."""
+    if seconds is None:
+        return "ETA --"
+    seconds = int(round(seconds))
+    if seconds >= 60:
+        return f"ETA {seconds // 60}m {seconds % 60:02d}s"
+    return f"ETA {seconds}s"
+
+
+def progress_line(stage: str, done: int, total: int, fraction: float, eta: Optional[float]) -> str:
+    """One-line progress description for a terminal or status text."""
+    label = STAGE_LABELS.get(stage, stage)
+    detail = f" {done}/{total}" if total > 1 else ""
+    return f"{fraction * 100:5.1f}% {label}{detail} - {format_eta(eta)}"
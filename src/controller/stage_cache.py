@@ -0,0 +1,139 @@
+"""
+In-memory memoization of pipeline stage outputs.
+
+Every stage's output is stored under a key derived from the keys of the
+stages it consumes and the configuration sub-tree it reads, so a change only
+re-runs the stages downstream of it: a new `matching.top_k` re-ranks the
+stored distance matrix, a new question selection re-vectorizes the stored
+tables without reading the input files again. Input files are identified by
+path, size and modification time, uploaded tables by a hash of their
+contents.
+
+The cache lives for the process (e.g. across GUI reruns) and keeps a bounded
+number of entries per stage, least-recently-used first out. Cached values
+are shared between runs and must not be modified in place. Runs may use the
+cache concurrently: while one computes a key, others asking for the same key
+wait for its result instead of computing it again.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src import __version__
+from src.controller import export_cache
+
+# Entries kept per stage: the current run plus the previous one
+DEFAULT_ENTRIES_PER_STAGE = 2
+
+
+def stage_key(stage: str, *parts: Any) -> str:
+    """Key of a stage output from its upstream keys and configuration values."""
+    digest = hashlib.sha256(f"version={__version__};stage={stage}".encode("utf-8"))
+    digest.update(json.dumps(parts, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def frames_key(frames: Iterable[pd.DataFrame]) -> str:
+    """Content hash of in-memory input tables."""
+    digest = hashlib.sha256()
+    for df in frames:
+        export_cache.hash_dataframe(digest, df)
+    return digest.hexdigest()
+
+
+def file_signature(path: Path) -> Tuple[str, int, int]:
+    """(path, size, modification time) of an input file, or a marker when missing."""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return str(path), -1, -1
+    return str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def input_files(config: Dict, side: Optional[str] = None) -> List[Tuple[str, int, int]]:
+    """
+    Signatures of the files `ingest.load_tables` reads for this configuration.
+
+    With `side` ("esn" or "erasmus"), only the file that side is read from.
+    """
+    input_cfg = config.get("input", {})
+    base_path = Path(input_cfg.get("file_path") or "")
+    if (input_cfg.get("format") or "").lower() == "csv":
+        sides = [side] if side else ["esn", "erasmus"]
+        paths = [base_path / str(input_cfg.get(f"{name}_csv")) for name in sides]
+    else:
+        paths = [base_path]
+    return [file_signature(path) for path in paths]
+
+
+class StageCache:
+    """Bounded per-stage LRU store of stage outputs."""
+
+    def __init__(self, entries_per_stage: int = DEFAULT_ENTRIES_PER_STAGE):
+        self.entries_per_stage = entries_per_stage
+        self._stages: Dict[str, "OrderedDict[str, Any]"] = {}
+        self._lock = threading.Lock()
+        # Keys being computed, set when the computation ends
+        self._pending: Dict[Tuple[str, str], threading.Event] = {}
+        # Hits and misses per stage, for diagnostics and tests
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def get_or_compute(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the stored output of `stage` for `key`, computing it on a miss.
+
+        If another thread is computing the same key, waits for it and returns
+        its result. Failures are not cached; the exception propagates (and a
+        waiting thread computes the value itself).
+        """
+        with self._lock:
+            entries = self._stages.setdefault(stage, OrderedDict())
+            if key in entries:
+                entries.move_to_end(key)
+                self.hits[stage] = self.hits.get(stage, 0) + 1
+                return entries[key]
+            pending = self._pending.get((stage, key))
+            if pending is None:
+                pending = self._pending[(stage, key)] = threading.Event()
+                self.misses[stage] = self.misses.get(stage, 0) + 1
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            pending.wait()
+            return self.get_or_compute(stage, key, compute)
+
+        try:
+            value = compute()
+            if self.entries_per_stage > 0:
+                with self._lock:
+                    entries[key] = value
+                    entries.move_to_end(key)
+                    while len(entries) > self.entries_per_stage:
+                        entries.popitem(last=False)
+        finally:
+            with self._lock:
+                del self._pending[(stage, key)]
+            pending.set()
+        return value
+
+    def clear(self) -> None:
+        """Drop every stored output."""
+        with self._lock:
+            self._stages.clear()
+
+
+# Shared by every run in this process unless a run is given its own cache
+_shared_cache = StageCache()
+
+
+def shared_cache() -> StageCache:
+    """The process-wide stage cache."""
+    return _shared_cache
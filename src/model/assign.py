@@ -0,0 +1,355 @@
+"""
+Automatic buddy assignment on top of the distance matrix.
+
+Each ESN member can take up to `capacity` Erasmus students and each student
+gets at most one buddy. Pairs that are already fixed (manual assignments)
+are kept and consume capacity. Results are returned as (esn_index,
+erasmus_index) pairs; turning them into an AssignmentState is the
+controller's job.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+Pair = Tuple[int, int]
+
+STRATEGIES = ("optimal", "greedy", "stable")
+
+# Largest capacity read from a free-text column; larger numbers (a year, a
+# phone number) are not a buddy count
+MAX_CAPACITY = 10
+
+# Slots per free student optimal_assignment starts from (see there)
+_SLOTS_PER_STUDENT = 2
+
+
+def capacities_from_column(
+    esn_df: pd.DataFrame,
+    column: Optional[str],
+    default: int = 1,
+    max_capacity: int = MAX_CAPACITY
+) -> np.ndarray:
+    """
+    Read per-ESN-member capacities from a free-text column.
+
+    The first whole number in each cell is used (e.g. "2", "2 buddies", "2-3");
+    empty or non-numeric cells fall back to `default`. Capacities are clipped
+    to `max_capacity`.
+    """
+    if not column or column not in esn_df.columns:
+        return np.full(len(esn_df), min(default, max_capacity), dtype=int)
+    numbers = esn_df[column].astype(str).str.extract(r"(\d+)", expand=False)
+    capacities = pd.to_numeric(numbers, errors="coerce").fillna(default)
+    return capacities.clip(upper=max_capacity).astype(int).to_numpy()
+
+
+def _remaining_problem(
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    fixed_pairs: Optional[Iterable[Pair]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (remaining capacity per ESN member, indices of still-free students)."""
+    esn_count, erasmus_count = distances.shape
+    capacities = np.asarray(capacities, dtype=int)
+    if capacities.shape != (esn_count,):
+        raise ValueError(f"Expected {esn_count} capacities, got {capacities.shape[0]}")
+
+    remaining = capacities.copy()
+    free = np.ones(erasmus_count, dtype=bool)
+    for esn_index, erasmus_index in fixed_pairs or ():
+        remaining[esn_index] -= 1
+        free[erasmus_index] = False
+    # No ESN member needs more slots than there are free students
+    remaining = np.clip(remaining, 0, int(free.sum()))
+    return remaining, np.flatnonzero(free)
+
+
+def _empty_pairs() -> np.ndarray:
+    return np.empty((0, 2), dtype=int)
+
+
+def optimal_assignment(
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    fixed_pairs: Optional[Iterable[Pair]] = None
+) -> np.ndarray:
+    """
+    Minimum-total-distance capacitated assignment.
+
+    ESN members are expanded into one slot per unit of remaining capacity and
+    slots are matched to free students with the Hungarian method, so the
+    largest possible number of students is assigned at minimum total distance.
+
+    The cost matrix has one row per slot, so slots are capped per member to
+    about _SLOTS_PER_STUDENT slots per free student in total. A member that
+    fills all of its capped slots gets its cap doubled and the problem is
+    solved again; once every capped member leaves a slot unused, extra
+    (identical) slots cannot lower the cost, so the result is the same as
+    with every slot expanded.
+
+    Args:
+        distances: (esn_count, erasmus_count) Hamming distance matrix
+        capacities: Maximum number of students per ESN member
+        fixed_pairs: Already assigned (esn_index, erasmus_index) pairs to keep
+
+    Returns:
+        (k, 2) array of new (esn_index, erasmus_index) pairs, sorted by ESN member
+    """
+    remaining, students = _remaining_problem(distances, capacities, fixed_pairs)
+    if students.size == 0 or not remaining.any():
+        return _empty_pairs()
+
+    per_member = -(-_SLOTS_PER_STUDENT * students.size // np.count_nonzero(remaining))
+    cap = np.minimum(remaining, per_member)
+    while True:
+        slot_owner = np.repeat(np.arange(distances.shape[0]), cap)
+        cost = distances[np.ix_(slot_owner, students)]
+        slot_rows, student_cols = linear_sum_assignment(cost)
+        used = np.bincount(slot_owner[slot_rows], minlength=cap.size)
+        grow = (used == cap) & (cap < remaining)
+        if not grow.any():
+            break
+        cap[grow] = np.minimum(remaining[grow], cap[grow] * 2)
+    pairs = np.column_stack([slot_owner[slot_rows], students[student_cols]])
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def _bucket_order(distances: np.ndarray) -> np.ndarray:
+    """
+    Flat indices of `distances` ordered by distance, ties by position.
+
+    Hamming distances are small integers, so they are sorted as 16-bit keys;
+    numpy's stable sort is a radix (bucket) sort for such keys.
+    """
+    flat = distances.ravel()
+    if flat.size and np.isfinite(flat).all() and flat.min() >= 0 and flat.max() < 2 ** 16 \
+            and np.array_equal(flat, np.round(flat)):
+        flat = flat.astype(np.uint16)
+    return np.argsort(flat, kind="stable")
+
+
+def greedy_assignment(
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    fixed_pairs: Optional[Iterable[Pair]] = None
+) -> np.ndarray:
+    """
+    Greedy capacitated assignment by global best distance.
+
+    Pairs are taken from the closest distance bucket upwards. Inside a bucket
+    all still-valid pairs are accepted at once, except that each student goes
+    to the lowest ESN index offering them and each ESN member only takes as
+    many (lowest Erasmus index first) as it has capacity left; rounds repeat
+    until the bucket is exhausted.
+
+    Args:
+        distances: (esn_count, erasmus_count) Hamming distance matrix
+        capacities: Maximum number of students per ESN member
+        fixed_pairs: Already assigned (esn_index, erasmus_index) pairs to keep
+
+    Returns:
+        (k, 2) array of new (esn_index, erasmus_index) pairs, sorted by ESN member
+    """
+    remaining, students = _remaining_problem(distances, capacities, fixed_pairs)
+    members = np.flatnonzero(remaining)
+    if students.size == 0 or members.size == 0:
+        return _empty_pairs()
+
+    sub = distances[np.ix_(members, students)]
+    slots = remaining[members].copy()
+    taken = np.zeros(students.size, dtype=bool)
+    to_place = min(students.size, int(slots.sum()))
+    placed = 0
+    accepted: List[np.ndarray] = []
+
+    order = _bucket_order(sub)
+    keys = sub.ravel()[order]
+    for bucket in np.split(order, np.flatnonzero(np.diff(keys)) + 1):
+        rows, cols = np.divmod(bucket, students.size)
+        while rows.size and placed < to_place:
+            live = (slots[rows] > 0) & ~taken[cols]
+            rows, cols = rows[live], cols[live]
+            if not rows.size:
+                break
+            # One offer per student: the lowest ESN index (bucket order)
+            _, first = np.unique(cols, return_index=True)
+            first.sort()
+            offer_rows, offer_cols = rows[first], cols[first]
+            # Rank offers within each member and keep those that fit
+            by_member = np.argsort(offer_rows, kind="stable")
+            sorted_rows = offer_rows[by_member]
+            starts = np.flatnonzero(np.r_[True, np.diff(sorted_rows) != 0])
+            rank = np.arange(sorted_rows.size) - np.repeat(starts, np.diff(np.r_[starts, sorted_rows.size]))
+            keep = by_member[rank < slots[sorted_rows]]
+
+            slots -= np.bincount(offer_rows[keep], minlength=slots.size)
+            taken[offer_cols[keep]] = True
+            placed += keep.size
+            accepted.append(np.column_stack([members[offer_rows[keep]], students[offer_cols[keep]]]))
+        if placed >= to_place:
+            break
+
+    if not accepted:
+        return _empty_pairs()
+    result = np.concatenate(accepted).astype(int)
+    return result[np.lexsort((result[:, 1], result[:, 0]))]
+
+
+def stable_assignment(
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    top_k: int,
+    fixed_pairs: Optional[Iterable[Pair]] = None
+) -> np.ndarray:
+    """
+    Deferred-acceptance stable matching over each ESN member's top-K list.
+
+    ESN members propose to the free students on their top-K list (closest
+    first); a student holds the closest proposer seen so far and releases
+    the previous one, whose slot goes back to proposing. Students on nobody's
+    list stay unassigned.
+
+    Args:
+        distances: (esn_count, erasmus_count) Hamming distance matrix
+        capacities: Maximum number of students per ESN member
+        top_k: Length of each ESN member's preference list
+        fixed_pairs: Already assigned (esn_index, erasmus_index) pairs to keep
+
+    Returns:
+        (k, 2) array of new (esn_index, erasmus_index) pairs, sorted by ESN member
+    """
+    remaining, students = _remaining_problem(distances, capacities, fixed_pairs)
+    members = np.flatnonzero(remaining)
+    if students.size == 0 or members.size == 0 or top_k <= 0:
+        return _empty_pairs()
+
+    sub = distances[np.ix_(members, students)]
+    k = min(top_k, students.size)
+    if k < students.size:
+        part = np.argpartition(sub, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(students.size), (members.size, 1))
+    part_dist = np.take_along_axis(sub, part, axis=1)
+    order = np.lexsort((part, part_dist), axis=1)
+    prefs = np.take_along_axis(part, order, axis=1).tolist()
+
+    slots = remaining[members].tolist()
+    next_choice = [0] * members.size
+    held: Dict[int, int] = {}  # student column -> member row
+    queue = [row for row in range(members.size) for _ in range(slots[row])]
+
+    while queue:
+        row = queue.pop()
+        while next_choice[row] < k:
+            col = prefs[row][next_choice[row]]
+            next_choice[row] += 1
+            current = held.get(col)
+            if current is None:
+                held[col] = row
+                break
+            # Student prefers the closer member, ties by lower ESN index
+            if (sub[row, col], row) < (sub[current, col], current):
+                held[col] = row
+                queue.append(current)
+                break
+
+    pairs = np.array(
+        [(members[row], students[col]) for col, row in held.items()], dtype=int
+    ).reshape(-1, 2)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def best_available_pairs(
+    candidates: np.ndarray,
+    candidate_distances: np.ndarray,
+    esn_keys: Sequence,
+    taken: np.ndarray,
+    eligible: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    One student per ESN member from their ranked candidate lists.
+
+    In each round every unserved ESN member proposes their best candidate that
+    is not taken yet; a student proposed to by several members goes to the
+    closest one, ties to the smallest ESN key. Rounds repeat until nobody has
+    a candidate left, all in vectorized passes over the (esn, k) arrays.
+
+    Args:
+        candidates: (esn_count, k) Erasmus indices in rank order, -1 for padding
+        candidate_distances: (esn_count, k) distances aligned with candidates
+        esn_keys: Tie-breaking key per ESN member (e.g. identifier values)
+        taken: Boolean mask of Erasmus students that are already assigned
+        eligible: Boolean mask of ESN members to serve (all when None)
+
+    Returns:
+        (k, 2) array of new (esn_index, erasmus_index) pairs, sorted by ESN member
+    """
+    esn_count = candidates.shape[0]
+    taken = np.asarray(taken, dtype=bool).copy()
+    unserved = np.ones(esn_count, dtype=bool) if eligible is None else np.asarray(eligible, dtype=bool).copy()
+    key_rank = pd.factorize(pd.Series(list(esn_keys)), sort=True)[0]
+    valid = candidates >= 0
+    safe_candidates = np.where(valid, candidates, 0)
+    rows = np.arange(esn_count)
+    accepted: List[np.ndarray] = []
+
+    while unserved.any():
+        available = valid & ~taken[safe_candidates] & unserved[:, None]
+        proposing = available.any(axis=1)
+        if not proposing.any():
+            break
+        proposers = rows[proposing]
+        choice = available[proposers].argmax(axis=1)
+        students = candidates[proposers, choice]
+        distances = candidate_distances[proposers, choice]
+
+        order = np.lexsort((key_rank[proposers], distances, students))
+        first = np.r_[True, np.diff(students[order]) != 0]
+        winners = order[first]
+
+        unserved[proposers[winners]] = False
+        taken[students[winners]] = True
+        accepted.append(np.column_stack([proposers[winners], students[winners]]))
+
+    if not accepted:
+        return _empty_pairs()
+    pairs = np.concatenate(accepted).astype(int)
+    return pairs[np.argsort(pairs[:, 0], kind="stable")]
+
+
+def solve(
+    distances: np.ndarray,
+    capacities: np.ndarray,
+    strategy: str = "optimal",
+    fixed_pairs: Optional[Iterable[Pair]] = None,
+    top_k: Optional[int] = None
+) -> np.ndarray:
+    """
+    Run one of the assignment strategies.
+
+    Args:
+        distances: (esn_count, erasmus_count) Hamming distance matrix
+        capacities: Maximum number of students per ESN member
+        strategy: "optimal", "greedy" or "stable"
+        fixed_pairs: Already assigned (esn_index, erasmus_index) pairs to keep
+        top_k: Preference list length for "stable" (all students when None)
+
+    Returns:
+        (k, 2) array of new (esn_index, erasmus_index) pairs
+    """
+    fixed_pairs = list(fixed_pairs or ())
+    if strategy == "optimal":
+        return optimal_assignment(distances, capacities, fixed_pairs)
+    if strategy == "greedy":
+        return greedy_assignment(distances, capacities, fixed_pairs)
+    if strategy == "stable":
+        return stable_assignment(distances, capacities, top_k or distances.shape[1], fixed_pairs)
+    raise ValueError(f"Unknown assignment strategy: {strategy}")
+
+
+def assignment_cost(distances: np.ndarray, pairs: np.ndarray) -> float:
+    """Total distance of a set of (esn_index, erasmus_index) pairs."""
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    return float(distances[pairs[:, 0], pairs[:, 1]].sum())
@@ -45,14 +45,6 @@ def _read_csv(path: Path, debug: bool = False, separator: str | None = None) ->
     raise ValueError(f"Unable to read CSV file with expected delimiters: {path}")
 
 
-def _read_csv_pair(base_dir: Path, esn_name: str, erasmus_name: str, debug: bool, separator: str | None) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    esn_path = base_dir / esn_name
-    erasmus_path = base_dir / erasmus_name
-    esn_df = _read_csv(esn_path, debug=debug, separator=separator)
-    erasmus_df = _read_csv(erasmus_path, debug=debug, separator=separator)
-    return esn_df, erasmus_df
-
-
 def _apply_buddy_filter(df: pd.DataFrame, column: str, value: str) -> pd.DataFrame:
     if column not in df.columns:
         raise ValueError(f"Missing buddy interest column: {column}")
@@ -84,16 +76,12 @@ def _apply_timestamp_filter(
     return filtered.reset_index(drop=True)
 
 
-def load_tables(config: Dict, debug: bool | None = None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+def _input_settings(config: Dict, debug: bool | None) -> Dict:
+    """Parse and check the `input` settings shared by both table loaders."""
     input_cfg = config.get("input", {})
     schema_cfg = config.get("schema", {})
     fmt = (input_cfg.get("format") or "").lower()
-    debug_mode = is_debug_mode() if debug is None else debug
     file_path = input_cfg.get("file_path")
-    erasmus_csv = input_cfg.get("erasmus_csv")
-    esn_csv = input_cfg.get("esn_csv")
-    erasmus_sheet = input_cfg.get("erasmus_sheet")
-    esn_sheet = input_cfg.get("esn_sheet")
     buddy_column = input_cfg.get("buddy_interest_column")
     buddy_value = input_cfg.get("buddy_interest_value")
     csv_separator = input_cfg.get("csv_separator")
@@ -124,50 +112,83 @@ def load_tables(config: Dict, debug: bool | None = None) -> Tuple[pd.DataFrame,
     if fmt == "csv":
         if not base_path.exists() or not base_path.is_dir():
             raise FileNotFoundError(f"CSV directory not found: {base_path}")
-        if not erasmus_csv or not esn_csv:
+        if not input_cfg.get("erasmus_csv") or not input_cfg.get("esn_csv"):
             raise ValueError("erasmus_csv and esn_csv must be provided for CSV input")
-        esn_df, erasmus_df = _read_csv_pair(base_path, esn_csv, erasmus_csv, debug=debug_mode, separator=csv_separator)
     else:
-        workbook = base_path
-        if not workbook.exists():
-            raise FileNotFoundError(f"XLSX file not found: {workbook}")
-        if not erasmus_sheet or not esn_sheet:
+        if not base_path.exists():
+            raise FileNotFoundError(f"XLSX file not found: {base_path}")
+        if not input_cfg.get("erasmus_sheet") or not input_cfg.get("esn_sheet"):
             raise ValueError("erasmus_sheet and esn_sheet must be provided for XLSX input")
-        erasmus_df = pd.read_excel(workbook, sheet_name=erasmus_sheet)
-        esn_df = pd.read_excel(workbook, sheet_name=esn_sheet)
 
-    esn_df = _normalize_headers(esn_df)
-    erasmus_df = _normalize_headers(erasmus_df)
+    return {
+        "format": fmt,
+        "base_path": base_path,
+        "debug": is_debug_mode() if debug is None else debug,
+        "separator": csv_separator,
+        "buddy_column": _normalize_column_name(buddy_column),
+        "buddy_value": buddy_value,
+        "timestamp_min": timestamp_min,
+        "timestamp_format": timestamp_format,
+        "timestamp_column": _normalize_column_name(timestamp_column),
+    }
+
+
+def read_table(config: Dict, side: str, debug: bool | None = None) -> pd.DataFrame:
+    """Read the raw "esn" or "erasmus" table with normalized headers (no filters applied)."""
+    settings = _input_settings(config, debug)
+    input_cfg = config.get("input", {})
+    if settings["format"] == "csv":
+        df = _read_csv(
+            settings["base_path"] / input_cfg.get(f"{side}_csv"),
+            debug=settings["debug"],
+            separator=settings["separator"],
+        )
+    else:
+        df = pd.read_excel(settings["base_path"], sheet_name=input_cfg.get(f"{side}_sheet"))
+    return _normalize_headers(df)
+
 
-    buddy_column = _normalize_column_name(buddy_column)
-    timestamp_column = _normalize_column_name(timestamp_column)
+def filter_esn_table(esn_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """ESN members are not filtered; returns the table and its row counts."""
+    stats = {"esn_loaded": len(esn_df), "esn_after_filter": len(esn_df)}
+    return esn_df.reset_index(drop=True), stats
 
-    erasmus_loaded = len(erasmus_df)
-    if timestamp_min:
+
+def filter_erasmus_table(
+    erasmus_df: pd.DataFrame,
+    config: Dict
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Apply the timestamp and buddy-interest filters to a raw Erasmus table and count rows."""
+    settings = _input_settings(config, debug=False)
+    stats = {"erasmus_loaded": len(erasmus_df)}
+    if settings["timestamp_min"]:
         erasmus_df = _apply_timestamp_filter(
             erasmus_df,
-            timestamp_column,
-            timestamp_min,
-            timestamp_format=timestamp_format,
+            settings["timestamp_column"],
+            settings["timestamp_min"],
+            timestamp_format=settings["timestamp_format"],
         )
-
-    stats = {
-        "esn_loaded": len(esn_df),
-        "erasmus_loaded": erasmus_loaded,
-    }
-    if timestamp_min:
         stats["erasmus_after_timestamp_filter"] = len(erasmus_df)
 
-    erasmus_filtered = _apply_buddy_filter(erasmus_df, buddy_column, buddy_value)
+    erasmus_filtered = _apply_buddy_filter(erasmus_df, settings["buddy_column"], settings["buddy_value"])
+    stats["erasmus_after_filter"] = len(erasmus_filtered)
+    return erasmus_filtered, stats
 
-    stats.update(
-        {
-            "esn_after_filter": len(esn_df),
-            "erasmus_after_filter": len(erasmus_filtered),
-        }
-    )
 
-    return erasmus_filtered, esn_df.reset_index(drop=True), stats
+def load_esn_table(config: Dict, debug: bool | None = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Load the ESN table and its row counts."""
+    return filter_esn_table(read_table(config, "esn", debug=debug))
+
+
+def load_erasmus_table(config: Dict, debug: bool | None = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Load the Erasmus table, apply the timestamp and buddy-interest filters, and count rows."""
+    return filter_erasmus_table(read_table(config, "erasmus", debug=debug), config)
+
+
+def load_tables(config: Dict, debug: bool | None = None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+    esn_df, esn_stats = load_esn_table(config, debug=debug)
+    erasmus_df, erasmus_stats = load_erasmus_table(config, debug=debug)
+    return erasmus_df, esn_df, {**esn_stats, **erasmus_stats}
 
 
 # Allow enabling debug mode via an environment variable
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 
 import numpy as np
 
@@ -10,10 +10,21 @@ def _hamming_distance(esn_vector: np.ndarray, erasmus_vector: np.ndarray) -> flo
     return float(np.sum(esn_vector[valid_mask] != erasmus_vector[valid_mask]))
 
 
-def compute_distance_matrix(esn_vectors: np.ndarray, erasmus_vectors: np.ndarray) -> np.ndarray:
+def compute_distance_matrix(
+    esn_vectors: np.ndarray,
+    erasmus_vectors: np.ndarray,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> np.ndarray:
+    """
+    Hamming distances between every ESN and every Erasmus vector.
+
+    `progress(rows_done, rows_total)` is called after each ESN row.
+    """
     esn_count, erasmus_count = esn_vectors.shape[0], erasmus_vectors.shape[0]
     distances = np.empty((esn_count, erasmus_count), dtype=float)
     for i in range(esn_count):
         for j in range(erasmus_count):
             distances[i, j] = _hamming_distance(esn_vectors[i], erasmus_vectors[j])
+        if progress is not None:
+            progress(i + 1, esn_count)
     return distances
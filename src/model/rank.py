@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
@@ -17,7 +17,23 @@ class ESNRanking:
     candidates: List[RankedCandidate]
 
 
-def _identifier_key(df: pd.DataFrame, identifier_column: Optional[str]) -> List:
+@dataclass
+class RankedESN:
+    esn_index: int
+    distance: float
+
+
+@dataclass
+class ErasmusRanking:
+    erasmus_index: int
+    candidates: List[RankedESN]
+
+
+# Columns of the distance matrix processed at once by rank_esn_for_erasmus
+REVERSE_BLOCK_COLUMNS = 4096
+
+
+def identifier_key(df: pd.DataFrame, identifier_column: Optional[str]) -> List:
     if identifier_column and identifier_column in df.columns:
         values = df[identifier_column]
         if values.is_unique and not values.isna().any():
@@ -25,8 +41,14 @@ def _identifier_key(df: pd.DataFrame, identifier_column: Optional[str]) -> List:
     return list(range(len(df)))
 
 
-def rank_candidates(distances: np.ndarray, erasmus_df: pd.DataFrame, top_k: int, identifier_column: Optional[str]) -> List[ESNRanking]:
-    erasmus_keys = _identifier_key(erasmus_df, identifier_column)
+def rank_candidates(
+    distances: np.ndarray,
+    erasmus_df: pd.DataFrame,
+    top_k: int,
+    identifier_column: Optional[str],
+    progress: Optional[Callable[[int, int], None]] = None
+) -> List[ESNRanking]:
+    erasmus_keys = identifier_key(erasmus_df, identifier_column)
     rankings: List[ESNRanking] = []
     for esn_idx in range(distances.shape[0]):
         row_dist = distances[esn_idx]
@@ -35,4 +57,75 @@ def rank_candidates(distances: np.ndarray, erasmus_df: pd.DataFrame, top_k: int,
         selected = sortable[: min(top_k, len(sortable))]
         candidates = [RankedCandidate(erasmus_index=idx, distance=float(dist)) for dist, _key, idx in selected]
         rankings.append(ESNRanking(esn_index=esn_idx, candidates=candidates))
+        if progress is not None:
+            progress(esn_idx + 1, distances.shape[0])
+    return rankings
+
+
+def tie_break_ranks(df: pd.DataFrame, identifier_column: Optional[str]) -> np.ndarray:
+    """Position of each row when sorted by its identifier key (as used for tie-breaking)."""
+    return pd.factorize(pd.Series(identifier_key(df, identifier_column)), sort=True)[0]
+
+
+def partial_rank_row(row_dist: np.ndarray, tie_ranks: np.ndarray, size: int) -> np.ndarray:
+    """
+    Indices of the `size` best entries of one distance row, best first.
+
+    Orders like rank_candidates (distance, then identifier) but only sorts
+    the selected entries. Distances are whole numbers (Hamming counts), so
+    adding tie_rank / n (< 1) breaks ties without reordering distances.
+    """
+    n = row_dist.shape[0]
+    size = min(size, n)
+    if size <= 0:
+        return np.empty(0, dtype=int)
+    order_key = row_dist + tie_ranks / n
+    if size < n:
+        selected = np.argpartition(order_key, size - 1)[:size]
+    else:
+        selected = np.arange(n)
+    return selected[np.argsort(order_key[selected], kind="stable")]
+
+
+def rank_esn_for_erasmus(
+    distances: np.ndarray,
+    esn_df: pd.DataFrame,
+    top_k: int,
+    identifier_column: Optional[str],
+    progress: Optional[Callable[[int, int], None]] = None
+) -> List[ErasmusRanking]:
+    """
+    Reverse rankings: the top-K ESN members for every Erasmus student.
+
+    Works column-wise on blocks of the distance matrix with argpartition, then
+    sorts only the selected rows, ordering by distance and then by the ESN
+    identifier (the same rule rank_candidates uses for students).
+    `progress(students_done, students_total)` is called after each block.
+    """
+    esn_count, erasmus_count = distances.shape
+    k = min(top_k, esn_count)
+    if k <= 0:
+        return [ErasmusRanking(erasmus_index=idx, candidates=[]) for idx in range(erasmus_count)]
+
+    tie_offsets = tie_break_ranks(esn_df, identifier_column) / esn_count
+    rankings: List[ErasmusRanking] = []
+    for start in range(0, erasmus_count, REVERSE_BLOCK_COLUMNS):
+        block = distances[:, start:start + REVERSE_BLOCK_COLUMNS]
+        order_key = block + tie_offsets[:, None]
+        if k < esn_count:
+            top = np.argpartition(order_key, k - 1, axis=0)[:k]
+        else:
+            top = np.repeat(np.arange(esn_count)[:, None], block.shape[1], axis=1)
+        top = np.take_along_axis(
+            top, np.argsort(np.take_along_axis(order_key, top, axis=0), axis=0, kind="stable"), axis=0
+        )
+        top_dist = np.take_along_axis(block, top, axis=0)
+        for col in range(block.shape[1]):
+            candidates = [
+                RankedESN(esn_index=int(esn_idx), distance=float(dist))
+                for esn_idx, dist in zip(top[:, col], top_dist[:, col])
+            ]
+            rankings.append(ErasmusRanking(erasmus_index=start + col, candidates=candidates))
+        if progress is not None:
+            progress(len(rankings), erasmus_count)
     return rankings
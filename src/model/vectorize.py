@@ -33,8 +33,10 @@ def _vectorize_single(df: pd.DataFrame, question_columns: List[str]) -> np.ndarr
     return matrix
 
 
-def vectorize_tables(esn_df: pd.DataFrame, erasmus_df: pd.DataFrame, config: Dict) -> Tuple[VectorizedTable, VectorizedTable]:
+def vectorize_table(df: pd.DataFrame, config: Dict) -> VectorizedTable:
     question_columns = config.get("schema", {}).get("question_columns", [])
-    esn_vectors = _vectorize_single(esn_df, question_columns)
-    erasmus_vectors = _vectorize_single(erasmus_df, question_columns)
-    return VectorizedTable(esn_df, esn_vectors, question_columns), VectorizedTable(erasmus_df, erasmus_vectors, question_columns)
+    return VectorizedTable(df, _vectorize_single(df, question_columns), question_columns)
+
+
+def vectorize_tables(esn_df: pd.DataFrame, erasmus_df: pd.DataFrame, config: Dict) -> Tuple[VectorizedTable, VectorizedTable]:
+    return vectorize_table(esn_df, config), vectorize_table(erasmus_df, config)
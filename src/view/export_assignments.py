@@ -5,24 +5,73 @@ Separate from ranking export to maintain clean separation of concerns.
 """
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import pandas as pd
 import numpy as np
 
-from src.controller.assignments import Assignment
+from src.controller.assignments import Assignment, AssignmentEvent
+from src.view import export_table
 
 
-def export_assignments_to_csv(
+BASIC_COLUMNS = [
+    "ESN_Name",
+    "ESN_Surname",
+    "Erasmus_Name",
+    "Erasmus_Surname",
+    "Assignment_Timestamp"
+]
+
+
+def assignment_match_counts(
+    esn_vectors: np.ndarray,
+    erasmus_vectors: np.ndarray,
+    esn_indices: np.ndarray,
+    erasmus_indices: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count matching and compared answers for many assignment pairs at once.
+
+    A question is compared only when both sides have a valid (non-NaN) answer.
+
+    Returns:
+        (matching_counts, compared_counts) arrays, one entry per pair
+    """
+    esn_rows = np.asarray(esn_vectors, dtype=float)[esn_indices]
+    erasmus_rows = np.asarray(erasmus_vectors, dtype=float)[erasmus_indices]
+    width = min(esn_rows.shape[1], erasmus_rows.shape[1])
+    esn_rows = esn_rows[:, :width]
+    erasmus_rows = erasmus_rows[:, :width]
+
+    valid_mask = ~np.isnan(esn_rows) & ~np.isnan(erasmus_rows)
+    compared_counts = valid_mask.sum(axis=1)
+    matching_counts = (valid_mask & (esn_rows == erasmus_rows)).sum(axis=1)
+    return matching_counts, compared_counts
+
+
+def _context_columns(df: pd.DataFrame, positions: np.ndarray, question_cols: set, prefix: str) -> pd.DataFrame:
+    """Gather all non-question columns for the given rows, prefixed and without all-empty columns."""
+    columns = [col for col in df.columns if col not in question_cols]
+    gathered = df[columns].take(positions).reset_index(drop=True)
+    gathered.columns = [f"{prefix}{col}" for col in columns]
+    return gathered.dropna(axis=1, how="all")
+
+
+def build_assignments_frame(
     assignments: List[Assignment],
     esn_df: Optional[pd.DataFrame] = None,
     erasmus_df: Optional[pd.DataFrame] = None,
     question_columns: Optional[List[str]] = None,
     esn_vectors: Optional[np.ndarray] = None,
     erasmus_vectors: Optional[np.ndarray] = None
-) -> bytes:
+) -> pd.DataFrame:
     """
-    Export assignments to CSV format with all columns except question columns.
+    Build the assignment export table shared by all output formats.
+
+    With dataframes, every non-question ESN/Erasmus column is included
+    (prefixed with ESN_/Erasmus_); with vectors, Matching_Answers and
+    Compared_Questions are added. Without dataframes only the names stored
+    on the assignments are exported.
 
     Args:
         assignments: List of Assignment objects
@@ -33,88 +82,61 @@ def export_assignments_to_csv(
         erasmus_vectors: Erasmus vectors for matching count (optional)
 
     Returns:
-        CSV data as bytes
+        One row per assignment
     """
     if not assignments:
-        # Return empty CSV with headers
-        df = pd.DataFrame(columns=[
-            "ESN_Name",
-            "ESN_Surname",
-            "Erasmus_Name",
-            "Erasmus_Surname",
-            "Assignment_Timestamp"
-        ])
-        return df.to_csv(index=False).encode('utf-8')
-
-    # If no dataframes provided, use basic export
+        return pd.DataFrame(columns=BASIC_COLUMNS)
+
+    timestamps = [assignment.timestamp for assignment in assignments]
+
     if esn_df is None or erasmus_df is None:
-        rows = []
-        for assignment in assignments:
-            rows.append({
-                "ESN_Name": assignment.esn_name,
-                "ESN_Surname": assignment.esn_surname,
-                "Erasmus_Name": assignment.erasmus_name,
-                "Erasmus_Surname": assignment.erasmus_surname,
-                "Assignment_Timestamp": assignment.timestamp
-            })
-        df = pd.DataFrame(rows)
-        return df.to_csv(index=False).encode('utf-8')
-
-    # Universal export with all columns
+        return pd.DataFrame({
+            "ESN_Name": [assignment.esn_name for assignment in assignments],
+            "ESN_Surname": [assignment.esn_surname for assignment in assignments],
+            "Erasmus_Name": [assignment.erasmus_name for assignment in assignments],
+            "Erasmus_Surname": [assignment.erasmus_surname for assignment in assignments],
+            "Assignment_Timestamp": timestamps,
+        })
+
     question_cols = set(question_columns) if question_columns else set()
-    rows = []
-
-    for assignment in assignments:
-        esn_row = esn_df.iloc[assignment.esn_index]
-        erasmus_row = erasmus_df.iloc[assignment.erasmus_index]
-
-        row = {}
-
-        # Add ESN columns - ALL columns except questions
-        for col in esn_df.columns:
-            if col not in question_cols:
-                col_name = f"ESN_{col}"
-                value = esn_row[col]
-                if pd.notna(value):
-                    row[col_name] = value
-
-        # Add Erasmus columns - ALL columns except questions
-        for col in erasmus_df.columns:
-            if col not in question_cols:
-                col_name = f"Erasmus_{col}"
-                value = erasmus_row[col]
-                if pd.notna(value):
-                    row[col_name] = value
-
-        # Add matching answers count if vectors available
-        if esn_vectors is not None and erasmus_vectors is not None:
-            esn_vec = esn_vectors[assignment.esn_index]
-            erasmus_vec = erasmus_vectors[assignment.erasmus_index]
-
-            matching_count = 0
-            compared_count = 0
-
-            for i in range(min(len(esn_vec), len(erasmus_vec))):
-                esn_val = esn_vec[i]
-                erasmus_val = erasmus_vec[i]
-
-                # Check if both values are valid (not None and not NaN)
-                if esn_val is not None and erasmus_val is not None:
-                    esn_is_nan = isinstance(esn_val, float) and np.isnan(esn_val)
-                    erasmus_is_nan = isinstance(erasmus_val, float) and np.isnan(erasmus_val)
-
-                    if not esn_is_nan and not erasmus_is_nan:
-                        compared_count += 1
-                        if esn_val == erasmus_val:
-                            matching_count += 1
-
-            row["Matching_Answers"] = matching_count
-            row["Compared_Questions"] = compared_count
-
-        row["Assignment_Timestamp"] = assignment.timestamp
-        rows.append(row)
-
-    df = pd.DataFrame(rows)
+    esn_indices = np.fromiter((a.esn_index for a in assignments), dtype=int, count=len(assignments))
+    erasmus_indices = np.fromiter((a.erasmus_index for a in assignments), dtype=int, count=len(assignments))
+
+    frame = pd.concat([
+        _context_columns(esn_df, esn_indices, question_cols, "ESN_"),
+        _context_columns(erasmus_df, erasmus_indices, question_cols, "Erasmus_"),
+    ], axis=1)
+
+    if esn_vectors is not None and erasmus_vectors is not None:
+        matching_counts, compared_counts = assignment_match_counts(
+            esn_vectors, erasmus_vectors, esn_indices, erasmus_indices
+        )
+        frame["Matching_Answers"] = matching_counts
+        frame["Compared_Questions"] = compared_counts
+
+    frame["Assignment_Timestamp"] = timestamps
+    return frame
+
+
+def export_assignments_to_csv(
+    assignments: List[Assignment],
+    esn_df: Optional[pd.DataFrame] = None,
+    erasmus_df: Optional[pd.DataFrame] = None,
+    question_columns: Optional[List[str]] = None,
+    esn_vectors: Optional[np.ndarray] = None,
+    erasmus_vectors: Optional[np.ndarray] = None
+) -> bytes:
+    """
+    Export assignments to CSV format with all columns except question columns.
+
+    See build_assignments_frame for the arguments.
+
+    Returns:
+        CSV data as bytes
+    """
+    df = build_assignments_frame(
+        assignments, esn_df, erasmus_df, question_columns, esn_vectors, erasmus_vectors
+    )
     return df.to_csv(index=False).encode('utf-8')
 
 
@@ -130,95 +152,17 @@ def export_assignments_to_xlsx(
     """
     Export assignments to Excel format with all columns except question columns.
 
+    See build_assignments_frame for the remaining arguments.
+
     Args:
-        assignments: List of Assignment objects
         output_path: Path where to save the Excel file
-        esn_df: ESN dataframe (optional, for full export)
-        erasmus_df: Erasmus dataframe (optional, for full export)
-        question_columns: List of question column names to exclude (optional)
-        esn_vectors: ESN vectors for matching count (optional)
-        erasmus_vectors: Erasmus vectors for matching count (optional)
 
     Returns:
         Path to the created file
     """
-    if not assignments:
-        # Create empty dataframe with headers
-        df = pd.DataFrame(columns=[
-            "ESN_Name",
-            "ESN_Surname",
-            "Erasmus_Name",
-            "Erasmus_Surname",
-            "Assignment_Timestamp"
-        ])
-    elif esn_df is None or erasmus_df is None:
-        # Basic export without extra columns
-        rows = []
-        for assignment in assignments:
-            rows.append({
-                "ESN_Name": assignment.esn_name,
-                "ESN_Surname": assignment.esn_surname,
-                "Erasmus_Name": assignment.erasmus_name,
-                "Erasmus_Surname": assignment.erasmus_surname,
-                "Assignment_Timestamp": assignment.timestamp
-            })
-        df = pd.DataFrame(rows)
-    else:
-        # Universal export with all columns
-        question_cols = set(question_columns) if question_columns else set()
-        rows = []
-
-        for assignment in assignments:
-            esn_row = esn_df.iloc[assignment.esn_index]
-            erasmus_row = erasmus_df.iloc[assignment.erasmus_index]
-
-            row = {}
-
-            # Add ESN columns - ALL columns except questions
-            for col in esn_df.columns:
-                if col not in question_cols:
-                    col_name = f"ESN_{col}"
-                    value = esn_row[col]
-                    if pd.notna(value):
-                        row[col_name] = value
-
-            # Add Erasmus columns - ALL columns except questions
-            for col in erasmus_df.columns:
-                if col not in question_cols:
-                    col_name = f"Erasmus_{col}"
-                    value = erasmus_row[col]
-                    if pd.notna(value):
-                        row[col_name] = value
-
-            # Add matching answers count if vectors available
-            if esn_vectors is not None and erasmus_vectors is not None:
-                esn_vec = esn_vectors[assignment.esn_index]
-                erasmus_vec = erasmus_vectors[assignment.erasmus_index]
-
-                matching_count = 0
-                compared_count = 0
-
-                for i in range(min(len(esn_vec), len(erasmus_vec))):
-                    esn_val = esn_vec[i]
-                    erasmus_val = erasmus_vec[i]
-
-                    # Check if both values are valid (not None and not NaN)
-                    if esn_val is not None and erasmus_val is not None:
-                        esn_is_nan = isinstance(esn_val, float) and np.isnan(esn_val)
-                        erasmus_is_nan = isinstance(erasmus_val, float) and np.isnan(erasmus_val)
-
-                        if not esn_is_nan and not erasmus_is_nan:
-                            compared_count += 1
-                            if esn_val == erasmus_val:
-                                matching_count += 1
-
-                row["Matching_Answers"] = matching_count
-                row["Compared_Questions"] = compared_count
-
-            row["Assignment_Timestamp"] = assignment.timestamp
-            rows.append(row)
-
-        df = pd.DataFrame(rows)
+    df = build_assignments_frame(
+        assignments, esn_df, erasmus_df, question_columns, esn_vectors, erasmus_vectors
+    )
 
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -230,6 +174,68 @@ def export_assignments_to_xlsx(
     return output_path
 
 
+def export_assignments_to_parquet(
+    assignments: List[Assignment],
+    output_path: Path,
+    esn_df: Optional[pd.DataFrame] = None,
+    erasmus_df: Optional[pd.DataFrame] = None,
+    question_columns: Optional[List[str]] = None,
+    esn_vectors: Optional[np.ndarray] = None,
+    erasmus_vectors: Optional[np.ndarray] = None
+) -> Path:
+    """
+    Export assignments to Parquet (requires pyarrow).
+
+    See build_assignments_frame for the remaining arguments.
+
+    Args:
+        output_path: Path where to save the Parquet file
+
+    Returns:
+        Path to the created file
+    """
+    df = build_assignments_frame(
+        assignments, esn_df, erasmus_df, question_columns, esn_vectors, erasmus_vectors
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    return export_table.write_results_table(df, output_path, "parquet")
+
+
+def build_assignment_log_frame(events: List[AssignmentEvent]) -> pd.DataFrame:
+    """
+    Flatten the assignment event log into an audit table.
+
+    One row per (event, assignment); a "clear" lists every assignment it
+    removed. Undo and redo show up as their effective change with the Note
+    column set to "undo" / "redo".
+    """
+    rows = [
+        {
+            "Seq": event.seq,
+            "Event Time": event.timestamp,
+            "Action": event.action,
+            "Note": event.note,
+            "ESN Index": assignment.esn_index,
+            "ESN Name": f"{assignment.esn_name} {assignment.esn_surname}".strip(),
+            "Erasmus Index": assignment.erasmus_index,
+            "Erasmus Name": f"{assignment.erasmus_name} {assignment.erasmus_surname}".strip(),
+            "Assigned At": assignment.timestamp,
+        }
+        for event in events
+        for assignment in event.assignments
+    ]
+    columns = [
+        "Seq", "Event Time", "Action", "Note", "ESN Index", "ESN Name",
+        "Erasmus Index", "Erasmus Name", "Assigned At",
+    ]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def export_assignment_log_to_csv(events: List[AssignmentEvent]) -> bytes:
+    """Export the assignment event log as an audit CSV (see build_assignment_log_frame)."""
+    return build_assignment_log_frame(events).to_csv(index=False).encode('utf-8')
+
+
 def generate_assignment_filename(prefix: str = "assignments") -> str:
     """
     Generate a timestamped filename for assignment export.
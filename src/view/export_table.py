@@ -0,0 +1,206 @@
+"""
+Long-format (one row per ESN member / candidate pair) export of ranking results.
+
+The table is built once and can be written to any of the columnar formats
+supported by pandas (Parquet, Feather) or to plain CSV. The reverse rankings
+(top ESN members per Erasmus student) have a table of their own.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.model.rank import ErasmusRanking, ESNRanking
+
+TABLE_FORMATS = ("parquet", "feather", "csv")
+
+STAT_COLUMNS = [
+    "esn_index",
+    "rank",
+    "erasmus_index",
+    "distance",
+    "compared",
+    "same",
+    "different",
+    "esn_name",
+    "esn_surname",
+]
+
+
+def comparison_counts(
+    esn_rows: np.ndarray,
+    erasmus_rows: np.ndarray,
+    distances: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Compute NaN-aware compared/same/different counts for stacked vector pairs.
+
+    Args:
+        esn_rows: ESN vectors, one row per pair
+        erasmus_rows: Erasmus vectors, one row per pair
+        distances: Hamming distance of each pair
+
+    Returns:
+        Dict with "compared", "same" and "different" integer arrays
+    """
+    valid_mask = ~np.isnan(esn_rows) & ~np.isnan(erasmus_rows)
+    compared = valid_mask.sum(axis=1).astype(int)
+    different = np.minimum(np.asarray(distances).astype(int), compared)
+    same = np.maximum(compared - different, 0)
+    return {"compared": compared, "same": same, "different": different}
+
+
+def build_results_table(
+    rankings: List[ESNRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    question_cols: List[str],
+    esn_vectors: Optional[np.ndarray] = None,
+    erasmus_vectors: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Build the long-format results table.
+
+    Columns: esn_index, rank, erasmus_index, distance, compared, same,
+    different, esn_name, esn_surname, followed by all non-question Erasmus
+    fields for context.
+
+    Args:
+        rankings: List of ESNRanking objects
+        esn_df: ESN dataframe
+        erasmus_df: Erasmus dataframe
+        question_cols: Question columns (excluded from context fields)
+        esn_vectors: Optional ESN vectors for NaN-aware comparison stats
+        erasmus_vectors: Optional Erasmus vectors for NaN-aware comparison stats
+    """
+    pairs = [
+        (ranking.esn_index, rank_num, candidate.erasmus_index, candidate.distance)
+        for ranking in rankings
+        for rank_num, candidate in enumerate(ranking.candidates, start=1)
+    ]
+    esn_idx = np.array([p[0] for p in pairs], dtype=int)
+    ranks = np.array([p[1] for p in pairs], dtype=int)
+    erasmus_idx = np.array([p[2] for p in pairs], dtype=int)
+    distances = np.array([p[3] for p in pairs], dtype=float)
+
+    if esn_vectors is not None and erasmus_vectors is not None:
+        counts = comparison_counts(esn_vectors[esn_idx], erasmus_vectors[erasmus_idx], distances)
+    else:
+        # Without vectors every question counts as compared (legacy behaviour)
+        compared = np.full(len(pairs), len(question_cols), dtype=int)
+        different = distances.astype(int)
+        counts = {"compared": compared, "same": np.maximum(compared - different, 0), "different": different}
+
+    table = pd.DataFrame({
+        "esn_index": esn_idx,
+        "rank": ranks,
+        "erasmus_index": erasmus_idx,
+        "distance": distances,
+        "compared": counts["compared"],
+        "same": counts["same"],
+        "different": counts["different"],
+        "esn_name": _column_values(esn_df, "Name", esn_idx),
+        "esn_surname": _column_values(esn_df, "Surname", esn_idx),
+    })
+
+    question_set = set(question_cols)
+    context_cols = [col for col in erasmus_df.columns if col not in question_set and col not in STAT_COLUMNS]
+    context = erasmus_df[context_cols].take(erasmus_idx).reset_index(drop=True)
+    return pd.concat([table, context], axis=1)
+
+
+REVERSE_COLUMNS = [
+    "erasmus_index",
+    "rank",
+    "esn_index",
+    "distance",
+    "compared",
+    "same",
+    "different",
+    "erasmus_name",
+    "erasmus_surname",
+    "esn_name",
+    "esn_surname",
+]
+
+
+def build_reverse_table(
+    reverse_rankings: List[ErasmusRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    question_cols: List[str],
+    esn_vectors: Optional[np.ndarray] = None,
+    erasmus_vectors: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Build the long-format table of reverse rankings.
+
+    One row per (Erasmus student, ESN candidate) pair with the columns in
+    REVERSE_COLUMNS; the arguments are as for build_results_table.
+    """
+    erasmus_idx = np.array(
+        [ranking.erasmus_index for ranking in reverse_rankings for _ in ranking.candidates], dtype=int
+    )
+    ranks = np.array(
+        [rank_num for ranking in reverse_rankings for rank_num in range(1, len(ranking.candidates) + 1)],
+        dtype=int
+    )
+    esn_idx = np.array([c.esn_index for ranking in reverse_rankings for c in ranking.candidates], dtype=int)
+    distances = np.array([c.distance for ranking in reverse_rankings for c in ranking.candidates], dtype=float)
+
+    if esn_vectors is not None and erasmus_vectors is not None:
+        counts = comparison_counts(esn_vectors[esn_idx], erasmus_vectors[erasmus_idx], distances)
+    else:
+        compared = np.full(len(esn_idx), len(question_cols), dtype=int)
+        different = distances.astype(int)
+        counts = {"compared": compared, "same": np.maximum(compared - different, 0), "different": different}
+
+    return pd.DataFrame({
+        "erasmus_index": erasmus_idx,
+        "rank": ranks,
+        "esn_index": esn_idx,
+        "distance": distances,
+        "compared": counts["compared"],
+        "same": counts["same"],
+        "different": counts["different"],
+        "erasmus_name": _column_values(erasmus_df, "Name", erasmus_idx),
+        "erasmus_surname": _column_values(erasmus_df, "Surname", erasmus_idx),
+        "esn_name": _column_values(esn_df, "Name", esn_idx),
+        "esn_surname": _column_values(esn_df, "Surname", esn_idx),
+    }, columns=REVERSE_COLUMNS)
+
+
+def _column_values(df: pd.DataFrame, column: str, positions: np.ndarray) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(positions), "", dtype=object)
+    return df[column].to_numpy()[positions]
+
+
+def arrow_safe(table: pd.DataFrame) -> pd.DataFrame:
+    """Cast mixed-type object columns to strings so Arrow can serialize them."""
+    object_cols = [col for col in table.columns if table[col].dtype == object]
+    if not object_cols:
+        return table
+    table = table.copy()
+    for col in object_cols:
+        table[col] = table[col].astype("string")
+    return table
+
+
+def write_results_table(table: pd.DataFrame, out_path: Path, fmt: str) -> Path:
+    """
+    Write a long-format results table in the given format.
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if fmt == "parquet":
+        arrow_safe(table).to_parquet(out_path, index=False)
+    elif fmt == "feather":
+        arrow_safe(table).to_feather(out_path)
+    elif fmt == "csv":
+        table.to_csv(out_path, index=False, encoding="utf-8")
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    return out_path
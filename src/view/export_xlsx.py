@@ -1,11 +1,35 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
 
-from src.model.rank import ESNRanking
+from src.model.rank import ErasmusRanking, ESNRanking
+from src.view import export_table
+
+
+# Shared context sheet of the compact layout
+STUDENTS_SHEET = "Students"
+REVERSE_SHEET = "Buddies per Student"
+
+# Workbook headers of the reverse-rankings sheet
+_REVERSE_HEADERS = {
+    "erasmus_index": "Erasmus ID",
+    "erasmus_name": "Student Name",
+    "erasmus_surname": "Student Surname",
+    "rank": "Rank",
+    "esn_name": "ESN Name",
+    "esn_surname": "ESN Surname",
+    "compared": "Compared questions",
+    "same": "Number of same answers",
+    "different": "Number of different answers",
+}
+
+# Called as progress(steps_done, steps_total) while outputs are being written
+ProgressCallback = Callable[[int, int], None]
 
 
 def _safe_sheet_name(name: str) -> str:
@@ -13,7 +37,8 @@ def _safe_sheet_name(name: str) -> str:
     return safe[:31] if safe else "Sheet"
 
 
-def _build_summary(stats: Dict, config: Dict, esn_count: int, erasmus_count: int) -> pd.DataFrame:
+def build_summary(stats: Dict, config: Dict, esn_count: int, erasmus_count: int) -> pd.DataFrame:
+    """Build the run Summary table."""
     schema_cfg = config.get("schema", {})
     matching_cfg = config.get("matching", {})
     question_cols = schema_cfg.get("question_columns", [])
@@ -103,6 +128,123 @@ def _candidate_rows(
     return pd.DataFrame(rows)
 
 
+def esn_sheet_name(esn_df: pd.DataFrame, esn_index: int) -> str:
+    """Excel-safe sheet name ("Name Surname") for one ESN member."""
+    esn_row = esn_df.iloc[esn_index]
+    return _safe_sheet_name(f"{esn_row.get('Name', '')} {esn_row.get('Surname', '')}") or "ESN"
+
+
+def build_candidate_sheet(
+    ranking: ESNRanking,
+    erasmus_df: pd.DataFrame,
+    question_cols: List[str],
+    esn_vectors: np.ndarray = None,
+    erasmus_vectors: np.ndarray = None
+) -> pd.DataFrame:
+    """
+    Build the candidate table of one ESN member.
+
+    Uses accurate NaN-aware stats when vectors are available and falls back
+    to the legacy counts otherwise.
+    """
+    if esn_vectors is not None and erasmus_vectors is not None:
+        return _candidate_rows(
+            ranking, erasmus_df, question_cols, esn_vectors[ranking.esn_index], erasmus_vectors
+        )
+    # Fallback to old behavior (for backwards compatibility)
+    return _candidate_rows_legacy(ranking, erasmus_df, question_cols)
+
+
+def build_compact_candidate_sheet(
+    ranking: ESNRanking,
+    erasmus_df: pd.DataFrame,
+    question_cols: List[str],
+    esn_vectors: np.ndarray = None,
+    erasmus_vectors: np.ndarray = None
+) -> pd.DataFrame:
+    """
+    Build the candidate table of one ESN member for the compact layout.
+
+    Only rank, Erasmus ID, name, contact and comparison stats are kept; the
+    remaining context fields live once in the shared Students sheet.
+    """
+    contact_col = _find_contact_column(list(erasmus_df.columns))
+    contact_header = contact_col or "Whatsapp contact"
+    indices = np.array([c.erasmus_index for c in ranking.candidates], dtype=int)
+    distances = np.array([c.distance for c in ranking.candidates], dtype=float)
+
+    if esn_vectors is not None and erasmus_vectors is not None:
+        esn_rows = np.repeat(esn_vectors[ranking.esn_index][np.newaxis, :], len(indices), axis=0)
+        counts = export_table.comparison_counts(esn_rows, erasmus_vectors[indices], distances)
+    else:
+        different = distances.astype(int)
+        compared = np.full(len(indices), len(question_cols), dtype=int)
+        counts = {"compared": compared, "same": np.maximum(compared - different, 0), "different": different}
+
+    students = erasmus_df.take(indices)
+
+    def column(name: str):
+        return students[name].to_numpy() if name in erasmus_df.columns else [""] * len(indices)
+
+    return pd.DataFrame({
+        "Rank": np.arange(1, len(indices) + 1),
+        "Erasmus ID": indices,
+        "Student Name": column("Name"),
+        "Student Surname": column("Surname"),
+        contact_header: column(contact_col) if contact_col else [""] * len(indices),
+        "Compared questions": counts["compared"],
+        "Number of same answers": counts["same"],
+        "Number of different answers": counts["different"],
+    })
+
+
+def build_students_sheet(
+    rankings: List[ESNRanking],
+    erasmus_df: pd.DataFrame,
+    question_cols: List[str]
+) -> pd.DataFrame:
+    """
+    Build the shared Students sheet of the compact layout.
+
+    One row per Erasmus student appearing in any ranking, keyed by Erasmus ID,
+    with all non-question fields.
+    """
+    referenced = sorted({c.erasmus_index for ranking in rankings for c in ranking.candidates})
+    question_set = set(question_cols)
+    context_cols = [col for col in erasmus_df.columns if col not in question_set]
+    students = erasmus_df[context_cols].take(referenced).reset_index(drop=True)
+    students.insert(0, "Erasmus ID", referenced)
+    return students
+
+
+def _output_formats(output_cfg: Dict) -> List[str]:
+    """Return the configured output formats, defaulting to the XLSX workbook."""
+    formats = output_cfg.get("formats") or ["xlsx"]
+    if isinstance(formats, str):
+        formats = [formats]
+    normalized = []
+    for fmt in formats:
+        fmt = str(fmt).strip().lower()
+        if fmt != "xlsx" and fmt not in export_table.TABLE_FORMATS:
+            raise ValueError(f"Unsupported output format: {fmt}")
+        if fmt not in normalized:
+            normalized.append(fmt)
+    return normalized
+
+
+def primary_output_path(out_paths: Dict[str, Path], output_cfg: Dict) -> Path:
+    """
+    Return the main file of an export: the workbook when written, else the first configured table.
+
+    Does not rely on the order of `out_paths`, which is lost when it is read
+    back from the export cache index.
+    """
+    for fmt in ["xlsx"] + _output_formats(output_cfg):
+        if fmt in out_paths:
+            return out_paths[fmt]
+    return next(iter(out_paths.values()))
+
+
 def export_results(
     rankings: List[ESNRanking],
     esn_df: pd.DataFrame,
@@ -115,6 +257,9 @@ def export_results(
     """
     Export matching results to Excel workbook.
 
+    Additional long-format tables are written next to the workbook when
+    `output.formats` lists `parquet`, `feather` or `csv`.
+
     Args:
         rankings: List of ESNRanking objects
         esn_df: ESN dataframe
@@ -125,39 +270,168 @@ def export_results(
         erasmus_vectors: Optional Erasmus vectors for accurate comparison stats
 
     Returns:
-        Path to the generated Excel file
+        Path to the generated Excel file (or the first table if XLSX is not selected)
+    """
+    out_paths = export_result_files(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=esn_vectors,
+        erasmus_vectors=erasmus_vectors
+    )
+    return primary_output_path(out_paths, config.get("output", {}))
+
+
+def export_result_files(
+    rankings: List[ESNRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    stats: Dict,
+    config: Dict,
+    esn_vectors: np.ndarray = None,
+    erasmus_vectors: np.ndarray = None,
+    file_suffix: str = "",
+    progress: Optional[ProgressCallback] = None,
+    reverse_rankings: Optional[List[ErasmusRanking]] = None
+) -> Dict[str, Path]:
+    """
+    Export matching results in every format listed in `output.formats`.
+
+    The long-format table is built once and shared by all table formats.
+    Reverse rankings, when given, become a REVERSE_SHEET sheet in the workbook
+    and a separate `<stem>_by_student.<fmt>` file per table format (keyed
+    "<fmt>_by_student").
+    `file_suffix` is appended to the timestamped file stem (e.g. a run fingerprint).
+    Table files are written on a worker thread while the workbook is being
+    written. `progress` is called on the calling thread after every written
+    sheet/file; an exception raised from it aborts the export and removes the
+    partially written files.
+
+    Returns:
+        Mapping of format name to written path, XLSX first when selected
     """
     output_cfg = config.get("output", {})
+    formats = _output_formats(output_cfg)
     out_dir = Path(output_cfg.get("out_dir", "outputs"))
     out_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    out_path = out_dir / f"matching_{timestamp}.xlsx"
+    stem = f"matching_{timestamp}{file_suffix}"
+    question_cols = config.get("schema", {}).get("question_columns", [])
+
+    table_formats = [fmt for fmt in formats if fmt in export_table.TABLE_FORMATS]
+    sheet_count = len(rankings) if output_cfg.get("per_esner_sheets", True) else 0
+    total_steps = (sheet_count + 1 if "xlsx" in formats else 0) + len(table_formats)
+    reverse_table = None
+    if reverse_rankings:
+        reverse_table = export_table.build_reverse_table(
+            reverse_rankings, esn_df, erasmus_df, question_cols,
+            esn_vectors=esn_vectors,
+            erasmus_vectors=erasmus_vectors
+        )
+        total_steps += len(table_formats)
+    steps_done = 0
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def step() -> None:
+        nonlocal steps_done
+        with lock:
+            steps_done += 1
+            done = steps_done
+        if progress is not None and threading.current_thread() is caller:
+            progress(done, total_steps)
+
+    def write_tables() -> None:
+        table = export_table.build_results_table(
+            rankings, esn_df, erasmus_df, question_cols,
+            esn_vectors=esn_vectors,
+            erasmus_vectors=erasmus_vectors
+        )
+        for fmt in table_formats:
+            outputs = [(fmt, table, f"{stem}.{fmt}")]
+            if reverse_table is not None:
+                outputs.append((f"{fmt}_by_student", reverse_table, f"{stem}_by_student.{fmt}"))
+            for key, frame, name in outputs:
+                if stop.is_set():
+                    return
+                with lock:
+                    out_paths[key] = out_dir / name
+                export_table.write_results_table(frame, out_paths[key], fmt)
+                step()
+
+    caller = threading.current_thread()
+    out_paths: Dict[str, Path] = {}
+    try:
+        if "xlsx" in formats:
+            out_paths["xlsx"] = out_dir / f"{stem}.xlsx"
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="export") as pool:
+                # Table files do not depend on the workbook: write them alongside it
+                tables = pool.submit(write_tables) if table_formats else None
+                try:
+                    _write_workbook(
+                        out_paths["xlsx"], rankings, esn_df, erasmus_df, stats, config,
+                        esn_vectors, erasmus_vectors, on_sheet=step, reverse_table=reverse_table
+                    )
+                    step()
+                    while tables is not None and not tables.done():
+                        wait([tables], timeout=0.1)
+                        if progress is not None:
+                            progress(steps_done, total_steps)
+                finally:
+                    stop.set()
+                if tables is not None:
+                    tables.result()
+                    if progress is not None:
+                        progress(steps_done, total_steps)
+        elif table_formats:
+            write_tables()
+    except BaseException:
+        # Never leave half-written outputs behind (failure or cancellation)
+        for path in list(out_paths.values()):
+            path.unlink(missing_ok=True)
+        raise
+
+    return out_paths
+
+
+def _write_workbook(
+    out_path: Path,
+    rankings: List[ESNRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    stats: Dict,
+    config: Dict,
+    esn_vectors: np.ndarray = None,
+    erasmus_vectors: np.ndarray = None,
+    on_sheet: Optional[Callable[[], None]] = None,
+    reverse_table: Optional[pd.DataFrame] = None
+) -> Path:
+    output_cfg = config.get("output", {})
 
     with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-        summary_df = _build_summary(stats, config, len(esn_df), len(erasmus_df))
+        summary_df = build_summary(stats, config, len(esn_df), len(erasmus_df))
         summary_df.to_excel(writer, sheet_name="Summary", index=False)
 
+        if reverse_table is not None:
+            reverse_sheet = reverse_table[list(_REVERSE_HEADERS)].rename(columns=_REVERSE_HEADERS)
+            reverse_sheet.to_excel(writer, sheet_name=REVERSE_SHEET, index=False)
+
         if output_cfg.get("per_esner_sheets", True):
             schema_cfg = config.get("schema", {})
             question_cols = schema_cfg.get("question_columns", [])
+            compact = output_cfg.get("layout", "full") == "compact"
+            build_sheet = build_compact_candidate_sheet if compact else build_candidate_sheet
 
-            for ranking in rankings:
-                esn_row = esn_df.iloc[ranking.esn_index]
-                sheet_name = _safe_sheet_name(f"{esn_row.get('Name', '')} {esn_row.get('Surname', '')}")
-
-                # Get ESN vector if available
-                esn_vector = esn_vectors[ranking.esn_index] if esn_vectors is not None else None
-
-                # Build candidate rows with accurate stats if vectors available
-                if esn_vector is not None and erasmus_vectors is not None:
-                    candidates_df = _candidate_rows(
-                        ranking, erasmus_df, question_cols, esn_vector, erasmus_vectors
-                    )
-                else:
-                    # Fallback to old behavior (for backwards compatibility)
-                    candidates_df = _candidate_rows_legacy(ranking, erasmus_df, question_cols)
+            if compact:
+                students_df = build_students_sheet(rankings, erasmus_df, question_cols)
+                students_df.to_excel(writer, sheet_name=STUDENTS_SHEET, index=False)
 
-                candidates_df.to_excel(writer, sheet_name=sheet_name or "ESN", index=False)
+            for ranking in rankings:
+                sheet_name = esn_sheet_name(esn_df, ranking.esn_index)
+                candidates_df = build_sheet(
+                    ranking, erasmus_df, question_cols, esn_vectors, erasmus_vectors
+                )
+                candidates_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                if on_sheet is not None:
+                    on_sheet()
 
     return out_path
 
@@ -0,0 +1,93 @@
+"""
+ZIP bundle export: one CSV file per ESN member plus a Summary CSV.
+
+The archive is written incrementally, one member at a time, into a spooled
+temporary file that stays in memory for small bundles and rolls over to disk
+for large ones, so the full set of sheets is never held in memory at once.
+"""
+import io
+import tempfile
+import zipfile
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.model.rank import ESNRanking
+from src.view import export_xlsx
+
+# Bundles up to this size stay in memory; larger ones spill to a temp file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _write_csv_member(archive: zipfile.ZipFile, name: str, df: pd.DataFrame) -> None:
+    with archive.open(name, "w") as member:
+        with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+            df.to_csv(text, index=False)
+
+
+def _unique_name(base: str, used: Dict[str, int]) -> str:
+    count = used.get(base, 0)
+    used[base] = count + 1
+    return f"{base}.csv" if count == 0 else f"{base}_{count + 1}.csv"
+
+
+def stream_per_esn_csv_zip(
+    rankings: List[ESNRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    stats: Dict,
+    config: Dict,
+    esn_vectors: np.ndarray = None,
+    erasmus_vectors: np.ndarray = None
+) -> tempfile.SpooledTemporaryFile:
+    """
+    Write a ZIP of per-ESN-member CSV files into a spooled temporary file.
+
+    Args:
+        rankings: List of ESNRanking objects
+        esn_df: ESN dataframe
+        erasmus_df: Erasmus dataframe
+        stats: Statistics dictionary
+        config: Configuration dictionary
+        esn_vectors: Optional ESN vectors for accurate comparison stats
+        erasmus_vectors: Optional Erasmus vectors for accurate comparison stats
+
+    Returns:
+        The spooled file, rewound to the start; the caller closes it
+    """
+    question_cols = config.get("schema", {}).get("question_columns", [])
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    used_names: Dict[str, int] = {"Summary": 1}
+
+    with zipfile.ZipFile(spool, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        summary_df = export_xlsx.build_summary(stats, config, len(esn_df), len(erasmus_df))
+        _write_csv_member(archive, "Summary.csv", summary_df)
+
+        for ranking in rankings:
+            name = _unique_name(export_xlsx.esn_sheet_name(esn_df, ranking.esn_index), used_names)
+            candidates_df = export_xlsx.build_candidate_sheet(
+                ranking, erasmus_df, question_cols, esn_vectors, erasmus_vectors
+            )
+            _write_csv_member(archive, name, candidates_df)
+
+    spool.seek(0)
+    return spool
+
+
+def per_esn_csv_zip_bytes(
+    rankings: List[ESNRanking],
+    esn_df: pd.DataFrame,
+    erasmus_df: pd.DataFrame,
+    stats: Dict,
+    config: Dict,
+    esn_vectors: np.ndarray = None,
+    erasmus_vectors: np.ndarray = None
+) -> bytes:
+    """Build the per-ESN CSV bundle and return the archive contents."""
+    with stream_per_esn_csv_zip(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=esn_vectors,
+        erasmus_vectors=erasmus_vectors
+    ) as spool:
+        return spool.read()
@@ -9,6 +9,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 import yaml
@@ -21,12 +22,42 @@ if str(project_root) not in sys.path:
 # Try absolute imports first (when run as module), fall back to relative
 try:
     from src.view.gui import components, state
-    from src.controller.pipeline import PipelineArtifacts, compute_comparison_stats, run_pipeline_from_config
+    from src.controller import artifact_bundle
+    from src.controller.pipeline import (
+        PipelineArtifacts,
+        compute_comparison_stats,
+        run_pipeline_from_config,
+    )
+    from src.view.export_assignments import assignment_match_counts, export_assignment_log_to_csv
+    from src.view.export_zip import per_esn_csv_zip_bytes
+    from src.controller.export_jobs import start_export_job
+    from src.controller.live_rankings import LiveRankings
+    from src.controller.assignment_analytics import AssignmentAnalytics
+    from src.controller.instrumentation import metrics_frame
+    from src.controller.progress import STAGE_LABELS, ProgressTracker, progress_line
+    from src.controller.assignments import AssignmentConflictError, accept_top_candidates, assign_remaining
+    from src.controller.assignment_store import default_db_path, open_assignment_state
+    from src.model.assign import MAX_CAPACITY, capacities_from_column
 except ModuleNotFoundError:
     # If running standalone, use relative imports
     import components
     import state
-    from ...controller.pipeline import PipelineArtifacts, compute_comparison_stats, run_pipeline_from_config
+    from ...controller import artifact_bundle
+    from ...controller.pipeline import (
+        PipelineArtifacts,
+        compute_comparison_stats,
+        run_pipeline_from_config,
+    )
+    from ..export_assignments import assignment_match_counts, export_assignment_log_to_csv
+    from ..export_zip import per_esn_csv_zip_bytes
+    from ...controller.export_jobs import start_export_job
+    from ...controller.live_rankings import LiveRankings
+    from ...controller.assignment_analytics import AssignmentAnalytics
+    from ...controller.instrumentation import metrics_frame
+    from ...controller.progress import STAGE_LABELS, ProgressTracker, progress_line
+    from ...controller.assignments import AssignmentConflictError, accept_top_candidates, assign_remaining
+    from ...controller.assignment_store import default_db_path, open_assignment_state
+    from ...model.assign import MAX_CAPACITY, capacities_from_column
 
 # Page configuration
 st.set_page_config(
@@ -42,6 +73,9 @@ def main():
     # Initialize session state
     state.init_session_state()
 
+    # Pick up assignments other coordinators made (one counter read if none)
+    remote_changes = state.get_assignment_state().sync()
+
     # Sidebar navigation
     with st.sidebar:
         st.title("ESN UNIZA")
@@ -62,6 +96,9 @@ def main():
         debug_mode = st.checkbox("Debug Mode", value=st.session_state.debug_mode)
         st.session_state.debug_mode = debug_mode
 
+        if remote_changes:
+            st.info(f"{remote_changes} assignment change(s) made in another session were loaded.")
+
         st.markdown("---")
         st.caption("ESN UNIZA © 2026")
 
@@ -354,6 +391,8 @@ def apply_config_to_state(config_dict: dict, config_state) -> None:
     matching = config_dict.get("matching", {})
     if "top_k" in matching:
         config_state.top_k = matching["top_k"]
+    if "reverse_top_k" in matching:
+        config_state.reverse_top_k = matching["reverse_top_k"] or 0
 
     # Apply output settings
     output = config_dict.get("output", {})
@@ -363,6 +402,8 @@ def apply_config_to_state(config_dict: dict, config_state) -> None:
         config_state.include_extra_fields = output["include_extra_fields"]
     if "out_prefix" in output:
         config_state.output_prefix = output["out_prefix"]
+    if "save_artifacts" in output:
+        config_state.save_artifacts = bool(output["save_artifacts"])
 
 
 def show_configure_screen():
@@ -584,6 +625,15 @@ def show_configure_screen():
         )
         config_state.top_k = top_k
 
+        config_state.reverse_top_k = st.slider(
+            "Top K ESN buddies per Erasmus student (0 = off)",
+            min_value=0,
+            max_value=min(50, len(esn_df)),
+            value=min(config_state.reverse_top_k, min(50, len(esn_df))),
+            help="Also rank buddies from each student's point of view (shown on the Results screen "
+                 "and exported as the \"Buddies per Student\" sheet)"
+        )
+
     with st.expander("Output Settings", expanded=True):
         per_esner = st.checkbox(
             "Generate per-ESN-member sheets",
@@ -597,6 +647,13 @@ def show_configure_screen():
         )
         config_state.include_extra_fields = include_extra
 
+        config_state.save_artifacts = st.checkbox(
+            "Save each run for reopening later",
+            value=config_state.save_artifacts,
+            help="Writes the run's tables and arrays under outputs/artifacts after it completes "
+                 "(the 10 most recent are kept)"
+        )
+
         output_prefix = st.text_input(
             "Output filename prefix",
             value=config_state.output_prefix
@@ -691,6 +748,8 @@ def show_run_screen():
 
     all_passed = all(check[2] for check in checks if check[0] in ["✓", "✗"])
 
+    show_reopen_saved_run(input_state, config_state)
+
     st.markdown("---")
 
     # B) Run button
@@ -711,6 +770,8 @@ def show_run_screen():
     if run_button:
         run_matching_pipeline()
 
+    show_export_job_progress()
+
     # C) Logs panel
     if st.session_state.run_logs:
         st.markdown("---")
@@ -748,14 +809,12 @@ def run_matching_pipeline():
         # Build config
         state.log_message("Building configuration...", "INFO")
         status_text.text("Building configuration...")
-        progress_bar.progress(10)
 
         config = components.build_config_dict(input_state, config_state)
 
         # Prepare dataframes
         state.log_message("Preparing data...", "INFO")
         status_text.text("Preparing data...")
-        progress_bar.progress(20)
 
         erasmus_df = input_state.erasmus_df.copy()
         esn_df = input_state.esn_df.copy()
@@ -802,51 +861,50 @@ def run_matching_pipeline():
                 "INFO"
             )
 
-        # Stage 1: Ingest (skipped, using loaded data)
-        state.log_message("Stage 1/6: Ingest - Using uploaded data", "INFO")
-        status_text.text("Stage 1/6: Ingest")
-        progress_bar.progress(30)
-
-        # Run pipeline
-        state.log_message("Stage 2/6: Validate", "INFO")
-        status_text.text("Stage 2/6: Validate")
-        progress_bar.progress(40)
-
-        state.log_message("Stage 3/6: Vectorize", "INFO")
-        status_text.text("Stage 3/6: Vectorize")
-        progress_bar.progress(50)
+        # Run the pipeline; it reports real progress per stage (rows matched, sheets written)
+        tracker = ProgressTracker()
 
-        state.log_message("Stage 4/6: Match", "INFO")
-        status_text.text("Stage 4/6: Match")
-        progress_bar.progress(60)
+        def on_progress(stage: str, done: int, total: int) -> None:
+            update = tracker.update(stage, done, total)
+            if update is None:
+                return
+            fraction, eta = update
+            progress_bar.progress(fraction)
+            status_text.text(progress_line(stage, done, total, fraction, eta))
 
-        state.log_message("Stage 5/6: Rank", "INFO")
-        status_text.text("Stage 5/6: Rank")
-        progress_bar.progress(70)
-
-        state.log_message("Stage 6/6: Export", "INFO")
-        status_text.text("Stage 6/6: Export")
-        progress_bar.progress(80)
-
-        # Run the pipeline
         artifacts = run_pipeline_from_config(
             config,
             debug=st.session_state.debug_mode,
-            input_override=(erasmus_df, esn_df)
+            input_override=(erasmus_df, esn_df),
+            progress=on_progress
         )
+        for record in artifacts.metrics:
+            reused = " (reused from previous run)" if record.cached else ""
+            state.log_message(
+                f"{STAGE_LABELS.get(record.stage, record.stage)}: {record.wall_seconds:.2f} s{reused}", "INFO"
+            )
+        if artifacts.output_path is None:
+            state.log_message("Export deferred until requested on the Export screen", "INFO")
 
         progress_bar.progress(100)
         status_text.text("Complete!")
 
-        # Store results
-        results_state = state.get_results_state()
-        results_state.artifacts = artifacts
+        if artifacts.reused_output_path:
+            state.log_message(
+                f"Inputs and configuration unchanged - reused previous export {artifacts.reused_output_path.name}",
+                "INFO"
+            )
+
+        store_run_results(artifacts)
 
-        # Build ESN names list
-        results_state.esn_names = [
-            f"{row.get('Name', '')} {row.get('Surname', '')}".strip()
-            for _, row in artifacts.esn_df.iterrows()
-        ]
+        # Save the run so it can be reopened later without re-running (opt-in)
+        if config.get("output", {}).get("save_artifacts", False):
+            try:
+                bundle_dir = artifact_bundle.save_artifacts(artifacts)
+                artifact_bundle.prune_bundles(bundle_dir.parent)
+                state.log_message(f"Saved run for reopening: {bundle_dir}", "INFO")
+            except Exception as e:
+                state.log_message(f"Warning: Failed to save run for reopening: {str(e)}", "WARNING")
 
         state.log_message("Pipeline completed successfully!", "SUCCESS")
         st.success("✓ Matching completed successfully!")
@@ -857,6 +915,7 @@ def run_matching_pipeline():
             "esn_count": len(artifacts.esn_df),
             "erasmus_count": len(artifacts.erasmus_df),
             "question_count": len(artifacts.question_columns),
+            "wall_seconds": round(sum(record.wall_seconds for record in artifacts.metrics), 3),
             "status": "success"
         })
 
@@ -881,6 +940,96 @@ def run_matching_pipeline():
         })
 
 
+def _ranked_matches_table(artifacts: PipelineArtifacts, esn_idx: int, candidates) -> pd.DataFrame:
+    """Ranked candidates of one ESN member with their details and comparison stats (no assignment status)."""
+    stats = artifacts.comparison_stats(esn_idx)
+    contact_col = components.autodetect_contact_column(list(artifacts.erasmus_df.columns))
+    show_details = artifacts.config.get("output", {}).get("per_esner_sheets", True)
+
+    matches_data = []
+    for rank_num, candidate in enumerate(candidates, start=1):
+        student_row = artifacts.erasmus_df.iloc[candidate.erasmus_index]
+        match_row = {
+            "Rank": rank_num,
+            "Name": student_row.get("Name", ""),
+            "Surname": student_row.get("Surname", ""),
+            "Contact": student_row.get(contact_col, "") if contact_col else "",
+            "Compared Questions": int(stats["compared"][candidate.erasmus_index]),
+            "Same Answers": int(stats["same"][candidate.erasmus_index]),
+            "Different Answers": int(stats["different"][candidate.erasmus_index]),
+            "_erasmus_index": candidate.erasmus_index,  # Hidden field for assignment logic
+        }
+
+        # Add extra fields if configured
+        if show_details:
+            for col in artifacts.erasmus_df.columns:
+                if col in artifacts.question_columns or col in match_row.keys() or col == "Status":
+                    continue
+                value = student_row.get(col, "")
+                if pd.notna(value) and str(value).strip():
+                    match_row[col] = value
+
+        matches_data.append(match_row)
+    return pd.DataFrame(matches_data)
+
+
+def store_run_results(artifacts: PipelineArtifacts) -> None:
+    """Make `artifacts` the current results and restore the assignments saved for them."""
+    # An export still running for the previous run is stale
+    results_state = state.get_results_state()
+    if results_state.export_job is not None and results_state.export_job.is_running:
+        results_state.export_job.cancel()
+    results_state.export_job = None
+    results_state.live_rankings = None
+    results_state.assignment_analytics = None
+    results_state.artifacts = artifacts
+
+    # Restore assignments saved for the same rows (same data, ingest and question settings)
+    db_path = default_db_path(artifacts.config)
+    if db_path is not None:
+        assignment_state = open_assignment_state(db_path, artifacts.run_key)
+        state.set_assignment_state(assignment_state)
+        if assignment_state.get_assignment_count():
+            state.log_message(
+                f"Restored {assignment_state.get_assignment_count()} saved assignment(s) from {db_path}",
+                "INFO"
+            )
+
+    # Build ESN names list
+    results_state.esn_names = [
+        f"{row.get('Name', '')} {row.get('Surname', '')}".strip()
+        for _, row in artifacts.esn_df.iterrows()
+    ]
+
+
+def show_reopen_saved_run(input_state, config_state) -> None:
+    """Reopen the results of an earlier run from its saved bundle."""
+    root = artifact_bundle.bundles_root(components.build_config_dict(input_state, config_state))
+    bundles = artifact_bundle.list_bundles(root)
+    with st.expander(f"Reopen a Saved Run ({len(bundles)} saved)"):
+        if not bundles:
+            st.caption(
+                f"Runs are saved to {root} when they complete with "
+                "\"Save each run for reopening later\" checked under Output Settings."
+            )
+            return
+
+        def label(path: Path) -> str:
+            saved = datetime.fromtimestamp((path / artifact_bundle.MANIFEST_FILE).stat().st_mtime)
+            return f"{saved:%Y-%m-%d %H:%M:%S} ({path.name})"
+
+        selected = st.selectbox("Saved run", bundles, format_func=label, key="reopen_bundle")
+        if st.button("Reopen Run", key="reopen_bundle_button"):
+            try:
+                artifacts = artifact_bundle.load_artifacts(selected)
+            except Exception as e:
+                components.show_error_with_details(e, "Failed to reopen run")
+                return
+            store_run_results(artifacts)
+            state.log_message(f"Reopened saved run {selected}", "SUCCESS")
+            st.success("✓ Run reopened - see the Results screen.")
+
+
 def show_results_screen():
     """Screen 4: Interactive results browser."""
     st.title("Results")
@@ -914,6 +1063,11 @@ def show_results_screen():
     with col5:
         st.metric("Assignments", assignment_state.get_assignment_count())
 
+    show_accept_top_candidates(artifacts, assignment_state)
+    show_auto_assignment(artifacts, assignment_state)
+    show_undo_redo(assignment_state, "results")
+    show_assignment_analytics(artifacts, assignment_state)
+
     st.markdown("---")
 
     # B) ESN member selection
@@ -935,61 +1089,35 @@ def show_results_screen():
     ranking = artifacts.rankings[esn_idx]
     esn_row = artifacts.esn_df.iloc[esn_idx]
 
-    st.info(f"Showing top {len(ranking.candidates)} matches for **{selected_name}**")
+    hide_assigned = st.checkbox(
+        "Hide assigned students (show the next best available instead)",
+        value=True,
+        key="hide_assigned_candidates"
+    )
+    if hide_assigned:
+        candidates = get_live_rankings(artifacts, assignment_state).top(esn_idx, len(ranking.candidates))
+    else:
+        candidates = ranking.candidates
+
+    st.info(f"Showing top {len(candidates)} matches for **{selected_name}**")
 
     # C) Ranked matches table
     st.subheader("Ranked Matches")
 
-    matches_data = []
+    # Student details and comparison stats only depend on the candidates shown
+    matches_df = artifacts.cached_view(
+        ("ranked_matches", esn_idx, tuple(candidate.erasmus_index for candidate in candidates)),
+        lambda: _ranked_matches_table(artifacts, esn_idx, candidates)
+    ).copy()
     assigned_indices = assignment_state.get_assigned_erasmus_indices()
-
-    for rank_num, candidate in enumerate(ranking.candidates, start=1):
-        student_row = artifacts.erasmus_df.iloc[candidate.erasmus_index]
-
-        # Check if this student is already assigned
-        is_assigned = candidate.erasmus_index in assigned_indices
-
-        # Compute accurate comparison stats
-        esn_vector = artifacts.esn_vectors[esn_idx]
-        student_vector = artifacts.erasmus_vectors[candidate.erasmus_index]
-
-        compared_count, same_count, diff_count = compute_comparison_stats(
-            esn_vector,
-            student_vector,
-            candidate.distance
-        )
-
-        # Find contact column
-        contact_col = components.autodetect_contact_column(list(artifacts.erasmus_df.columns))
-        contact_value = student_row.get(contact_col, "") if contact_col else ""
-
-        match_row = {
-            "Rank": rank_num,
-            "Name": student_row.get("Name", ""),
-            "Surname": student_row.get("Surname", ""),
-            "Status": "ASSIGNED" if is_assigned else "Available",
-            "Contact": contact_value,
-            "Compared Questions": compared_count,
-            "Same Answers": same_count,
-            "Different Answers": diff_count,
-            "_erasmus_index": candidate.erasmus_index,  # Hidden field for assignment logic
-        }
-
-        # Add extra fields if configured
-        if artifacts.config.get("output", {}).get("per_esner_sheets", True):
-            for col in artifacts.erasmus_df.columns:
-                if col in artifacts.question_columns or col in match_row.keys():
-                    continue
-                value = student_row.get(col, "")
-                if pd.notna(value) and str(value).strip():
-                    match_row[col] = value
-
-        matches_data.append(match_row)
-
-    matches_df = pd.DataFrame(matches_data)
+    if not matches_df.empty:
+        matches_df.insert(3, "Status", [
+            "ASSIGNED" if idx in assigned_indices else "Available" for idx in matches_df["_erasmus_index"]
+        ])
+    matches_data = matches_df.to_dict("records")
 
     # Display table without the hidden _erasmus_index column
-    display_df = matches_df.drop(columns=["_erasmus_index"])
+    display_df = matches_df.drop(columns=["_erasmus_index"], errors="ignore")
     st.dataframe(display_df, use_container_width=True, hide_index=True)
 
     # C1) Manual Assignment Section
@@ -1007,7 +1135,7 @@ def show_results_screen():
                 st.write(f"✓ {assignment.erasmus_name} {assignment.erasmus_surname}")
             with col2:
                 if st.button("🗑️ Unassign", key=f"unassign_{esn_idx}_{assignment.erasmus_index}"):
-                    if assignment_state.remove_assignment(assignment.erasmus_index):
+                    if _remove_assignment(assignment_state, assignment.erasmus_index):
                         st.success(f"Unassigned {assignment.erasmus_name} {assignment.erasmus_surname}")
                         st.rerun()
                     else:
@@ -1085,13 +1213,255 @@ def show_results_screen():
 
     selected_rank = st.selectbox(
         "Select a match to view question-by-question comparison",
-        range(1, len(ranking.candidates) + 1),
+        range(1, len(candidates) + 1),
         format_func=lambda x: f"Rank {x}: {matches_data[x-1]['Name']} {matches_data[x-1]['Surname']}",
         key="match_detail_selector"
     )
 
     if selected_rank:
-        show_match_details(artifacts, esn_idx, ranking.candidates[selected_rank - 1])
+        show_match_details(artifacts, esn_idx, candidates[selected_rank - 1])
+
+    st.markdown("---")
+    show_reverse_rankings(artifacts, assignment_state)
+
+
+def _remove_assignment(assignment_state, erasmus_index: int) -> bool:
+    """Unassign a student, reporting a conflict with another session."""
+    try:
+        return assignment_state.remove_assignment(erasmus_index)
+    except AssignmentConflictError as e:
+        st.error(str(e))
+        return False
+
+
+def show_undo_redo(assignment_state, key_prefix: str) -> None:
+    """Undo / redo buttons for assignment changes."""
+    col1, col2, _ = st.columns([1, 1, 6])
+    with col1:
+        undo = st.button("↶ Undo", key=f"undo_{key_prefix}", disabled=not assignment_state.can_undo())
+    with col2:
+        redo = st.button("↷ Redo", key=f"redo_{key_prefix}", disabled=not assignment_state.can_redo())
+    if undo or redo:
+        try:
+            assignment_state.undo() if undo else assignment_state.redo()
+            st.rerun()
+        except AssignmentConflictError as e:
+            st.error(f"{e}; this change can no longer be {'undone' if undo else 'redone'}.")
+
+
+def get_live_rankings(artifacts: PipelineArtifacts, assignment_state) -> LiveRankings:
+    """Rankings over the still-free students, synced with the current assignments."""
+    results_state = state.get_results_state()
+    if results_state.live_rankings is None:
+        results_state.live_rankings = LiveRankings(
+            artifacts.distance_counts,
+            artifacts.erasmus_df,
+            top_k=artifacts.config.get("matching", {}).get("top_k", 10),
+            identifier_column=artifacts.config.get("schema", {}).get("identifier_column")
+        )
+    results_state.live_rankings.sync(assignment_state)
+    return results_state.live_rankings
+
+
+def get_assignment_analytics(artifacts: PipelineArtifacts, assignment_state, capacities) -> AssignmentAnalytics:
+    """Assignment analytics for the given capacities, synced with the current assignments."""
+    results_state = state.get_results_state()
+    analytics = results_state.assignment_analytics
+    if analytics is None or not np.array_equal(analytics.capacities, capacities):
+        analytics = AssignmentAnalytics(artifacts.distance_counts, capacities)
+        results_state.assignment_analytics = analytics
+    analytics.sync(assignment_state)
+    return analytics
+
+
+def show_assignment_analytics(artifacts: PipelineArtifacts, assignment_state) -> None:
+    """Per-buddy load, assigned distances and the students still waiting for a buddy."""
+    with st.expander("Workload Balance", expanded=False):
+        # Same capacities as chosen under Automatic Assignment
+        capacity_col = st.session_state.get("auto_assign_capacity_col")
+        capacities = capacities_from_column(
+            artifacts.esn_df,
+            capacity_col if capacity_col in artifacts.esn_df.columns else None,
+            default=int(st.session_state.get("auto_assign_default_capacity", 1))
+        )
+        analytics = get_assignment_analytics(artifacts, assignment_state, capacities)
+        summary = analytics.summary()
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Unassigned Students", summary["unassigned"])
+        with col2:
+            mean = summary["mean_distance"]
+            st.metric("Mean Assigned Distance", "-" if np.isnan(mean) else f"{mean:.2f}")
+        with col3:
+            st.metric("ESN Members without Buddy", summary["esn_without_buddy"])
+        with col4:
+            st.metric("ESN Members at Capacity", summary["esn_at_capacity"])
+
+        results_state = state.get_results_state()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption("Buddies per ESN member")
+            st.bar_chart(pd.DataFrame({
+                "ESN Member": results_state.esn_names,
+                "Buddies": analytics.load,
+                "Capacity": capacities,
+            }).set_index("ESN Member"))
+        with col2:
+            st.caption("Assigned pairs by number of different answers")
+            st.bar_chart(pd.DataFrame(
+                {"Pairs": analytics.histogram},
+                index=pd.RangeIndex(len(analytics.histogram), name="Different Answers")
+            ))
+
+        students, best, best_esn = analytics.unassigned_by_best_match()
+        if students.size:
+            st.caption("Unassigned students, closest remaining match first")
+            erasmus_rows = artifacts.erasmus_df.iloc[students]
+            st.dataframe(pd.DataFrame({
+                "Name": erasmus_rows.get("Name", pd.Series("", index=erasmus_rows.index)).to_numpy(),
+                "Surname": erasmus_rows.get("Surname", pd.Series("", index=erasmus_rows.index)).to_numpy(),
+                "Best Remaining Match": [
+                    results_state.esn_names[idx] if idx >= 0 else "(no capacity left)" for idx in best_esn
+                ],
+                "Different Answers": best,
+            }), use_container_width=True, hide_index=True)
+
+
+def show_accept_top_candidates(artifacts: PipelineArtifacts, assignment_state) -> None:
+    """Accept every ESN member's best available ranked candidate in one go."""
+    with st.expander("Accept Top Candidate for All", expanded=False):
+        st.caption(
+            "Assigns each ESN member their highest-ranked student who is still available. "
+            "If several members want the same student, the closest match wins (ties by identifier) "
+            "and the others get their next available candidate."
+        )
+        skip_assigned = st.checkbox(
+            "Skip ESN members who already have a student", value=True, key="accept_top_skip_assigned"
+        )
+        if st.button("Accept top candidate for all", key="accept_top_btn"):
+            try:
+                added = accept_top_candidates(
+                    assignment_state,
+                    artifacts.rankings,
+                    artifacts.esn_df,
+                    artifacts.erasmus_df,
+                    identifier_column=artifacts.config.get("schema", {}).get("identifier_column"),
+                    skip_assigned_esn=skip_assigned
+                )
+            except AssignmentConflictError as e:
+                st.error(f"{e}. The latest assignments were loaded; please try again.")
+                return
+            state.log_message(f"Accepted top candidate for {added} ESN member(s)")
+            st.rerun()
+
+
+def show_auto_assignment(artifacts: PipelineArtifacts, assignment_state) -> None:
+    """Assign all remaining students automatically, keeping manual assignments."""
+    with st.expander("Automatic Assignment", expanded=False):
+        st.caption(
+            "Assigns the remaining Erasmus students at minimum total distance. "
+            "Existing assignments are kept and count towards each ESN member's capacity."
+        )
+        columns = ["(same for everyone)"] + [str(col) for col in artifacts.esn_df.columns]
+        default_col = next(
+            (i for i, col in enumerate(columns) if "how many" in col.lower() or "number of buddies" in col.lower()),
+            0
+        )
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            capacity_col = st.selectbox(
+                "Capacity column (ESN)",
+                columns,
+                index=default_col,
+                key="auto_assign_capacity_col",
+                help="Column with the number of buddies each ESN member wants"
+            )
+        with col2:
+            default_capacity = st.number_input(
+                "Default capacity", min_value=0, max_value=MAX_CAPACITY, value=1, step=1,
+                key="auto_assign_default_capacity"
+            )
+
+        strategy = st.radio(
+            "Strategy",
+            ["optimal", "greedy", "stable"],
+            format_func={
+                "optimal": "Optimal (minimum total distance)",
+                "greedy": "Greedy (fastest, closest pairs first)",
+                "stable": "Stable matching (over top-K lists)",
+            }.get,
+            horizontal=True,
+            key="auto_assign_strategy",
+            help="Greedy and stable matching are much faster for very large intakes"
+        )
+
+        if st.button("Assign remaining students", key="auto_assign_btn"):
+            capacities = capacities_from_column(
+                artifacts.esn_df,
+                None if capacity_col == columns[0] else capacity_col,
+                default=int(default_capacity)
+            )
+            try:
+                added = assign_remaining(
+                    assignment_state,
+                    artifacts.distances,
+                    capacities,
+                    esn_df=artifacts.esn_df,
+                    erasmus_df=artifacts.erasmus_df,
+                    strategy=strategy,
+                    top_k=artifacts.config.get("matching", {}).get("top_k", 10)
+                )
+            except AssignmentConflictError as e:
+                st.error(f"{e}. The latest assignments were loaded; please try again.")
+                return
+            state.log_message(f"Automatic assignment ({strategy}) added {added} assignment(s)")
+            st.rerun()
+
+
+def show_reverse_rankings(artifacts: PipelineArtifacts, assignment_state) -> None:
+    """E) The student's point of view: best ESN buddies per Erasmus student."""
+    st.subheader("Best Buddies per Student")
+
+    if not artifacts.reverse_rankings:
+        st.info("Enable \"Top K ESN buddies per Erasmus student\" in Configure > Matching Settings and re-run.")
+        return
+
+    student_labels = [
+        f"{row.get('Name', '')} {row.get('Surname', '')}".strip() or f"Student {idx}"
+        for idx, (_, row) in enumerate(artifacts.erasmus_df.iterrows())
+    ]
+    erasmus_idx = st.selectbox(
+        "Select Erasmus Student",
+        range(len(student_labels)),
+        format_func=lambda idx: student_labels[idx],
+        key="reverse_student_selector"
+    )
+    if erasmus_idx is None:
+        return
+
+    assignment = assignment_state.get_assignment(erasmus_idx)
+    if assignment is not None:
+        st.caption(f"Currently assigned to {assignment.esn_name} {assignment.esn_surname}".strip())
+
+    erasmus_vector = artifacts.erasmus_vectors[erasmus_idx]
+    rows = []
+    for rank_num, candidate in enumerate(artifacts.reverse_rankings[erasmus_idx].candidates, start=1):
+        esn_row = artifacts.esn_df.iloc[candidate.esn_index]
+        compared_count, same_count, diff_count = compute_comparison_stats(
+            artifacts.esn_vectors[candidate.esn_index], erasmus_vector, candidate.distance
+        )
+        rows.append({
+            "Rank": rank_num,
+            "ESN Name": esn_row.get("Name", ""),
+            "ESN Surname": esn_row.get("Surname", ""),
+            "Current Buddies": len(assignment_state.get_assignments_for_esn(candidate.esn_index)),
+            "Compared Questions": compared_count,
+            "Same Answers": same_count,
+            "Different Answers": diff_count,
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
 
 def show_match_details(artifacts: PipelineArtifacts, esn_idx: int, candidate):
@@ -1174,27 +1544,74 @@ def show_export_screen():
 
     st.write("Export the complete matching results generated by the pipeline.")
 
+    export_job = results_state.export_job
+    export_running = export_job is not None and export_job.is_running
+
+    if artifacts.output_path is None or not artifacts.output_path.exists():
+        st.info("The results workbook is generated on demand. You can keep browsing results while it is written.")
+        if st.button("📊 Generate Full Results Workbook", type="primary", disabled=export_running):
+            results_state.export_job = start_export_job(artifacts)
+            st.rerun()
+
+    show_export_job_progress()
+
     if artifacts.output_path and artifacts.output_path.exists():
-        with open(artifacts.output_path, 'rb') as f:
-            file_bytes = f.read()
+        _show_workbook_download(artifacts.output_path, f"Download Full Results ({artifacts.output_path.name})")
+        st.success(f"✓ Results file available: {artifacts.output_path}")
 
-        st.download_button(
-            label=f"Download Full Results ({artifacts.output_path.name})",
-            data=file_bytes,
-            file_name=artifacts.output_path.name,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            type="primary"
+    # B1) One CSV per ESN member, zipped; built only when the download is clicked
+    st.download_button(
+        label="📦 Download per-ESN CSV files (ZIP)",
+        data=lambda: per_esn_csv_zip_bytes(
+            artifacts.rankings,
+            artifacts.esn_df,
+            artifacts.erasmus_df,
+            artifacts.stats,
+            artifacts.config,
+            esn_vectors=artifacts.esn_vectors,
+            erasmus_vectors=artifacts.erasmus_vectors
+        ),
+        file_name=f"matching_per_esn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+        mime="application/zip"
+    )
+
+    # B2) Export a subset of ESN members as a smaller workbook
+    with st.expander("Export selected ESN members only", expanded=False):
+        esn_names = results_state.esn_names
+        selected_names = st.multiselect(
+            "ESN members to include",
+            range(len(esn_names)),
+            format_func=lambda idx: esn_names[idx],
+            key="export_subset_select"
         )
 
-        st.success(f"✓ Results file available: {artifacts.output_path}")
-    else:
-        st.info("Full results export not available. The pipeline may not have generated an output file.")
+        if st.button("📊 Generate Workbook for Selection", disabled=not selected_names or export_running):
+            results_state.export_job = start_export_job(artifacts, esn_indices=list(selected_names))
+            st.rerun()
+
+        if (
+            export_job is not None
+            and export_job.status == "done"
+            and export_job.esn_indices is not None
+            and export_job.output_path.exists()
+        ):
+            _show_workbook_download(export_job.output_path, f"Download Selection ({export_job.output_path.name})")
 
     st.markdown("---")
 
     # C) Manage Manual Assignments
     st.subheader("Manage Manual Assignments")
 
+    show_undo_redo(assignment_state, "export")
+    if assignment_state.log.events:
+        st.download_button(
+            label=f"Download Audit Log ({len(assignment_state.log.events)} changes)",
+            data=lambda: export_assignment_log_to_csv(assignment_state.log.events),
+            file_name=f"assignment_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            key="download_assignment_log"
+        )
+
     assignments = assignment_state.assignments
 
     if not assignments:
@@ -1203,31 +1620,13 @@ def show_export_screen():
         # C1) Show all assignments with unassign buttons
         st.write("**Current Assignments:**")
 
-        assignments_display = []
+        matching_counts, compared_counts = _assignment_match_counts(artifacts, assignments)
+
         for idx, assignment in enumerate(assignments):
             esn_row = artifacts.esn_df.iloc[assignment.esn_index]
             erasmus_row = artifacts.erasmus_df.iloc[assignment.erasmus_index]
-
-            # Calculate matching count
-            esn_vec = artifacts.esn_vectors[assignment.esn_index]
-            erasmus_vec = artifacts.erasmus_vectors[assignment.erasmus_index]
-
-            matching_count = 0
-            compared_count = 0
-
-            for i in range(min(len(esn_vec), len(erasmus_vec))):
-                esn_val = esn_vec[i]
-                erasmus_val = erasmus_vec[i]
-
-                if esn_val is not None and erasmus_val is not None:
-                    import numpy as np
-                    esn_is_nan = isinstance(esn_val, float) and np.isnan(esn_val)
-                    erasmus_is_nan = isinstance(erasmus_val, float) and np.isnan(erasmus_val)
-
-                    if not esn_is_nan and not erasmus_is_nan:
-                        compared_count += 1
-                        if esn_val == erasmus_val:
-                            matching_count += 1
+            matching_count = matching_counts[idx]
+            compared_count = compared_counts[idx]
 
             # Display assignment with unassign button
             col1, col2, col3, col4 = st.columns([3, 3, 2, 1])
@@ -1243,7 +1642,7 @@ def show_export_screen():
 
             with col4:
                 if st.button("🗑️", key=f"unassign_export_{assignment.erasmus_index}_{idx}", help="Unassign this student"):
-                    if assignment_state.remove_assignment(assignment.erasmus_index):
+                    if _remove_assignment(assignment_state, assignment.erasmus_index):
                         st.success(f"Unassigned {erasmus_row.get('Name', '')} {erasmus_row.get('Surname', '')}")
                         st.rerun()
                     else:
@@ -1274,7 +1673,7 @@ def show_export_screen():
         st.write(f"Export {len(assignments)} manual assignment(s).")
         st.info("📋 Export includes ALL columns from ESN and Erasmus datasets (except question answers) + matching count.")
 
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
 
         with col1:
             # Export as CSV with full data
@@ -1333,6 +1732,40 @@ def show_export_screen():
                 except Exception as e:
                     components.show_error_with_details(e, "Failed to export assignments")
 
+        with col3:
+            # Export as Parquet for downstream tooling
+            if st.button("🗂️ Generate Assignments Parquet"):
+                try:
+                    from src.view.export_assignments import export_assignments_to_parquet
+
+                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                    output_path = Path("outputs") / f"assignments_{timestamp}.parquet"
+
+                    export_assignments_to_parquet(
+                        assignments,
+                        output_path,
+                        esn_df=artifacts.esn_df,
+                        erasmus_df=artifacts.erasmus_df,
+                        question_columns=artifacts.question_columns,
+                        esn_vectors=artifacts.esn_vectors,
+                        erasmus_vectors=artifacts.erasmus_vectors
+                    )
+
+                    st.success(f"✓ Exported to {output_path}")
+
+                    with open(output_path, 'rb') as f:
+                        file_bytes = f.read()
+
+                    st.download_button(
+                        label="📥 Download Assignments Parquet",
+                        data=file_bytes,
+                        file_name=output_path.name,
+                        mime="application/vnd.apache.parquet"
+                    )
+
+                except Exception as e:
+                    components.show_error_with_details(e, "Failed to export assignments")
+
         # Show preview of what will be exported
         st.write("**Export Preview:**")
 
@@ -1361,47 +1794,149 @@ def show_export_screen():
         # Show simple preview table
         st.write("**Assignments Preview (basic info):**")
 
-        preview_data = []
-        for assignment in assignments:
-            esn_row = artifacts.esn_df.iloc[assignment.esn_index]
-            erasmus_row = artifacts.erasmus_df.iloc[assignment.erasmus_index]
+        matching_counts, compared_counts = _assignment_match_counts(artifacts, assignments)
+        preview_df = pd.DataFrame({
+            "ESN Name": [a.esn_name + " " + a.esn_surname for a in assignments],
+            "Erasmus Name": [a.erasmus_name + " " + a.erasmus_surname for a in assignments],
+            "Matching Answers": [f"{m}/{c}" for m, c in zip(matching_counts, compared_counts)],
+            "Timestamp": [a.timestamp for a in assignments],
+        })
+        st.dataframe(preview_df, use_container_width=True, hide_index=True)
+
 
-            # Calculate matching count
-            esn_vec = artifacts.esn_vectors[assignment.esn_index]
-            erasmus_vec = artifacts.erasmus_vectors[assignment.erasmus_index]
+@st.fragment(run_every=1.0)
+def show_export_job_progress():
+    """Live progress of the background export; refreshes itself every second."""
+    job = state.get_results_state().export_job
+    if job is None:
+        return
 
-            matching_count = 0
-            compared_count = 0
+    if job.is_running:
+        target = "selected ESN members" if job.esn_indices is not None else "full results"
+        st.progress(
+            job.fraction,
+            text=f"Exporting {target}: {job.steps_done}/{job.steps_total or '?'} sheets written"
+        )
+        if st.button("Cancel export", key="cancel_export_job"):
+            job.cancel()
+        return
 
-            for i in range(min(len(esn_vec), len(erasmus_vec))):
-                esn_val = esn_vec[i]
-                erasmus_val = erasmus_vec[i]
+    # Rerun the whole page once so the finished file shows up
+    if st.session_state.get("export_job_reported") is not job:
+        st.session_state.export_job_reported = job
+        if job.status == "done":
+            # The worker leaves the artifacts alone; record the files on them here
+            job.record_on(state.get_results_state().artifacts)
+            state.log_message(f"Export finished: {job.output_path}", "SUCCESS")
+        elif job.status == "failed":
+            state.log_message(f"Export failed: {job.error}", "ERROR")
+        st.rerun()
 
-                if esn_val is not None and erasmus_val is not None:
-                    import numpy as np
-                    esn_is_nan = isinstance(esn_val, float) and np.isnan(esn_val)
-                    erasmus_is_nan = isinstance(erasmus_val, float) and np.isnan(erasmus_val)
+    if job.status == "failed":
+        st.error(f"Export failed: {job.error}")
+    elif job.status == "cancelled":
+        st.warning("Export cancelled.")
 
-                    if not esn_is_nan and not erasmus_is_nan:
-                        compared_count += 1
-                        if esn_val == erasmus_val:
-                            matching_count += 1
 
-            preview_data.append({
-                "ESN Name": f"{esn_row.get('Name', '')} {esn_row.get('Surname', '')}",
-                "Erasmus Name": f"{erasmus_row.get('Name', '')} {erasmus_row.get('Surname', '')}",
-                "Matching Answers": f"{matching_count}/{compared_count}",
-                "Timestamp": assignment.timestamp
-            })
+def _show_workbook_download(path: Path, label: str) -> None:
+    """Offer an exported results file for download."""
+    with open(path, 'rb') as f:
+        file_bytes = f.read()
 
-        preview_df = pd.DataFrame(preview_data)
-        st.dataframe(preview_df, use_container_width=True, hide_index=True)
+    st.download_button(
+        label=label,
+        data=file_bytes,
+        file_name=path.name,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        type="primary"
+    )
+
+
+def _assignment_match_counts(artifacts: PipelineArtifacts, assignments):
+    """Matching/compared answer counts for all assignments in one vectorized pass."""
+    esn_indices = np.array([a.esn_index for a in assignments], dtype=int)
+    erasmus_indices = np.array([a.erasmus_index for a in assignments], dtype=int)
+    return assignment_match_counts(
+        artifacts.esn_vectors, artifacts.erasmus_vectors, esn_indices, erasmus_indices
+    )
 
 
 def show_logs_screen():
     """Screen 6: View application logs and run history."""
     st.title("Logs & History")
 
-    st.info("Logs screen - Implementation pending")
+    # A) Stage timings and memory of the latest run
+    st.subheader("Last Run Profile")
+    artifacts = state.get_results_state().artifacts
+    if artifacts is None or not artifacts.metrics:
+        st.info("No run yet. Run the matching pipeline to see per-stage timings.")
+    else:
+        metrics_df = metrics_frame(artifacts.metrics)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Wall Time", f"{metrics_df['wall_seconds'].sum():.2f} s")
+        with col2:
+            st.metric("Total CPU Time", f"{metrics_df['cpu_seconds'].sum():.2f} s")
+        with col3:
+            peak = metrics_df["peak_rss_mb"].max()
+            st.metric("Peak Memory", "-" if pd.isna(peak) else f"{peak:.0f} MB")
+
+        st.bar_chart(metrics_df.set_index("stage")["wall_seconds"])
+        st.dataframe(
+            metrics_df.rename(columns={
+                "stage": "Stage",
+                "wall_seconds": "Wall (s)",
+                "cpu_seconds": "CPU (s)",
+                "peak_rss_mb": "Peak RSS (MB)",
+                "traced_peak_mb": "Python Peak (MB)",
+                "rows": "Rows",
+                "cached": "Reused",
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Reused stages were taken from an earlier run with the same inputs and settings.")
+
+    if artifacts is not None:
+        with st.expander("Results Memory", expanded=False):
+            report = artifacts.memory_report()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Held by Results", f"{report.loc[report['kind'] == 'core', 'mb'].sum():.1f} MB")
+            with col2:
+                st.metric("Cached Views", f"{report.loc[report['kind'] == 'view', 'mb'].sum():.1f} MB")
+            st.dataframe(
+                report.rename(columns={
+                    "component": "Component", "kind": "Kind", "shape": "Shape", "dtype": "Type", "mb": "MB",
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(
+                "Derived views (float vectors and distances, comparison stats, match tables) are rebuilt "
+                "on demand; \"mapped\" arrays of a reopened run are read from disk as they are used."
+            )
+
+    st.markdown("---")
+
+    # B) Messages of the latest run
+    st.subheader("Run Logs")
+    if not st.session_state.run_logs:
+        st.info("No log messages yet.")
+    else:
+        st.dataframe(
+            pd.DataFrame(st.session_state.run_logs).rename(columns={"level": "Level", "message": "Message"}),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    st.markdown("---")
+
+    # C) All runs of this session
+    st.subheader("Run History")
+    if not st.session_state.run_history:
+        st.info("No runs in this session yet.")
+    else:
+        st.dataframe(pd.DataFrame(st.session_state.run_history[::-1]), use_container_width=True, hide_index=True)
 
 
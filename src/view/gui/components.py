@@ -261,10 +261,14 @@ def build_config_dict(
         "matching": {
             "metric": "hamming",
             "top_k": config_state.top_k,
+            "reverse_top_k": config_state.reverse_top_k,
         },
         "output": {
             "out_dir": "outputs",
             "per_esner_sheets": config_state.per_esner_sheets,
+            # Export only when the Export screen asks for it
+            "export_mode": "lazy",
+            "save_artifacts": config_state.save_artifacts,
         },
     }
 
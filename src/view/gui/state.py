@@ -16,6 +16,9 @@ if str(project_root) not in sys.path:
 
 from src.controller.pipeline import PipelineArtifacts
 from src.controller.assignments import AssignmentState
+from src.controller.live_rankings import LiveRankings
+from src.controller.assignment_analytics import AssignmentAnalytics
+from src.controller.export_jobs import ExportJob
 
 
 @dataclass
@@ -64,10 +67,12 @@ class ConfigState:
 
     # Matching
     top_k: int = 10
+    reverse_top_k: int = 0
 
     # Output
     per_esner_sheets: bool = True
     include_extra_fields: bool = True
+    save_artifacts: bool = False
     output_prefix: str = "matching_"
 
 
@@ -80,6 +85,15 @@ class ResultsState:
     # For quick access
     esn_names: List[str] = field(default_factory=list)
 
+    # Background export of the results (full workbook or selected members)
+    export_job: Optional[ExportJob] = None
+
+    # Rankings over the still-free students (built on first use)
+    live_rankings: Optional[LiveRankings] = None
+
+    # Workload / distance aggregates over the assignments (built on first use)
+    assignment_analytics: Optional[AssignmentAnalytics] = None
+
 
 def init_session_state() -> None:
     """Initialize session state variables if they don't exist."""
@@ -118,7 +132,10 @@ def init_session_state() -> None:
 
 
 def reset_results() -> None:
-    """Clear results state."""
+    """Clear results state, cancelling any export still in progress."""
+    job = st.session_state.results.export_job
+    if job is not None and job.is_running:
+        job.cancel()
     st.session_state.results = ResultsState()
 
 
@@ -146,3 +163,10 @@ def get_assignment_state() -> AssignmentState:
     """Get assignment state."""
     return st.session_state.assignments
 
+
+def set_assignment_state(assignment_state: AssignmentState) -> None:
+    """Replace the assignment state, closing the previous one's store."""
+    previous = st.session_state.get("assignments")
+    if previous is not None and previous is not assignment_state:
+        previous.close()
+    st.session_state.assignments = assignment_state
@@ -0,0 +1,84 @@
+"""Shared pipeline inputs and configurations for the tests."""
+
+import pandas as pd
+import pytest
+
+
+def _esn_df():
+    return pd.DataFrame({
+        "Timestamp": [1, 2],
+        "Name": ["Anna", "Boris"],
+        "Surname": ["Alpha", "Beta"],
+        "Q1": ["A", "B"],
+        "Q2": ["B", "B"],
+    })
+
+
+def _erasmus_df():
+    return pd.DataFrame({
+        "Timestamp": [10, 11, 12],
+        "Name": ["Eva", "Fred", "Gina"],
+        "Surname": ["Delta", "Epsilon", "Zeta"],
+        "Buddy": ["Yes", "Yes", "Yes"],
+        "Q1": ["A", "B", "A"],
+        "Q2": ["A", "B", None],
+    })
+
+
+def _schema(question_columns):
+    return {
+        "required_columns": ["Timestamp", "Name", "Surname"],
+        "identifier_column": "Timestamp",
+        "question_columns": list(question_columns),
+        "answer_encoding": "AB",
+    }
+
+
+@pytest.fixture
+def pipeline_inputs():
+    """(erasmus_df, esn_df) for run_pipeline_from_config's input_override: 2 ESN members, 3 students."""
+    return _erasmus_df(), _esn_df()
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Build a config for pipeline_inputs exporting into tmp_path; keyword arguments go into `output`."""
+    def build(top_k=2, question_columns=("Q1", "Q2"), **output):
+        return {
+            "input": {"buddy_interest_column": "Buddy", "buddy_interest_value": "Yes"},
+            "schema": _schema(question_columns),
+            "matching": {"metric": "hamming", "top_k": top_k},
+            "output": {"out_dir": str(tmp_path), "per_esner_sheets": True, **output},
+        }
+    return build
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    """tmp_path / "data" holding the pipeline_inputs tables as esn.csv and erasmus.csv."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    _esn_df().to_csv(data_dir / "esn.csv", index=False)
+    _erasmus_df().to_csv(data_dir / "erasmus.csv", index=False)
+    return data_dir
+
+
+@pytest.fixture
+def make_csv_config(tmp_path, input_dir):
+    """Build a config reading input_dir and exporting lazily into tmp_path / "out"."""
+    def build(top_k=2, question_columns=("Q1", "Q2")):
+        return {
+            "input": {
+                "format": "csv",
+                "file_path": str(input_dir),
+                "esn_csv": "esn.csv",
+                "erasmus_csv": "erasmus.csv",
+                "csv_separator": ",",
+                "buddy_interest_column": "Buddy",
+                "buddy_interest_value": "Yes",
+            },
+            "schema": _schema(question_columns),
+            "matching": {"metric": "hamming", "top_k": top_k},
+            "output": {"out_dir": str(tmp_path / "out"), "export_mode": "lazy"},
+        }
+    return build
@@ -0,0 +1,110 @@
+"""Verify that saved artifact bundles reopen to the same results, lazily."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.controller.artifact_bundle import (
+    BUNDLE_FORMAT_VERSION, MANIFEST_FILE, list_bundles, load_artifacts, prune_bundles, save_artifacts
+)
+from src.controller.cli import run_pipeline
+from src.controller.pipeline import export_artifacts, run_pipeline_from_config
+from src.controller.stage_cache import StageCache
+
+
+@pytest.fixture
+def run(make_csv_config):
+    """Run the pipeline on the shared CSV inputs with extra matching settings."""
+    def run_with(**matching):
+        config = make_csv_config()
+        config["matching"].update(matching)
+        config["output"]["formats"] = ["csv"]
+        return run_pipeline_from_config(config, cache=StageCache())
+    return run_with
+
+
+def test_bundle_round_trip(tmp_path, run):
+    artifacts = run(reverse_top_k=1)
+    bundle_dir = save_artifacts(artifacts)
+    loaded = load_artifacts(bundle_dir)
+
+    assert bundle_dir == tmp_path / "out" / "artifacts" / artifacts.fingerprint[:16]
+    assert artifacts.bundle_path == loaded.bundle_path == bundle_dir
+    pd.testing.assert_frame_equal(loaded.esn_df, artifacts.esn_df)
+    pd.testing.assert_frame_equal(loaded.erasmus_df, artifacts.erasmus_df)
+    for name in ("esn_vectors", "erasmus_vectors", "distances"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(artifacts, name))
+    assert list(loaded.rankings) == list(artifacts.rankings)
+    assert list(loaded.reverse_rankings) == list(artifacts.reverse_rankings)
+    assert loaded.config == artifacts.config
+    assert loaded.stats == artifacts.stats
+    assert loaded.fingerprint == artifacts.fingerprint
+    assert loaded.metrics == artifacts.metrics
+
+
+def test_heavy_fields_load_on_access(run):
+    loaded = load_artifacts(save_artifacts(run()))
+
+    assert isinstance(loaded.distance_counts, np.memmap)
+    assert not loaded.distance_counts.flags.writeable
+    assert isinstance(loaded.ranking_table.index, np.memmap)
+    # Nothing is derived until it is used
+    assert loaded.views.sizes() == []
+    assert loaded.rankings[-1] == loaded.rankings[1]
+    loaded.distances
+    assert [key for key, _size in loaded.views.sizes()] == ["distances"]
+    kinds = loaded.memory_report().set_index("component")["kind"]
+    assert kinds["distance_counts"] == "mapped" and kinds["esn_df"] == "core"
+
+
+def test_reloaded_artifacts_export_the_same_table(run):
+    artifacts = run()
+    loaded = load_artifacts(save_artifacts(artifacts))
+    original = pd.read_csv(export_artifacts(artifacts))
+
+    loaded.config["output"]["export_cache"] = False
+    pd.testing.assert_frame_equal(pd.read_csv(export_artifacts(loaded)), original)
+
+
+def test_other_format_versions_are_rejected(tmp_path, run):
+    artifacts = run()
+    bundle_dir = save_artifacts(artifacts)
+    manifest_path = bundle_dir / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text())
+    manifest["format_version"] = BUNDLE_FORMAT_VERSION + 1
+    manifest_path.write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError, match="Unsupported artifacts bundle format"):
+        load_artifacts(bundle_dir)
+    with pytest.raises(FileNotFoundError):
+        load_artifacts(tmp_path / "missing")
+
+    # Saving the same run again replaces the outdated bundle
+    assert save_artifacts(artifacts) == bundle_dir
+    assert load_artifacts(bundle_dir).fingerprint == artifacts.fingerprint
+
+
+def test_prune_keeps_most_recent(tmp_path, run):
+    artifacts = run()
+    root = tmp_path / "bundles"
+    for name in ("a", "b", "c"):
+        save_artifacts(artifacts, root / name)
+
+    assert prune_bundles(root, keep=2) == 1
+    assert [path.name for path in list_bundles(root)] == ["c", "b"]
+
+
+def test_cli_saves_bundle_only_when_enabled(tmp_path, make_csv_config):
+    config = make_csv_config()
+    config["output"]["formats"] = ["csv"]
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(yaml.safe_dump(config))
+    run_pipeline(config_path)
+    assert list_bundles(tmp_path / "out" / "artifacts") == []
+
+    config["output"]["save_artifacts"] = True
+    config_path.write_text(yaml.safe_dump(config))
+    run_pipeline(config_path)
+    assert len(list_bundles(tmp_path / "out" / "artifacts")) == 1
@@ -0,0 +1,76 @@
+"""Verify the compact artifact arrays and the bounded cache of views derived from them."""
+import numpy as np
+
+from src.controller.artifact_views import (
+    RankingTable, ViewCache, compact_distances, decode_answers, encode_answers
+)
+from src.controller.pipeline import run_pipeline_from_config
+from src.controller.stage_cache import StageCache
+from src.model.rank import ESNRanking, RankedCandidate
+from src.view.export_table import comparison_counts
+
+
+def test_answers_and_distances_are_stored_compactly():
+    vectors = np.array([[0.0, 1.0, np.nan], [np.nan, np.nan, 1.0]])
+    codes = encode_answers(vectors)
+
+    assert codes.dtype == np.int8
+    np.testing.assert_array_equal(decode_answers(codes), vectors)
+    assert compact_distances(np.array([[0.0, 3.0], [40.0, 2.0]])).dtype == np.uint8
+    assert compact_distances(np.array([[300.0]])).dtype == np.uint16
+
+
+def test_ranking_table_builds_rows_on_access():
+    rankings = [
+        ESNRanking(0, [RankedCandidate(2, 0.0), RankedCandidate(0, 1.0)]),
+        ESNRanking(1, []),
+        ESNRanking(2, [RankedCandidate(1, 3.0)]),
+    ]
+    table = RankingTable.from_rankings(rankings)
+
+    assert len(table) == 3
+    assert table[-1] == rankings[2]
+    assert table[:2] == rankings[:2]
+    assert list(table) == rankings
+    assert table == rankings
+
+
+def test_view_cache_is_bounded_by_bytes():
+    cache = ViewCache(max_bytes=2000)
+    cache.get_or_compute("a", lambda: np.zeros(100))
+    cache.get_or_compute("b", lambda: np.zeros(100))
+    cache.get_or_compute("a", lambda: np.zeros(100))
+    cache.get_or_compute("c", lambda: np.zeros(100))
+
+    # 800 bytes each: the least recently used view ("b") is dropped
+    assert [key for key, _size in cache.sizes()] == ["a", "c"]
+    assert (cache.hits, cache.misses) == (1, 3)
+    # Views larger than the budget are returned but not kept
+    assert cache.get_or_compute("big", lambda: np.zeros(1000)).shape == (1000,)
+    assert [key for key, _size in cache.sizes()] == ["a", "c"]
+
+
+def test_artifacts_derive_views_from_compact_core(make_csv_config):
+    artifacts = run_pipeline_from_config(make_csv_config(), cache=StageCache())
+
+    assert artifacts.distance_counts.dtype == np.uint8
+    assert artifacts.distances.dtype == float
+    assert artifacts.distances is artifacts.distances
+
+    stats = artifacts.comparison_stats(1)
+    expected = comparison_counts(
+        np.repeat(artifacts.esn_vectors[1:2], len(artifacts.erasmus_df), axis=0),
+        artifacts.erasmus_vectors,
+        artifacts.distances[1]
+    )
+    for name in ("compared", "same", "different"):
+        np.testing.assert_array_equal(stats[name], expected[name])
+
+    report = artifacts.memory_report()
+    assert set(report.loc[report["kind"] == "core", "component"]) == {
+        "esn_df", "erasmus_df", "esn_answers", "erasmus_answers", "distance_counts", "rankings", "reverse_rankings",
+    }
+    views = report.loc[report["kind"] == "view"].set_index("component")["mb"]
+    assert {"distances", "esn_vectors", "erasmus_vectors", "comparison_stats 1"} <= set(views.index)
+    core = report.set_index("component")["mb"]
+    assert core["distance_counts"] * 8 == views["distances"]
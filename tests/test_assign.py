@@ -0,0 +1,231 @@
+"""
+Test suite for automatic buddy assignment.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+from src.controller.assignments import AssignmentState, accept_top_candidates, solve_assignments
+from src.model.assign import (
+    assignment_cost,
+    best_available_pairs,
+    capacities_from_column,
+    greedy_assignment,
+    optimal_assignment,
+    solve,
+    stable_assignment,
+)
+from src.model.rank import rank_candidates
+
+
+def _brute_force_cost(distances, capacities):
+    """Cheapest assignment of every student (enough capacity assumed)."""
+    esn_count, erasmus_count = distances.shape
+    best = None
+    for owners in itertools.product(range(esn_count), repeat=erasmus_count):
+        if any(owners.count(esn) > capacities[esn] for esn in range(esn_count)):
+            continue
+        cost = sum(distances[esn, student] for student, esn in enumerate(owners))
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+class TestCapacitiesFromColumn:
+    """Test parsing capacities from a free-text column."""
+
+    def test_parses_first_number(self):
+        esn_df = pd.DataFrame({"How many buddies?": ["2", "3 buddies", "1-2", "", None]})
+        capacities = capacities_from_column(esn_df, "How many buddies?", default=1)
+        assert capacities.tolist() == [2, 3, 1, 1, 1]
+
+    def test_missing_column_uses_default(self):
+        esn_df = pd.DataFrame({"Name": ["A", "B"]})
+        assert capacities_from_column(esn_df, "Capacity", default=2).tolist() == [2, 2]
+        assert capacities_from_column(esn_df, None).tolist() == [1, 1]
+
+    def test_implausible_numbers_are_clipped(self):
+        esn_df = pd.DataFrame({"How many buddies?": ["since 2024", "+421 900 123 456", "3"]})
+        capacities = capacities_from_column(esn_df, "How many buddies?", max_capacity=5)
+        assert capacities.tolist() == [5, 5, 3]
+
+
+class TestOptimalAssignment:
+    """Test the minimum-distance capacitated solver."""
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        distances = rng.integers(0, 10, size=(3, 5)).astype(float)
+        capacities = np.array([2, 2, 1])
+
+        pairs = optimal_assignment(distances, capacities)
+
+        assert len(pairs) == 5
+        assert assignment_cost(distances, pairs) == _brute_force_cost(distances, capacities)
+
+    def test_respects_capacities(self):
+        distances = np.zeros((2, 6))
+        pairs = optimal_assignment(distances, np.array([1, 2]))
+
+        assert len(pairs) == 3
+        assert np.bincount(pairs[:, 0], minlength=2).tolist() == [1, 2]
+        assert len(set(pairs[:, 1].tolist())) == 3
+
+    def test_fixed_pairs_consume_capacity(self):
+        distances = np.array([[0.0, 0.0, 5.0], [9.0, 9.0, 9.0]])
+        pairs = optimal_assignment(distances, np.array([1, 2]), fixed_pairs=[(0, 2)])
+
+        # ESN 0 is full, so both remaining students go to ESN 1
+        assert pairs.tolist() == [[1, 0], [1, 1]]
+
+    def test_huge_capacities_match_brute_force(self):
+        rng = np.random.default_rng(3)
+        distances = rng.integers(0, 10, size=(3, 6)).astype(float)
+        # ESN 0 is closest to everyone, so it needs more than its first slot cap
+        distances[0] = 0
+        capacities = np.array([10 ** 9, 10 ** 9, 1])
+
+        pairs = optimal_assignment(distances, capacities)
+
+        assert len(pairs) == 6
+        assert pairs[:, 0].tolist() == [0] * 6
+        assert assignment_cost(distances, pairs) == _brute_force_cost(distances, capacities)
+
+    def test_capped_slots_match_full_expansion(self):
+        rng = np.random.default_rng(11)
+        distances = rng.integers(0, 16, size=(30, 40)).astype(float)
+        capacities = rng.integers(1, 8, size=30)
+
+        pairs = optimal_assignment(distances, capacities)
+
+        slot_owner = np.repeat(np.arange(30), capacities)
+        rows, cols = linear_sum_assignment(distances[slot_owner])
+        assert len(pairs) == 40
+        assert assignment_cost(distances, pairs) == distances[slot_owner[rows], cols].sum()
+
+
+class TestGreedyAssignment:
+    """Test the bucketed greedy strategy."""
+
+    def test_takes_closest_pairs_first(self):
+        distances = np.array([[1.0, 0.0, 3.0], [0.0, 2.0, 2.0]])
+        pairs = greedy_assignment(distances, np.array([1, 2]))
+
+        assert pairs.tolist() == [[0, 1], [1, 0], [1, 2]]
+
+    def test_respects_capacities_and_fixed(self):
+        rng = np.random.default_rng(3)
+        distances = rng.integers(0, 8, size=(4, 20)).astype(float)
+        capacities = np.array([3, 1, 2, 4])
+
+        pairs = greedy_assignment(distances, capacities, fixed_pairs=[(3, 0)])
+
+        assert len(pairs) == 9
+        assert np.bincount(pairs[:, 0], minlength=4).tolist() == [3, 1, 2, 3]
+        assert 0 not in pairs[:, 1]
+        assert len(set(pairs[:, 1].tolist())) == len(pairs)
+
+
+class TestStableAssignment:
+    """Test the deferred-acceptance strategy."""
+
+    def test_result_is_stable(self):
+        rng = np.random.default_rng(11)
+        distances = rng.integers(0, 10, size=(5, 12)).astype(float)
+        capacities = np.array([2, 2, 2, 2, 2])
+
+        pairs = stable_assignment(distances, capacities, top_k=12)
+        owner = {int(s): int(e) for e, s in pairs}
+        load = np.bincount(pairs[:, 0], minlength=5)
+
+        # No blocking pair: an ESN member with a free slot or a worse student
+        # never prefers a student who would also prefer them.
+        for esn in range(5):
+            worst = max((distances[esn, s] for s, e in owner.items() if e == esn), default=np.inf)
+            for student in range(12):
+                if owner.get(student) == esn:
+                    continue
+                esn_wants = load[esn] < capacities[esn] or distances[esn, student] < worst
+                current = owner.get(student)
+                student_wants = current is None or (distances[esn, student], esn) < (
+                    distances[current, student], current
+                )
+                assert not (esn_wants and student_wants)
+
+    def test_only_assigns_from_top_k(self):
+        distances = np.array([[0.0, 1.0, 5.0, 6.0]])
+        pairs = stable_assignment(distances, np.array([4]), top_k=2)
+
+        assert pairs.tolist() == [[0, 0], [0, 1]]
+
+
+def test_solve_rejects_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown assignment strategy"):
+        solve(np.zeros((1, 1)), np.array([1]), strategy="random")
+
+
+class TestSolveAssignments:
+    """Test building an AssignmentState from the solver."""
+
+    def test_keeps_manual_assignments(self):
+        distances = np.array([[0.0, 1.0, 4.0], [3.0, 0.0, 2.0]])
+        esn_df = pd.DataFrame({"Name": ["E0", "E1"], "Surname": ["A", "B"]})
+        erasmus_df = pd.DataFrame({"Name": ["S0", "S1", "S2"], "Surname": ["X", "Y", "Z"]})
+
+        manual = AssignmentState()
+        manual.add_assignment(1, 0, "E1", "B", "S0", "X")
+
+        result = solve_assignments(
+            distances, np.array([1, 2]), fixed=manual, esn_df=esn_df, erasmus_df=erasmus_df
+        )
+
+        assert result is not manual
+        assert manual.get_assignment_count() == 1
+        assert result.get_assignment(0).esn_index == 1
+        assert result.get_assignment(1).esn_index == 0
+        assert result.get_assignment(2).esn_index == 1
+        assert result.get_assignment(1).erasmus_name == "S1"
+
+
+class TestBestAvailablePairs:
+    """Test accepting the top available candidate for every ESN member."""
+
+    def test_conflicts_go_to_closest_then_key(self):
+        candidates = np.array([[5, 6], [5, 7], [5, 8]])
+        distances = np.array([[2.0, 3.0], [1.0, 4.0], [1.0, 2.0]])
+        taken = np.zeros(10, dtype=bool)
+
+        # ESN 1 and 2 tie on student 5; ESN 2 has the smaller key
+        pairs = best_available_pairs(candidates, distances, ["b", "z", "a"], taken)
+
+        assert pairs.tolist() == [[0, 6], [1, 7], [2, 5]]
+
+    def test_skips_taken_and_ineligible(self):
+        candidates = np.array([[1, 2], [1, -1], [3, 4]])
+        distances = np.zeros((3, 2))
+        taken = np.array([False, True, False, False, False])
+
+        pairs = best_available_pairs(candidates, distances, [0, 1, 2], taken, np.array([True, True, False]))
+
+        assert pairs.tolist() == [[0, 2]]
+
+
+def test_accept_top_candidates_is_one_change():
+    distances = np.array([[0.0, 1.0, 2.0], [0.0, 3.0, 1.0], [5.0, 5.0, 5.0]])
+    esn_df = pd.DataFrame({"Name": ["E0", "E1", "E2"], "Surname": ["A", "B", "C"], "ID": [3, 1, 2]})
+    erasmus_df = pd.DataFrame({"Name": ["S0", "S1", "S2"], "Surname": ["X", "Y", "Z"], "ID": [1, 2, 3]})
+    rankings = rank_candidates(distances, erasmus_df, top_k=2, identifier_column="ID")
+    state = AssignmentState()
+    state.add_assignment(2, 1)
+
+    added = accept_top_candidates(state, rankings, esn_df, erasmus_df, identifier_column="ID")
+
+    # E0 and E1 both want S0 at distance 0 and E1 comes first by ID; E0's
+    # other candidate S1 is taken and E2 already has a student
+    assert added == 1
+    assert state.get_assignment(0).esn_index == 1
+    assert state.get_assignment(0).erasmus_name == "S0"
+    assert state.get_assignments_for_esn(0) == []
+    assert len(state.log.events) == 2
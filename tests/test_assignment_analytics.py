@@ -0,0 +1,99 @@
+"""
+Test suite for incremental assignment analytics.
+"""
+import numpy as np
+
+from src.controller.assignment_analytics import AssignmentAnalytics
+from src.controller.assignments import AssignmentState
+
+
+def _distances(esn_count=5, erasmus_count=40, seed=3):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 8, size=(esn_count, erasmus_count)).astype(float)
+
+
+def _assert_same(incremental, fresh):
+    np.testing.assert_array_equal(incremental.load, fresh.load)
+    np.testing.assert_array_equal(incremental.histogram, fresh.histogram)
+    for left, right in zip(incremental.unassigned_by_best_match(), fresh.unassigned_by_best_match()):
+        np.testing.assert_array_equal(left, right)
+    assert incremental.summary() == fresh.summary()
+
+
+def test_aggregates_match_brute_force():
+    distances = _distances()
+    state = AssignmentState()
+    state.add_many([0, 0, 2, 4], [3, 9, 1, 20])
+    analytics = AssignmentAnalytics(distances)
+    analytics.sync(state)
+
+    np.testing.assert_array_equal(analytics.load, [2, 0, 1, 0, 1])
+    assigned = distances[[0, 0, 2, 4], [3, 9, 1, 20]].astype(int)
+    np.testing.assert_array_equal(analytics.histogram, np.bincount(assigned, minlength=8))
+
+    students, best, best_esn = analytics.unassigned_by_best_match()
+    assert set(students) == set(range(40)) - {3, 9, 1, 20}
+    np.testing.assert_array_equal(best, distances[:, students].min(axis=0))
+    assert list(best) == sorted(best)
+    np.testing.assert_array_equal(best_esn, distances[:, students].argmin(axis=0))
+
+
+def test_incremental_updates_match_rebuild():
+    distances = _distances()
+    capacities = np.array([2, 1, 3, 1, 2])
+    state = AssignmentState()
+    analytics = AssignmentAnalytics(distances, capacities)
+    analytics.sync(state)
+
+    rng = np.random.default_rng(11)
+    for step in range(60):
+        free = sorted(set(range(40)) - set(state.get_assigned_erasmus_indices()))
+        if step % 4 == 3 and state.get_assignment_count():
+            state.remove_assignment(sorted(state.get_assigned_erasmus_indices())[0])
+        elif step % 9 == 8:
+            state.undo()
+        else:
+            state.add_assignment(int(rng.integers(0, 5)), int(rng.choice(free)))
+        analytics.sync(state)
+
+        fresh = AssignmentAnalytics(distances, capacities)
+        fresh.sync(state)
+        _assert_same(analytics, fresh)
+
+    assert analytics.rebuilds == 1
+
+
+def test_full_members_are_excluded_from_best_match():
+    distances = np.array([[0.0, 0.0, 5.0], [3.0, 4.0, 1.0]])
+    state = AssignmentState()
+    analytics = AssignmentAnalytics(distances, capacities=np.array([1, 1]))
+
+    state.add_assignment(0, 0)
+    analytics.sync(state)
+    students, best, best_esn = analytics.unassigned_by_best_match()
+    assert list(students) == [2, 1]
+    assert list(best) == [1.0, 4.0]
+    assert list(best_esn) == [1, 1]
+
+    state.add_assignment(1, 2)
+    analytics.sync(state)
+    students, best, best_esn = analytics.unassigned_by_best_match()
+    assert list(students) == [1] and np.isinf(best[0]) and best_esn[0] == -1
+    assert analytics.summary()["esn_at_capacity"] == 2
+
+    state.clear_all()
+    analytics.sync(state)
+    assert list(analytics.unassigned_by_best_match()[1]) == [0.0, 0.0, 1.0]
+    assert analytics.summary()["assigned"] == 0
+
+
+def test_new_state_rebuilds():
+    distances = _distances()
+    state = AssignmentState()
+    state.add_assignment(1, 1)
+    analytics = AssignmentAnalytics(distances)
+    analytics.sync(state)
+
+    analytics.sync(AssignmentState())
+    assert analytics.load.sum() == 0
+    assert analytics.rebuilds == 2
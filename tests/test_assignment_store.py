@@ -0,0 +1,188 @@
+"""
+Test suite for the persistent SQLite assignment store.
+"""
+import sqlite3
+
+import pytest
+
+from src.controller.assignment_store import default_db_path, open_assignment_state
+from src.controller.assignments import AssignmentConflictError
+from src.controller.pipeline import run_pipeline_from_config
+
+
+def test_changes_survive_reopen(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    state = open_assignment_state(db_path, "run-a")
+    state.add_assignment(0, 5, "John", "Doe", "Jane", "Smith")
+    state.add_assignment(1, 6)
+    state.add_assignment(0, 7)
+    state.remove_assignment(6)
+    state.close()
+
+    reloaded = open_assignment_state(db_path, "run-a")
+
+    assert [a.erasmus_index for a in reloaded.assignments] == [5, 7]
+    assert reloaded.get_assignment(5).erasmus_name == "Jane"
+    assert [a.erasmus_index for a in reloaded.get_assignments_for_esn(0)] == [5, 7]
+    reloaded.close()
+
+
+def test_runs_are_isolated_by_fingerprint(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    state_a = open_assignment_state(db_path, "run-a")
+    state_a.add_assignment(0, 1)
+    state_b = open_assignment_state(db_path, "run-b")
+    state_b.add_assignment(2, 1)
+    state_b.clear_all()
+
+    assert open_assignment_state(db_path, "run-a").get_assignment_count() == 1
+    assert open_assignment_state(db_path, "run-b").get_assignment_count() == 0
+
+
+def test_database_uses_wal(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    open_assignment_state(db_path, "run-a").close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_duplicate_assign_is_rejected_without_writing(tmp_path):
+    state = open_assignment_state(tmp_path / "assignments.db", "run-a")
+    state.add_assignment(0, 1)
+
+    with pytest.raises(ValueError, match="already assigned"):
+        state.add_assignment(2, 1)
+    assert open_assignment_state(tmp_path / "assignments.db", "run-a").get_assignment(1).esn_index == 0
+
+
+def test_default_db_path():
+    assert str(default_db_path({"output": {"out_dir": "out"}})) == "out/assignments.db"
+    assert str(default_db_path({"output": {"assignment_db": "x/a.db"}})) == "x/a.db"
+    assert default_db_path({"output": {"assignment_db": False}}) is None
+
+
+def test_event_log_and_undo_are_persisted(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    state = open_assignment_state(db_path, "run-a")
+    state.add_assignment(0, 1)
+    state.add_assignment(0, 2)
+    state.clear_all()
+    state.undo()
+    state.close()
+
+    reloaded = open_assignment_state(db_path, "run-a")
+
+    assert sorted(reloaded.get_assigned_erasmus_indices()) == [1, 2]
+    assert [e.action for e in reloaded.log.events] == ["assign", "assign", "clear", "assign"]
+    assert sorted(reloaded.log.replay().get_assigned_erasmus_indices()) == [1, 2]
+    # Further changes continue the sequence
+    reloaded.remove_assignment(1)
+    assert reloaded.log.events[-1].seq == 5
+
+
+def test_conflicting_assign_from_another_session_fails_fast(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    alice = open_assignment_state(db_path, "run-a")
+    bob = open_assignment_state(db_path, "run-a")
+
+    alice.add_assignment(0, 7)
+    # Bob has not synced yet, so student 7 still looks free to him
+    with pytest.raises(AssignmentConflictError, match="changed by another session"):
+        bob.add_assignment(1, 7)
+
+    # The conflict brought Bob up to date
+    assert bob.get_assignment(7).esn_index == 0
+    assert open_assignment_state(db_path, "run-a").get_assignment(7).esn_index == 0
+
+
+def test_unrelated_changes_do_not_conflict(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    alice = open_assignment_state(db_path, "run-a")
+    bob = open_assignment_state(db_path, "run-a")
+
+    alice.add_assignment(0, 1)
+    bob.add_assignment(1, 2)
+    alice.remove_assignment(1)
+
+    assert bob.sync() == 1
+    assert sorted(bob.get_assigned_erasmus_indices()) == [2]
+    assert [e.seq for e in bob.log.events] == [1, 2, 3]
+    # Alice picked up Bob's change while writing her own
+    assert alice.sync() == 0
+    assert sorted(alice.get_assigned_erasmus_indices()) == [2]
+
+
+def test_sync_is_cheap_when_nothing_changed(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    alice = open_assignment_state(db_path, "run-a")
+    bob = open_assignment_state(db_path, "run-a")
+
+    assert bob.sync() == 0
+    alice.add_assignment(0, 1)
+    alice.add_assignment(0, 2)
+    assert bob.sync() == 2
+    assert bob.sync() == 0
+    assert [a.erasmus_index for a in bob.get_assignments_for_esn(0)] == [1, 2]
+
+
+def test_undo_of_change_overwritten_elsewhere_conflicts(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    alice = open_assignment_state(db_path, "run-a")
+    bob = open_assignment_state(db_path, "run-a")
+
+    alice.add_assignment(0, 1)
+    bob.sync()
+    bob.remove_assignment(1)
+    bob.add_assignment(2, 1)
+
+    with pytest.raises(AssignmentConflictError):
+        alice.undo()
+    assert alice.get_assignment(1).esn_index == 2
+    assert not alice.can_undo()
+
+
+def test_undo_and_redo_after_synced_remote_change_conflict(tmp_path):
+    db_path = tmp_path / "assignments.db"
+    alice = open_assignment_state(db_path, "run-a")
+    bob = open_assignment_state(db_path, "run-a")
+
+    # Undo after Alice synced Bob's reassignment must not delete it
+    alice.add_assignment(1, 7)
+    bob.sync()
+    bob.remove_assignment(7)
+    bob.add_assignment(2, 7)
+    alice.sync()
+    with pytest.raises(AssignmentConflictError):
+        alice.undo()
+    assert open_assignment_state(db_path, "run-a").get_assignment(7).esn_index == 2
+
+    # Redo of an assign after Bob (synced) took the student again
+    alice.add_assignment(1, 8)
+    alice.undo()
+    bob.sync()
+    bob.add_assignment(3, 8)
+    alice.sync()
+    with pytest.raises(AssignmentConflictError):
+        alice.redo()
+    assert not alice.can_redo()
+    assert open_assignment_state(db_path, "run-a").get_assignment(8).esn_index == 3
+
+
+def test_assignments_survive_export_and_ranking_changes(tmp_path, make_config, pipeline_inputs):
+    def run(top_k, formats, question_columns=("Q1", "Q2")):
+        config = make_config(top_k=top_k, question_columns=question_columns, formats=formats, export_mode="lazy")
+        return run_pipeline_from_config(config, input_override=pipeline_inputs)
+
+    db_path = tmp_path / "assignments.db"
+    first = run(top_k=1, formats=["xlsx"])
+    state = open_assignment_state(db_path, first.run_key)
+    state.add_assignment(0, 1)
+    state.close()
+
+    changed = run(top_k=2, formats=["csv", "parquet"])
+    assert changed.fingerprint != first.fingerprint
+    assert open_assignment_state(db_path, changed.run_key).get_assignment(1).esn_index == 0
+
+    other_questions = run(top_k=1, formats=["xlsx"], question_columns=("Q1",))
+    assert other_questions.run_key != first.run_key
@@ -179,3 +179,116 @@ class TestAssignmentState:
         assert state.get_assignment_count() == 2
         esn_0_assignments = state.get_assignments_for_esn(0)
         assert len(esn_0_assignments) == 2
+
+    def test_indexes_stay_consistent_after_remove_and_readd(self):
+        """Test that per-ESN lookups and ordering follow removals and re-adds."""
+        state = AssignmentState()
+
+        state.add_assignment(esn_index=0, erasmus_index=10)
+        state.add_assignment(esn_index=0, erasmus_index=20)
+        state.add_assignment(esn_index=1, erasmus_index=30)
+
+        assert state.remove_assignment(10) is True
+        assert [a.erasmus_index for a in state.get_assignments_for_esn(0)] == [20]
+
+        # Reassign the freed student to another ESN member
+        state.add_assignment(esn_index=1, erasmus_index=10)
+
+        assert state.get_assignment(10).esn_index == 1
+        assert [a.erasmus_index for a in state.get_assignments_for_esn(1)] == [30, 10]
+        assert [a.erasmus_index for a in state.assignments] == [20, 30, 10]
+        assert state.get_assigned_erasmus_indices() == {10, 20, 30}
+
+        state.remove_assignment(20)
+        assert state.get_assignments_for_esn(0) == []
+
+
+class TestAssignmentHistory:
+    """Test the event log, undo/redo and replay."""
+
+    def test_undo_redo_single_changes(self):
+        state = AssignmentState()
+        state.add_assignment(esn_index=0, erasmus_index=10)
+        state.add_assignment(esn_index=1, erasmus_index=20)
+        state.remove_assignment(10)
+
+        assert state.undo() is True
+        assert state.get_assignment(10).esn_index == 0
+        assert state.undo() is True
+        assert not state.is_erasmus_assigned(20)
+        assert state.redo() is True
+        assert state.get_assignment(20).esn_index == 1
+        assert state.can_redo()
+
+        # A new change drops the redo stack
+        state.add_assignment(esn_index=2, erasmus_index=30)
+        assert not state.can_redo()
+        assert state.redo() is False
+
+    def test_undo_clear_restores_everything(self):
+        state = AssignmentState()
+        for erasmus_index in range(5):
+            state.add_assignment(esn_index=erasmus_index % 2, erasmus_index=erasmus_index)
+        state.clear_all()
+
+        assert state.undo() is True
+        assert state.get_assignment_count() == 5
+        assert [a.erasmus_index for a in state.get_assignments_for_esn(1)] == [1, 3]
+
+    def test_log_is_append_only(self):
+        state = AssignmentState()
+        state.add_assignment(esn_index=0, erasmus_index=10)
+        state.undo()
+        state.redo()
+
+        events = state.log.events
+        assert [e.seq for e in events] == [1, 2, 3]
+        assert [(e.action, e.note) for e in events] == [("assign", ""), ("unassign", "undo"), ("assign", "redo")]
+
+    def test_replay_to_any_point(self):
+        state = AssignmentState()
+        # Enough changes to cross several snapshots
+        for erasmus_index in range(250):
+            state.add_assignment(esn_index=erasmus_index % 7, erasmus_index=erasmus_index)
+            if erasmus_index % 3 == 0:
+                state.remove_assignment(erasmus_index)
+
+        replayed = state.log.replay()
+        assert [a.erasmus_index for a in replayed.assignments] == [a.erasmus_index for a in state.assignments]
+        assert [a.erasmus_index for a in replayed.get_assignments_for_esn(3)] == \
+            [a.erasmus_index for a in state.get_assignments_for_esn(3)]
+
+        # Right after the 4th event: students 0 (added, removed), 1 and 2 added
+        assert sorted(state.log.replay(upto_seq=4).get_assigned_erasmus_indices()) == [1, 2]
+
+
+class TestAddMany:
+    """Test bulk assignment."""
+
+    def test_adds_all_pairs_as_one_undo_step(self):
+        state = AssignmentState()
+        added = state.add_many([0, 1, 0], [10, 11, 12], erasmus_names=["A", "B", "C"])
+
+        assert [a.erasmus_index for a in added] == [10, 11, 12]
+        assert state.get_assignment(11).erasmus_name == "B"
+        assert [a.erasmus_index for a in state.get_assignments_for_esn(0)] == [10, 12]
+        assert len(state.log.events) == 1
+
+        state.undo()
+        assert state.get_assignment_count() == 0
+
+    def test_conflicts_raise_without_changes(self):
+        state = AssignmentState()
+        state.add_assignment(esn_index=0, erasmus_index=10)
+
+        with pytest.raises(ValueError, match=r"\[10, 11\]"):
+            state.add_many([1, 2, 3], [10, 11, 11])
+        assert state.get_assignment_count() == 1
+
+    def test_skip_conflicts_keeps_first_mention(self):
+        state = AssignmentState()
+        state.add_assignment(esn_index=0, erasmus_index=10)
+
+        added = state.add_many([1, 2, 3], [10, 11, 11], esn_names=["x", "y", "z"], skip_conflicts=True)
+
+        assert [(a.esn_index, a.erasmus_index, a.esn_name) for a in added] == [(2, 11, "y")]
@@ -0,0 +1,104 @@
+"""Verify that batch runs share stage results across overlays and summarize every overlay."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+from src.controller.batch import (
+    deep_merge, load_config_set, load_overlays, run_batch, run_configs, write_summary
+)
+from src.controller.stage_cache import StageCache
+
+
+def test_deep_merge_keeps_unrelated_settings():
+    base = {"matching": {"metric": "hamming", "top_k": 5}, "schema": {"question_columns": ["Q1", "Q2"]}}
+    merged = deep_merge(base, {"matching": {"top_k": 1}, "schema": {"question_columns": ["Q1"]}})
+
+    assert merged == {"matching": {"metric": "hamming", "top_k": 1}, "schema": {"question_columns": ["Q1"]}}
+    assert base["matching"]["top_k"] == 5
+
+
+def test_load_overlays_accepts_list_or_mapping(tmp_path):
+    listed = tmp_path / "list.yml"
+    listed.write_text("- matching: {top_k: 1}\n- name: two\n  matching: {top_k: 2}\n")
+    mapped = tmp_path / "mapped.yml"
+    mapped.write_text("overlays:\n  - matching: {top_k: 3}\n")
+
+    assert load_overlays(listed)[1] == {"name": "two", "matching": {"top_k": 2}}
+    assert load_overlays(mapped) == [{"matching": {"top_k": 3}}]
+
+
+def test_overlays_share_inputs_and_distances(tmp_path, make_csv_config):
+    cache = StageCache(entries_per_stage=3)
+    overlays = [
+        {"name": "top1", "matching": {"top_k": 1}},
+        {"name": "top2", "matching": {"top_k": 2}},
+        {"name": "q1", "schema": {"question_columns": ["Q1"]}},
+    ]
+    summary = run_batch(make_csv_config(), overlays, cache=cache)
+
+    assert summary["name"].tolist() == ["top1", "top2", "q1"]
+    assert (summary["status"] == "ok").all()
+    assert summary["top_k"].tolist() == [1, 2, 2]
+    assert summary["questions"].tolist() == [2, 2, 1]
+    # Files are read once; distances are only recomputed for the other question set
+    assert cache.misses["read_esn"] == 1 and cache.misses["read_erasmus"] == 1
+    assert cache.misses["match"] == 2
+    for name in ("top1", "top2", "q1"):
+        assert (tmp_path / "out" / name).is_dir()
+
+
+def test_failed_overlay_does_not_stop_the_rest(tmp_path, make_csv_config):
+    overlays = [{"name": "bad", "matching": {"metric": "cosine"}}, {"name": "good"}]
+    summary = run_batch(make_csv_config(), overlays, cache=StageCache())
+
+    assert summary["status"].tolist() == ["failed", "ok"]
+    assert "Unsupported matching metric" in summary.loc[0, "error"]
+
+    path = write_summary(summary, tmp_path / "out")
+    assert pd.read_csv(path)["name"].tolist() == ["bad", "good"]
+
+
+def _write_config(path, config):
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def test_configs_run_concurrently_and_share_reads(tmp_path, make_csv_config):
+    configs_dir = tmp_path / "configs"
+    configs_dir.mkdir()
+    for section, top_k in (("a", 1), ("b", 2), ("c", 2)):
+        config = make_csv_config(top_k=top_k)
+        config["output"]["out_dir"] = str(tmp_path / "out" / section)
+        _write_config(configs_dir / f"{section}.yml", config)
+    broken = make_csv_config()
+    broken["input"]["esn_csv"] = "missing.csv"
+    _write_config(configs_dir / "d.yml", broken)
+
+    cache = StageCache(entries_per_stage=4)
+    report = run_configs(load_config_set(configs_dir), max_workers=4, cache=cache)
+
+    assert [Path(name).stem for name in report["name"]] == ["a", "b", "c", "d"]
+    assert report["status"].tolist() == ["ok", "ok", "ok", "failed"]
+    assert report.loc[3, "error"]
+    assert report["wall_seconds"].notna().all()
+    # The shared Erasmus file is read once although the runs overlap
+    assert cache.misses["read_erasmus"] == 1
+    assert cache.misses["match"] == 1
+    for section in ("a", "b", "c"):
+        assert list((tmp_path / "out" / section).glob("*.xlsx"))
+
+
+def test_manifest_paths_are_relative_to_it(tmp_path):
+    (tmp_path / "sections").mkdir()
+    _write_config(tmp_path / "sections" / "one.yml", {})
+    manifest = tmp_path / "manifest.yml"
+    manifest.write_text("configs:\n  - sections/one.yml\n")
+
+    assert load_config_set(manifest) == [tmp_path / "sections" / "one.yml"]
+
+    manifest.write_text("configs:\n  - sections/two.yml\n")
+    with pytest.raises(FileNotFoundError, match="two.yml"):
+        load_config_set(manifest)
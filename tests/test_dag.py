@@ -0,0 +1,94 @@
+"""
+Test suite for the pipeline DAG executor.
+"""
+import threading
+
+import pytest
+
+from src.controller.dag import DagExecutor, Node, topological_order
+from src.controller.stage_cache import StageCache
+
+
+def test_independent_nodes_overlap():
+    # Both sides must be running at the same time to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def side(value):
+        barrier.wait()
+        return value
+
+    nodes = [
+        Node("left", lambda: side(1), outputs=("left",)),
+        Node("right", lambda: side(2), outputs=("right",)),
+        Node("sum", lambda left, right: left + right, inputs=("left", "right"), outputs=("total",)),
+    ]
+    values, metrics = DagExecutor(max_workers=2).run(nodes)
+
+    assert values["total"] == 3
+    assert [record.stage for record in metrics] == ["left", "right", "sum"]
+
+
+def test_nodes_are_cached_by_chained_keys():
+    calls = []
+
+    def nodes(scale):
+        return [
+            Node("load", lambda: calls.append("load") or 10, outputs=("data",), params="file-v1"),
+            Node(
+                "scale", lambda data: calls.append("scale") or data * scale,
+                inputs=("data",), outputs=("scaled",), params=scale
+            ),
+        ]
+
+    executor = DagExecutor(cache=StageCache())
+    assert executor.run(nodes(2))[0]["scaled"] == 20
+    values, metrics = executor.run(nodes(3))
+
+    assert values["scaled"] == 30
+    assert calls == ["load", "scale", "scale"]
+    assert [record.cached for record in metrics] == [True, False]
+
+
+def test_progress_is_forwarded_on_calling_thread():
+    caller = threading.current_thread()
+    reports = []
+
+    def work(progress):
+        for done in range(1, 4):
+            progress(done, 3)
+        return "ok"
+
+    def on_progress(stage, done, total):
+        assert threading.current_thread() is caller
+        reports.append((stage, done, total))
+
+    DagExecutor().run([Node("work", work, outputs=("out",), reports_progress=True)], progress=on_progress)
+
+    assert reports == [("work", 0, 1), ("work", 1, 3), ("work", 2, 3), ("work", 3, 3), ("work", 1, 1)]
+
+
+def test_failure_cancels_dependents():
+    ran = []
+
+    def fail():
+        raise ValueError("broken input")
+
+    nodes = [
+        Node("load", fail, outputs=("data",)),
+        Node("use", lambda data: ran.append(data), inputs=("data",), outputs=("used",)),
+    ]
+    with pytest.raises(ValueError, match="broken input"):
+        DagExecutor().run(nodes)
+    assert ran == []
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="nobody produces"):
+        topological_order([Node("a", lambda x: x, inputs=("x",), outputs=("y",))])
+    with pytest.raises(ValueError, match="Cycle"):
+        topological_order([
+            Node("a", lambda y: y, inputs=("y",), outputs=("x",)),
+            Node("b", lambda x: x, inputs=("x",), outputs=("y",)),
+        ])
+    with pytest.raises(ValueError, match="more than once"):
+        topological_order([Node("a", lambda: 1, outputs=("x",)), Node("b", lambda: 2, outputs=("x",))])
@@ -2,9 +2,11 @@
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pytest
 
-from src.model.rank import ESNRanking, RankedCandidate
+from src.model.rank import ErasmusRanking, ESNRanking, RankedCandidate, RankedESN
 from src.view import export_xlsx
 
 
@@ -38,3 +40,118 @@ def test_export_creates_workbook_with_summary(tmp_path):
     xls = pd.ExcelFile(out_path)
     assert "Summary" in xls.sheet_names
     assert any(sheet for sheet in xls.sheet_names if sheet != "Summary")
+
+
+def _long_format_fixture(tmp_path, formats):
+    esn_df = pd.DataFrame([
+        {"Name": "Anna", "Surname": "Alpha", "Q01": "A", "Q02": "B"},
+    ])
+    erasmus_df = pd.DataFrame([
+        {"Name": "Eva", "Surname": "Delta", "Email": "e@example.com", "Q01": "A", "Q02": None},
+        {"Name": "Fred", "Surname": "Epsilon", "Email": "f@example.com", "Q01": "B", "Q02": "A"},
+    ])
+    rankings = [
+        ESNRanking(
+            esn_index=0,
+            candidates=[
+                RankedCandidate(erasmus_index=0, distance=0.0),
+                RankedCandidate(erasmus_index=1, distance=2.0),
+            ],
+        )
+    ]
+    stats = {"esn_loaded": 1, "erasmus_loaded": 2, "esn_after_filter": 1, "erasmus_after_filter": 2}
+    config = {
+        "schema": {"question_columns": ["Q01", "Q02"], "answer_encoding": "AB"},
+        "matching": {"metric": "hamming", "top_k": 2},
+        "output": {"out_dir": str(tmp_path), "per_esner_sheets": True, "formats": formats},
+    }
+    esn_vectors = np.array([[0.0, 1.0]])
+    erasmus_vectors = np.array([[0.0, np.nan], [1.0, 0.0]])
+    return rankings, esn_df, erasmus_df, stats, config, esn_vectors, erasmus_vectors
+
+
+def test_export_long_format_csv(tmp_path):
+    rankings, esn_df, erasmus_df, stats, config, esn_vec, erasmus_vec = _long_format_fixture(tmp_path, ["xlsx", "csv"])
+
+    out_paths = export_xlsx.export_result_files(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=esn_vec, erasmus_vectors=erasmus_vec,
+    )
+
+    assert list(out_paths) == ["xlsx", "csv"]
+    assert out_paths["xlsx"].exists()
+    table = pd.read_csv(out_paths["csv"])
+    assert list(table.columns[:7]) == [
+        "esn_index", "rank", "erasmus_index", "distance", "compared", "same", "different",
+    ]
+    assert list(table["erasmus_index"]) == [0, 1]
+    assert list(table["compared"]) == [1, 2]
+    assert list(table["same"]) == [1, 0]
+    assert list(table["different"]) == [0, 2]
+    assert list(table["Email"]) == ["e@example.com", "f@example.com"]
+    assert "Q01" not in table.columns
+
+
+def test_export_long_format_parquet_only(tmp_path):
+    pytest.importorskip("pyarrow")
+    rankings, esn_df, erasmus_df, stats, config, esn_vec, erasmus_vec = _long_format_fixture(tmp_path, ["parquet"])
+
+    out_path = export_xlsx.export_results(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=esn_vec, erasmus_vectors=erasmus_vec,
+    )
+
+    assert out_path.suffix == ".parquet"
+    table = pd.read_parquet(out_path)
+    assert len(table) == 2
+    assert not list(tmp_path.glob("*.xlsx"))
+
+
+def test_export_rejects_unknown_format(tmp_path):
+    rankings, esn_df, erasmus_df, stats, config, _, _ = _long_format_fixture(tmp_path, ["pdf"])
+
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        export_xlsx.export_results(rankings, esn_df, erasmus_df, stats, config)
+
+
+def test_export_compact_layout_moves_context_to_students_sheet(tmp_path):
+    rankings, esn_df, erasmus_df, stats, config, esn_vec, erasmus_vec = _long_format_fixture(tmp_path, ["xlsx"])
+    config["output"]["layout"] = "compact"
+
+    out_path = export_xlsx.export_results(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=esn_vec, erasmus_vectors=erasmus_vec,
+    )
+
+    xls = pd.ExcelFile(out_path)
+    assert xls.sheet_names == ["Summary", "Students", "Anna Alpha"]
+    students = pd.read_excel(xls, "Students")
+    assert list(students["Erasmus ID"]) == [0, 1]
+    assert list(students["Email"]) == ["e@example.com", "f@example.com"]
+    member = pd.read_excel(xls, "Anna Alpha")
+    assert "Email" not in member.columns
+    assert list(member["Erasmus ID"]) == [0, 1]
+    assert list(member["Compared questions"]) == [1, 2]
+    assert list(member["Number of different answers"]) == [0, 2]
+
+
+def test_export_reverse_rankings_sheet_and_table(tmp_path):
+    rankings, esn_df, erasmus_df, stats, config, esn_vec, erasmus_vec = _long_format_fixture(tmp_path, ["xlsx", "csv"])
+    reverse = [
+        ErasmusRanking(erasmus_index=0, candidates=[RankedESN(esn_index=0, distance=0.0)]),
+        ErasmusRanking(erasmus_index=1, candidates=[RankedESN(esn_index=0, distance=2.0)]),
+    ]
+
+    out_paths = export_xlsx.export_result_files(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=esn_vec, erasmus_vectors=erasmus_vec, reverse_rankings=reverse,
+    )
+
+    assert list(out_paths) == ["xlsx", "csv", "csv_by_student"]
+    sheet = pd.read_excel(out_paths["xlsx"], sheet_name=export_xlsx.REVERSE_SHEET)
+    assert list(sheet["Student Name"]) == ["Eva", "Fred"]
+    assert list(sheet["ESN Name"]) == ["Anna", "Anna"]
+    assert list(sheet["Number of different answers"]) == [0, 2]
+    table = pd.read_csv(out_paths["csv_by_student"])
+    assert list(table["erasmus_index"]) == [0, 1]
+    assert list(table["compared"]) == [1, 2]
@@ -1,15 +1,20 @@
 """
 Test suite for assignment export functionality.
 """
+import io
 import tempfile
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from src.controller.assignments import Assignment, AssignmentState
 from src.view.export_assignments import (
+    build_assignment_log_frame,
+    build_assignments_frame,
     export_assignments_to_csv,
+    export_assignments_to_parquet,
     export_assignments_to_xlsx,
     generate_assignment_filename,
 )
@@ -174,3 +179,75 @@ class TestExportAssignments:
             assert len(df) == 5
             assert df.iloc[0]["ESN_Name"] == "ESN_0"
             assert df.iloc[4]["ESN_Name"] == "ESN_4"
+
+
+class TestBuildAssignmentsFrame:
+    """Test the shared assignment frame builder."""
+
+    def _data(self):
+        esn_df = pd.DataFrame({
+            "Name": ["Alice", "Carol"],
+            "Surname": ["Brown", "White"],
+            "Notes": [None, None],
+            "Q1": ["A", "B"],
+            "Q2": ["B", None],
+        })
+        erasmus_df = pd.DataFrame({
+            "Name": ["Bob", "Dave", "Eve"],
+            "Surname": ["Green", "Black", "Grey"],
+            "Country": ["Spain", None, "Italy"],
+            "Q1": ["A", "A", "B"],
+            "Q2": ["A", "B", "B"],
+        })
+        esn_vectors = np.array([[0.0, 1.0], [1.0, np.nan]])
+        erasmus_vectors = np.array([[0.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+        assignments = [
+            Assignment(esn_index=0, erasmus_index=2, timestamp="t1"),
+            Assignment(esn_index=1, erasmus_index=1, timestamp="t2"),
+            Assignment(esn_index=0, erasmus_index=0, timestamp="t3"),
+        ]
+        return assignments, esn_df, erasmus_df, esn_vectors, erasmus_vectors
+
+    def test_counts_are_nan_aware(self):
+        assignments, esn_df, erasmus_df, esn_vectors, erasmus_vectors = self._data()
+
+        frame = build_assignments_frame(
+            assignments, esn_df, erasmus_df, ["Q1", "Q2"], esn_vectors, erasmus_vectors
+        )
+
+        assert list(frame["Erasmus_Name"]) == ["Eve", "Dave", "Bob"]
+        assert list(frame["Matching_Answers"]) == [1, 0, 1]
+        assert list(frame["Compared_Questions"]) == [2, 1, 2]
+        assert list(frame["Assignment_Timestamp"]) == ["t1", "t2", "t3"]
+        # Question columns and all-empty columns are not exported
+        assert "ESN_Q1" not in frame.columns
+        assert "ESN_Notes" not in frame.columns
+        assert "Erasmus_Country" in frame.columns
+
+    def test_csv_xlsx_and_parquet_share_columns(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        assignments, esn_df, erasmus_df, esn_vectors, erasmus_vectors = self._data()
+        args = (esn_df, erasmus_df, ["Q1", "Q2"], esn_vectors, erasmus_vectors)
+
+        csv_df = pd.read_csv(io.BytesIO(export_assignments_to_csv(assignments, *args)))
+        xlsx_df = pd.read_excel(export_assignments_to_xlsx(assignments, tmp_path / "a.xlsx", *args))
+        parquet_df = pd.read_parquet(export_assignments_to_parquet(assignments, tmp_path / "a.parquet", *args))
+
+        assert list(csv_df.columns) == list(xlsx_df.columns) == list(parquet_df.columns)
+        assert list(parquet_df["Matching_Answers"]) == [1, 0, 1]
+
+
+def test_assignment_log_frame_lists_every_change():
+    state = AssignmentState()
+    state.add_assignment(0, 1, "Ann", "A", "Bob", "B")
+    state.add_assignment(1, 2)
+    state.clear_all()
+    state.undo()
+
+    frame = build_assignment_log_frame(state.log.events)
+
+    assert list(frame["Seq"]) == [1, 2, 3, 3, 4, 4]
+    assert list(frame["Action"]) == ["assign", "assign", "clear", "clear", "assign", "assign"]
+    assert list(frame["Note"]) == ["", "", "", "", "undo", "undo"]
+    assert frame.loc[0, "ESN Name"] == "Ann A"
+    assert frame.loc[0, "Erasmus Name"] == "Bob B"
@@ -0,0 +1,71 @@
+"""Verify that identical runs reuse the previous export instead of rewriting it."""
+
+from src.controller import export_cache
+from src.controller.pipeline import run_pipeline_from_config
+
+
+def test_identical_run_reuses_previous_export(tmp_path, make_config, pipeline_inputs):
+    first = run_pipeline_from_config(make_config(), input_override=pipeline_inputs)
+    second = run_pipeline_from_config(make_config(), input_override=pipeline_inputs)
+
+    assert first.reused_output_path is None
+    assert second.fingerprint == first.fingerprint
+    assert second.reused_output_path == first.output_path
+    assert second.output_path == first.output_path
+    assert len(list(tmp_path.glob("*.xlsx"))) == 1
+
+
+def test_config_change_produces_new_export(make_config, pipeline_inputs):
+    first = run_pipeline_from_config(make_config(top_k=2), input_override=pipeline_inputs)
+    second = run_pipeline_from_config(make_config(top_k=3), input_override=pipeline_inputs)
+
+    assert second.fingerprint != first.fingerprint
+    assert second.reused_output_path is None
+    assert second.output_path != first.output_path
+    assert first.output_path.exists()
+
+
+def test_cache_can_be_disabled(tmp_path, make_config, pipeline_inputs):
+    first = run_pipeline_from_config(make_config(export_cache=False), input_override=pipeline_inputs)
+    second = run_pipeline_from_config(make_config(export_cache=False), input_override=pipeline_inputs)
+
+    assert second.reused_output_path is None
+    assert not (tmp_path / export_cache.CACHE_INDEX_NAME).exists()
+    assert first.fingerprint == second.fingerprint
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    old_file = tmp_path / "old.xlsx"
+    new_file = tmp_path / "new.xlsx"
+    untracked = tmp_path / "notes.txt"
+    for path in (old_file, new_file, untracked):
+        path.write_bytes(b"x" * 100)
+    export_cache.record(tmp_path, "old", {"xlsx": old_file})
+    export_cache.record(tmp_path, "new", {"xlsx": new_file})
+
+    evicted = export_cache.prune(tmp_path, max_bytes=150, keep="new")
+
+    assert evicted == 1
+    assert not old_file.exists()
+    assert new_file.exists()
+    assert untracked.exists()
+    assert export_cache.lookup(tmp_path, "old") is None
+    assert export_cache.lookup(tmp_path, "new") == {"xlsx": new_file}
+
+
+def test_reused_export_reports_workbook(make_config, pipeline_inputs):
+    config = make_config(formats=["xlsx", "csv"])
+    first = run_pipeline_from_config(config, input_override=pipeline_inputs)
+    second = run_pipeline_from_config(config, input_override=pipeline_inputs)
+
+    assert first.output_path.suffix == ".xlsx"
+    assert second.reused_output_path.suffix == ".xlsx"
+    assert second.output_path == first.output_path
+
+
+def test_code_change_produces_new_fingerprint(monkeypatch, make_config, pipeline_inputs):
+    erasmus_df, esn_df = pipeline_inputs
+    before = export_cache.compute_fingerprint(esn_df, erasmus_df, make_config())
+    monkeypatch.setattr(export_cache, "code_version", lambda: "patched")
+
+    assert export_cache.compute_fingerprint(esn_df, erasmus_df, make_config()) != before
@@ -0,0 +1,35 @@
+"""Verify background export jobs report progress and can be cancelled."""
+
+from src.controller.export_jobs import ExportJob, start_export_job
+from src.controller.pipeline import run_pipeline_from_config
+
+
+def test_background_export_reports_progress(make_config, pipeline_inputs):
+    artifacts = run_pipeline_from_config(make_config(export_mode="lazy"), input_override=pipeline_inputs)
+
+    job = start_export_job(artifacts)
+    job.wait(timeout=30)
+
+    assert job.status == "done"
+    assert job.output_path.exists()
+    # The worker leaves the artifacts alone until the owner records the result
+    assert artifacts.output_path is None
+    job.record_on(artifacts)
+    assert artifacts.output_path == job.output_path
+    assert artifacts.metrics[-1].stage == "export"
+    # Two per-ESN sheets plus the workbook save
+    assert (job.steps_done, job.steps_total) == (3, 3)
+    assert job.fraction == 1.0
+
+
+def test_cancelled_export_leaves_no_file(tmp_path, make_config, pipeline_inputs):
+    artifacts = run_pipeline_from_config(make_config(export_mode="lazy"), input_override=pipeline_inputs)
+
+    # Run the worker body synchronously with the cancel flag already set
+    job = ExportJob()
+    job.cancel()
+    job._run(artifacts)
+
+    assert job.status == "cancelled"
+    assert artifacts.output_path is None
+    assert not list(tmp_path.glob("*.xlsx"))
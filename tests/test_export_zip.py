@@ -0,0 +1,45 @@
+"""Ensure the ZIP bundle holds a Summary CSV and one CSV per ESN member."""
+
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from src.model.rank import ESNRanking, RankedCandidate
+from src.view import export_zip
+
+
+def test_zip_bundle_contains_one_csv_per_esn_member():
+    esn_df = pd.DataFrame([
+        {"Name": "Anna", "Surname": "Alpha"},
+        {"Name": "Anna", "Surname": "Alpha"},
+    ])
+    erasmus_df = pd.DataFrame([
+        {"Name": "Eva", "Surname": "Delta", "Q01": "A"},
+        {"Name": "Fred", "Surname": "Epsilon", "Q01": "B"},
+    ])
+    rankings = [
+        ESNRanking(esn_index=0, candidates=[RankedCandidate(erasmus_index=1, distance=0.0)]),
+        ESNRanking(esn_index=1, candidates=[RankedCandidate(erasmus_index=0, distance=1.0)]),
+    ]
+    stats = {"erasmus_after_filter": 2}
+    config = {
+        "schema": {"question_columns": ["Q01"]},
+        "matching": {"metric": "hamming", "top_k": 1},
+    }
+
+    data = export_zip.per_esn_csv_zip_bytes(
+        rankings, esn_df, erasmus_df, stats, config,
+        esn_vectors=np.array([[1.0], [1.0]]),
+        erasmus_vectors=np.array([[0.0], [1.0]]),
+    )
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == ["Summary.csv", "Anna Alpha.csv", "Anna Alpha_2.csv"]
+        first = pd.read_csv(archive.open("Anna Alpha.csv"))
+        second = pd.read_csv(archive.open("Anna Alpha_2.csv"))
+
+    assert list(first["Student Name"]) == ["Fred"]
+    assert list(second["Student Name"]) == ["Eva"]
+    assert list(second["Number of different answers"]) == [1]
@@ -0,0 +1,36 @@
+"""Verify deferred (lazy) export and subset workbooks."""
+
+import pandas as pd
+
+from src.controller.pipeline import export_artifacts, run_pipeline_from_config
+
+
+def test_lazy_mode_skips_export_until_requested(tmp_path, make_config, pipeline_inputs):
+    artifacts = run_pipeline_from_config(make_config(export_mode="lazy"), input_override=pipeline_inputs)
+
+    assert artifacts.output_path is None
+    assert not list(tmp_path.glob("*.xlsx"))
+
+    out_path = export_artifacts(artifacts)
+
+    assert out_path.exists()
+    assert artifacts.output_path == out_path
+
+
+def test_lazy_and_eager_share_the_cached_export(make_config, pipeline_inputs):
+    eager = run_pipeline_from_config(make_config(), input_override=pipeline_inputs)
+    lazy = run_pipeline_from_config(make_config(export_mode="lazy"), input_override=pipeline_inputs)
+
+    assert export_artifacts(lazy) == eager.output_path
+    assert lazy.reused_output_path == eager.output_path
+
+
+def test_subset_export_contains_only_selected_members(make_config, pipeline_inputs):
+    artifacts = run_pipeline_from_config(make_config(export_mode="lazy"), input_override=pipeline_inputs)
+
+    subset_path = export_artifacts(artifacts, esn_indices=[1])
+
+    sheets = pd.ExcelFile(subset_path).sheet_names
+    assert sheets == ["Summary", "Boris Beta"]
+    # Subset exports do not replace the full export on the artifacts
+    assert artifacts.output_path is None
@@ -0,0 +1,78 @@
+"""
+Test suite for assignment-aware rankings.
+"""
+import numpy as np
+import pandas as pd
+
+from src.controller.assignments import AssignmentState
+from src.controller.live_rankings import LiveRankings
+from src.model.rank import rank_candidates
+
+
+def _data(esn_count=4, erasmus_count=30, seed=5):
+    rng = np.random.default_rng(seed)
+    distances = rng.integers(0, 6, size=(esn_count, erasmus_count)).astype(float)
+    erasmus_df = pd.DataFrame({"ID": rng.permutation(erasmus_count) + 100})
+    return distances, erasmus_df
+
+
+def _indices(candidates):
+    return [c.erasmus_index for c in candidates]
+
+
+def test_matches_rank_stage_when_nothing_is_assigned():
+    distances, erasmus_df = _data()
+    rankings = rank_candidates(distances, erasmus_df, top_k=5, identifier_column="ID")
+    live = LiveRankings(distances, erasmus_df, top_k=5, identifier_column="ID")
+    live.sync(AssignmentState())
+
+    for ranking in rankings:
+        assert _indices(live.top(ranking.esn_index)) == _indices(ranking.candidates)
+
+
+def test_assigned_students_are_replaced_by_next_best():
+    distances, erasmus_df = _data()
+    full = rank_candidates(distances, erasmus_df, top_k=30, identifier_column="ID")[0]
+    live = LiveRankings(distances, erasmus_df, top_k=5, identifier_column="ID")
+    state = AssignmentState()
+
+    taken = _indices(full.candidates[:2])
+    state.add_many([1, 1], taken)
+    live.sync(state)
+
+    assert _indices(live.top(0)) == _indices(full.candidates[2:7])
+
+    # Undo frees them again, picked up incrementally
+    state.undo()
+    live.sync(state)
+    assert _indices(live.top(0)) == _indices(full.candidates[:5])
+    assert live.row_sorts == 1
+
+
+def test_exhausted_buffer_is_refilled_from_distances():
+    distances, erasmus_df = _data()
+    full = rank_candidates(distances, erasmus_df, top_k=30, identifier_column="ID")[0]
+    live = LiveRankings(distances, erasmus_df, top_k=2, identifier_column="ID", buffer_factor=3)
+    state = AssignmentState()
+    live.sync(state)
+    live.top(0)
+
+    # Take the whole 6-student buffer except one
+    state.add_many([1] * 5, _indices(full.candidates[:5]))
+    live.sync(state)
+
+    assert _indices(live.top(0)) == _indices(full.candidates[5:7])
+    assert live.row_sorts == 2
+
+
+def test_new_state_resets_the_mask():
+    distances, erasmus_df = _data()
+    live = LiveRankings(distances, erasmus_df, top_k=3)
+    state = AssignmentState()
+    first = _indices(live.top(0))
+    state.add_many([1], first[:1])
+    live.sync(state)
+    assert first[0] not in _indices(live.top(0))
+
+    live.sync(AssignmentState())
+    assert _indices(live.top(0)) == first
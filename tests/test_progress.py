@@ -0,0 +1,47 @@
+"""Verify progress reporting through the pipeline and the overall progress/ETA tracker."""
+
+from src.controller.pipeline import run_pipeline_from_config
+from src.controller.progress import ProgressTracker, format_eta
+from src.controller.stage_cache import StageCache
+
+
+def test_pipeline_reports_each_stage_and_match_rows(make_config, pipeline_inputs):
+    reports = []
+    run_pipeline_from_config(
+        make_config(), input_override=pipeline_inputs, cache=StageCache(),
+        progress=lambda stage, done, total: reports.append((stage, done, total))
+    )
+
+    stages = set(stage for stage, _done, _total in reports)
+    assert stages == {
+        "read_esn", "read_erasmus", "ingest_esn", "ingest_erasmus", "validate",
+        "vectorize_esn", "vectorize_erasmus",
+        "match", "rank", "reverse_rank", "fingerprint", "export",
+    }
+    assert [r for r in reports if r[0] == "match"] == [("match", 0, 1), ("match", 1, 2), ("match", 2, 2), ("match", 1, 1)]
+    # Stages that do not run are announced up front
+    assert reports[:3] == [("read_esn", 0, 0), ("read_erasmus", 0, 0), ("reverse_rank", 0, 0)]
+    # Export reports every written sheet/file and ends complete
+    export_steps = [(done, total) for stage, done, total in reports if stage == "export"]
+    assert len(export_steps) > 3 and export_steps[-1] == (1, 1)
+
+
+def test_tracker_fraction_and_eta():
+    now = [0.0]
+    tracker = ProgressTracker(weights={"a": 1.0, "b": 3.0}, clock=lambda: now[0], min_interval=1.0)
+
+    assert tracker.update("a", 0, 1) == (0.0, None)
+    now[0] = 2.0
+    assert tracker.update("a", 1, 1) == (0.25, 6.0)
+    assert tracker.update("b", 1, 3) == (0.5, 2.0)
+    # Too soon after the last report inside the same stage
+    assert tracker.update("b", 2, 3) is None
+    now[0] = 4.0
+    fraction, eta = tracker.update("b", 3, 3)
+    assert fraction == 1.0 and eta == 0.0
+
+
+def test_format_eta():
+    assert format_eta(None) == "ETA --"
+    assert format_eta(42.4) == "ETA 42s"
+    assert format_eta(65) == "ETA 1m 05s"
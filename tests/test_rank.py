@@ -30,3 +30,19 @@ def test_rank_falls_back_to_row_order_when_identifier_missing_or_not_unique():
     rankings = rank.rank_candidates(distances, erasmus_df, top_k=2, identifier_column="Timestamp")
     # Row order preserved because identifier not unique
     assert [c.erasmus_index for c in rankings[0].candidates] == [0, 1]
+
+
+def test_reverse_rankings_match_column_sort(monkeypatch):
+    # Small blocks so several column blocks are exercised
+    monkeypatch.setattr(rank, "REVERSE_BLOCK_COLUMNS", 3)
+    rng = np.random.default_rng(1)
+    distances = rng.integers(0, 4, size=(6, 8)).astype(float)
+    esn_df = pd.DataFrame({"Timestamp": [6, 5, 4, 3, 2, 1]})
+
+    reverse = rank.rank_esn_for_erasmus(distances, esn_df, top_k=3, identifier_column="Timestamp")
+
+    assert [r.erasmus_index for r in reverse] == list(range(8))
+    for col, ranking in enumerate(reverse):
+        expected = sorted(range(6), key=lambda esn: (distances[esn, col], esn_df["Timestamp"][esn]))[:3]
+        assert [c.esn_index for c in ranking.candidates] == expected
+        assert [c.distance for c in ranking.candidates] == [distances[e, col] for e in expected]
@@ -0,0 +1,111 @@
+"""Verify that pipeline stages are only re-run when their inputs change, and are measured."""
+
+import threading
+
+import numpy as np
+
+from src.controller.pipeline import run_pipeline_from_config
+from src.controller.stage_cache import StageCache
+
+
+def test_top_k_change_only_reranks(make_csv_config):
+    cache = StageCache()
+    first = run_pipeline_from_config(make_csv_config(top_k=2), cache=cache)
+    second = run_pipeline_from_config(make_csv_config(top_k=1), cache=cache)
+
+    assert cache.misses == {
+        "read_esn": 1, "read_erasmus": 1, "ingest_esn": 1, "ingest_erasmus": 1, "validate": 1,
+        "vectorize_esn": 1, "vectorize_erasmus": 1, "match": 1, "rank": 2, "fingerprint": 2,
+    }
+    assert cache.hits["match"] == 1
+    np.testing.assert_array_equal(second.distance_counts, first.distance_counts)
+    assert [len(r.candidates) for r in second.rankings] == [1, 1]
+    assert second.fingerprint != first.fingerprint
+
+
+def test_question_change_skips_ingest(make_csv_config):
+    cache = StageCache()
+    run_pipeline_from_config(make_csv_config(), cache=cache)
+    artifacts = run_pipeline_from_config(make_csv_config(question_columns=["Q1"]), cache=cache)
+
+    assert cache.hits == {"read_esn": 1, "read_erasmus": 1, "ingest_esn": 1, "ingest_erasmus": 1}
+    assert cache.misses["match"] == 2
+    np.testing.assert_array_equal(artifacts.distances, [[0, 1, 0], [1, 0, 1]])
+
+
+def test_changed_input_file_is_reloaded(input_dir, make_csv_config):
+    cache = StageCache()
+    run_pipeline_from_config(make_csv_config(), cache=cache)
+
+    esn_path = input_dir / "esn.csv"
+    esn_path.write_text(esn_path.read_text().replace("Anna", "Annabel"))
+    artifacts = run_pipeline_from_config(make_csv_config(), cache=cache)
+
+    assert cache.misses["read_esn"] == 2
+    assert artifacts.esn_df["Name"].tolist() == ["Annabel", "Boris"]
+
+
+def test_filter_change_does_not_reread_files(make_csv_config):
+    cache = StageCache()
+    run_pipeline_from_config(make_csv_config(), cache=cache)
+    config = make_csv_config()
+    config["input"]["buddy_interest_value"] = "No"
+    artifacts = run_pipeline_from_config(config, cache=cache)
+
+    assert cache.hits == {"read_esn": 1, "read_erasmus": 1, "ingest_esn": 1}
+    assert len(artifacts.erasmus_df) == 0
+
+
+def test_entries_are_bounded_per_stage(make_csv_config):
+    cache = StageCache(entries_per_stage=1)
+    for top_k in (1, 2, 1):
+        run_pipeline_from_config(make_csv_config(top_k=top_k), cache=cache)
+
+    assert cache.misses["rank"] == 3
+    assert cache.hits["match"] == 2
+
+
+def test_concurrent_requests_compute_once():
+    cache = StageCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(True)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute("read", "k", compute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get_or_compute("read", "k", compute)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == ["value", "value"]
+    assert len(calls) == 1
+    assert cache.misses == {"read": 1} and cache.hits == {"read": 1}
+
+
+def test_stages_are_instrumented(make_csv_config):
+    cache = StageCache()
+    config = make_csv_config()
+    config["output"]["export_mode"] = "eager"
+    run_pipeline_from_config(config, cache=cache)
+    artifacts = run_pipeline_from_config(config, cache=cache, trace_memory=True)
+
+    stages = [record.stage for record in artifacts.metrics]
+    assert stages == [
+        "read_esn", "read_erasmus", "ingest_esn", "ingest_erasmus", "validate",
+        "vectorize_esn", "vectorize_erasmus", "fingerprint", "match", "rank", "export",
+    ]
+    by_stage = {record.stage: record for record in artifacts.metrics}
+    assert by_stage["match"].rows == 6 and by_stage["match"].cached
+    # The identical previous export is reused as well
+    assert by_stage["export"].cached
+    assert all(record.wall_seconds >= 0 and record.traced_peak_mb is not None for record in artifacts.metrics)